@@ -0,0 +1,353 @@
+"""Finds the fastest scanner configuration that keeps a target recall on a
+labelled sample of images.
+
+Enabling every symbol type - `zbar`'s default - costs time and can produce
+false positives. `autotune` benchmarks combinations of the symbol types that
+occur in the sample, scan densities (`ZBarConfig.CFG_X_DENSITY` and
+`ZBarConfig.CFG_Y_DENSITY`) and, optionally, data length limits
+(`ZBarConfig.CFG_MIN_LEN` and `ZBarConfig.CFG_MAX_LEN`), and returns the
+fastest whose recall is at least `target_recall`. Recall on held-out images,
+which are not used to choose the configuration, shows whether it generalises.
+The resulting `Profile` can be saved as JSON and passed to `decode`::
+
+    profile = autotune(samples, target_recall=0.99).profile
+    decode(image, **profile._asdict())
+
+Run ``python -m pyzbar.autotune labels.csv`` to tune from a CSV file of image
+paths and the data that each contains.
+"""
+from __future__ import print_function
+
+import argparse
+import csv
+import json
+import sys
+import time
+
+from collections import namedtuple
+
+from .pyzbar import (
+    ZBarSymbol, _configure_scanner, _image_scanner, _pixel_data, _scan
+)
+from .wrapper import ZBarConfig
+
+__all__ = [
+    'Profile', 'Trial', 'autotune', 'dump_profile', 'load_profile', 'main'
+]
+
+
+_CLOCK = getattr(time, 'perf_counter', time.time)
+
+
+class Profile(namedtuple('Profile', 'symbols config')):
+    """Arguments for `decode` and `ScannerPool.scanner`.
+
+    Attributes:
+        symbols: :obj:`list` of :obj:`ZBarSymbol`, or `None` for all symbol
+            types.
+        config: :obj:`list` of tuples (ZBarSymbol, ZBarConfig, int).
+    """
+    __slots__ = ()
+
+
+class Trial(namedtuple(
+        'Trial', 'profile recall false_positives seconds holdout_recall')):
+    """The outcome of benchmarking a `Profile`.
+
+    Attributes:
+        profile (Profile): the configuration.
+        recall (float): fraction of the expected values that were decoded.
+        false_positives (int): number of decoded values that were not expected.
+        seconds (float): the least time taken to scan every sample.
+        holdout_recall (float): recall on the held-out samples, or `None` if
+            the profile was not evaluated on any.
+    """
+    __slots__ = ()
+
+    def __new__(cls, profile, recall, false_positives, seconds,
+                holdout_recall=None):
+        return super(Trial, cls).__new__(
+            cls, profile, recall, false_positives, seconds, holdout_recall
+        )
+
+
+# Symbol types for which zbar supports CFG_MIN_LEN and CFG_MAX_LEN
+_VARIABLE_LENGTH = (
+    ZBarSymbol.I25, ZBarSymbol.CODABAR, ZBarSymbol.CODE39, ZBarSymbol.CODE93,
+    ZBarSymbol.CODE128,
+)
+
+
+def _load_samples(samples):
+    """Converts each image once, returning a list of
+    ((pixels, width, height), frozenset of expected data).
+    """
+    return [
+        (_pixel_data(image), frozenset(expected)) for image, expected in samples
+    ]
+
+
+def _run(profile, samples, repeat):
+    """Benchmarks `profile`.
+
+    Returns:
+        Trial
+    """
+    seconds = None
+    with _image_scanner() as scanner:
+        _configure_scanner(scanner, profile.symbols, profile.config)
+        for _ in range(repeat):
+            found = []
+            start = _CLOCK()
+            for (pixels, width, height), _ in samples:
+                found.append(
+                    set(d.data for d in _scan(scanner, pixels, width, height))
+                )
+            elapsed = _CLOCK() - start
+            seconds = elapsed if seconds is None else min(seconds, elapsed)
+
+    expected = sum(len(e) for _, e in samples)
+    matched = sum(len(f & e) for f, (_, e) in zip(found, samples))
+    false_positives = sum(len(f - e) for f, (_, e) in zip(found, samples))
+    recall = float(matched) / expected if expected else 1.0
+    return Trial(profile, recall, false_positives, seconds)
+
+
+def _candidates(samples, densities, length_margin=None):
+    """Generator of profiles to benchmark, learned from decoding `samples`
+    with every symbol type enabled. Length limits are included only if
+    `length_margin` is not `None`.
+    """
+    lengths = {}
+    with _image_scanner() as scanner:
+        for (pixels, width, height), expected in samples:
+            for d in _scan(scanner, pixels, width, height):
+                if d.data in expected and d.type in ZBarSymbol.__members__:
+                    lengths.setdefault(ZBarSymbol[d.type], []).append(
+                        len(d.data)
+                    )
+
+    yield Profile(None, [])
+    symbols = sorted(lengths) or None
+    limits = []
+    if length_margin is not None:
+        limits = [
+            setting
+            for symbol in sorted(set(lengths).intersection(_VARIABLE_LENGTH))
+            for setting in (
+                (
+                    symbol, ZBarConfig.CFG_MIN_LEN,
+                    max(0, min(lengths[symbol]) - length_margin)
+                ),
+                (
+                    symbol, ZBarConfig.CFG_MAX_LEN,
+                    max(lengths[symbol]) + length_margin
+                ),
+            )
+        ]
+    for density in densities:
+        config = [
+            (ZBarSymbol.NONE, ZBarConfig.CFG_X_DENSITY, density),
+            (ZBarSymbol.NONE, ZBarConfig.CFG_Y_DENSITY, density),
+        ]
+        yield Profile(symbols, config)
+        if limits:
+            yield Profile(symbols, config + limits)
+
+
+def autotune(samples, target_recall=1.0, densities=(1, 2, 3, 4), repeat=3,
+             trials=None, length_margin=None, holdout=None):
+    """Returns the fastest configuration that decodes at least
+    `target_recall` of the expected values in `samples`.
+
+    The configurations tried are `zbar`'s defaults and, for each of
+    `densities`, the symbol types found in `samples` - without and, if
+    `length_margin` is given, with data length limits. Ties are broken by the
+    number of false positives.
+
+    Length limits are opt-in because limits learned from a sample reject
+    barcodes whose data are shorter or longer than any in the sample. The
+    limits tried are the shortest and longest lengths of each symbol type in
+    `samples`, widened by `length_margin` characters. Give `holdout` to
+    check that the chosen configuration keeps its recall on other images.
+
+    Args:
+        samples: iterable of tuples (image, expected) - image is a
+            `numpy.ndarray`, `PIL.Image` or tuple (pixels, width, height);
+            expected is an iterable of the data (`bytes`) that the image
+            contains.
+        target_recall (float): the least acceptable fraction of expected
+            values that are decoded.
+        densities: iterable of scan densities - 1 scans every line of
+            pixels, 2 every other line, and so on.
+        repeat (int): each configuration is timed this many times and the
+            fastest time is used.
+        trials (list): if given, every `Trial` is appended to it.
+        length_margin (int): if given, configurations with data length limits
+            are also tried, widened by this many characters either side of
+            the lengths seen in `samples`.
+        holdout: iterable of tuples (image, expected), as `samples`, that are
+            not used to choose the configuration; the recall of the chosen
+            configuration on them is reported in `Trial.holdout_recall`.
+
+    Returns:
+        Trial: the fastest trial whose recall is at least `target_recall`.
+
+    Raises:
+        ValueError: If no configuration reached `target_recall`.
+    """
+    samples = _load_samples(samples)
+    trials = [] if trials is None else trials
+    for profile in _candidates(samples, densities, length_margin):
+        trials.append(_run(profile, samples, repeat))
+
+    acceptable = [t for t in trials if t.recall >= target_recall]
+    if not acceptable:
+        raise ValueError(
+            'No configuration reached a recall of {0}; the best was {1}'.format(
+                target_recall, max(t.recall for t in trials)
+            )
+        )
+    best = min(acceptable, key=lambda t: (t.seconds, t.false_positives))
+    if holdout is not None:
+        checked = _run(best.profile, _load_samples(holdout), 1)
+        best = best._replace(holdout_recall=checked.recall)
+    return best
+
+
+def _profile_to_json(profile):
+    """A dict of `profile` that can be serialised to JSON.
+    """
+    return {
+        'symbols': (
+            None if profile.symbols is None
+            else [ZBarSymbol(s).name for s in profile.symbols]
+        ),
+        'config': [
+            [ZBarSymbol(symbol).name, ZBarConfig(setting).name, value]
+            for symbol, setting, value in profile.config
+        ],
+    }
+
+
+def _profile_from_json(data):
+    """The `Profile` of a dict created by `_profile_to_json`.
+    """
+    symbols = data.get('symbols')
+    return Profile(
+        None if symbols is None else [ZBarSymbol[s] for s in symbols],
+        [
+            (ZBarSymbol[symbol], ZBarConfig[setting], int(value))
+            for symbol, setting, value in data.get('config', [])
+        ]
+    )
+
+
+def dump_profile(profile, fp):
+    """Writes `profile` as JSON to the file-like object `fp`.
+    """
+    json.dump(_profile_to_json(profile), fp, indent=2)
+
+
+def load_profile(fp):
+    """Reads a profile written by `dump_profile` from the file-like object
+    `fp`.
+
+    Returns:
+        Profile
+    """
+    return _profile_from_json(json.load(fp))
+
+
+def _describe(profile):
+    """A one-line summary of `profile`.
+    """
+    symbols = 'ALL' if profile.symbols is None else ','.join(
+        ZBarSymbol(s).name for s in profile.symbols
+    )
+    return ' '.join(['symbols=' + symbols] + [
+        '{0}:{1}={2}'.format(
+            ZBarSymbol(symbol).name, ZBarConfig(setting).name, value
+        )
+        for symbol, setting, value in profile.config
+    ])
+
+
+def _read_labels(path):
+    """Generator of (PIL.Image, expected) from a CSV file of rows of an image
+    path followed by the values that the image contains.
+    """
+    from PIL import Image
+
+    with open(path) as f:
+        for row in csv.reader(f):
+            if row:
+                yield (
+                    Image.open(row[0]),
+                    [value.encode('utf8') for value in row[1:]]
+                )
+
+
+def main(args=None):
+    if args is None:
+        args = sys.argv[1:]
+
+    parser = argparse.ArgumentParser(
+        description='Finds the fastest zbar configuration for a sample of '
+                    'labelled images'
+    )
+    parser.add_argument(
+        'labels',
+        help='CSV file of rows of an image path and the values it contains'
+    )
+    parser.add_argument('--target-recall', type=float, default=1.0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument(
+        '--length-margin', type=int,
+        help='Also try data length limits, widened by this many characters '
+             'either side of the lengths in the labelled images'
+    )
+    parser.add_argument(
+        '--holdout',
+        help='CSV file, as labels, of images on which the recall of the '
+             'chosen configuration is reported'
+    )
+    parser.add_argument(
+        '-o', '--output', help='File to which the profile is written as JSON'
+    )
+    args = parser.parse_args(args)
+
+    trials = []
+    try:
+        best = autotune(
+            _read_labels(args.labels), target_recall=args.target_recall,
+            repeat=args.repeat, trials=trials,
+            length_margin=args.length_margin,
+            holdout=_read_labels(args.holdout) if args.holdout else None
+        )
+    except ValueError as e:
+        sys.exit(str(e))
+
+    for trial in sorted(trials, key=lambda t: t.seconds):
+        print(
+            '{0:.4f}s recall={1:.3f} false_positives={2} {3}'.format(
+                trial.seconds, trial.recall, trial.false_positives,
+                _describe(trial.profile)
+            ),
+            file=sys.stderr
+        )
+    if best.holdout_recall is not None:
+        print(
+            'Held-out recall={0:.3f}'.format(best.holdout_recall),
+            file=sys.stderr
+        )
+    if args.output:
+        with open(args.output, 'w') as f:
+            dump_profile(best.profile, f)
+    else:
+        dump_profile(best.profile, sys.stdout)
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,451 @@
+"""Decodes many images in parallel, using either threads or processes.
+
+Each worker holds a single scanner for its lifetime. An image that is not
+decoded within the per-image `timeout` is reported as timed out and does not
+hold up the rest of the batch: a process worker is terminated and replaced; a
+thread cannot be interrupted so it is abandoned - it exits once `zbar` returns
+- and replaced.
+"""
+import multiprocessing
+import time
+
+from collections import namedtuple
+from threading import Thread
+
+try:
+    import queue
+except ImportError:
+    # Python 2
+    import Queue as queue
+
+try:
+    from multiprocessing.connection import wait
+except ImportError:
+    # Python 2
+    def wait(connections, timeout=None):
+        """Polls `connections` until at least one is ready or `timeout`
+        seconds have passed.
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            ready = [conn for conn in connections if conn.poll()]
+            if ready or (deadline is not None and deadline <= time.time()):
+                return ready
+            time.sleep(0.001)
+
+from .pyzbar import (
+    _configure_scanner, _image_scanner, _pixel_data, _scan_image
+)
+from .pyzbar_error import PyZbarError
+from .sharding import select_shard
+
+__all__ = ['BatchResult', 'BatchStats', 'decode_many', 'iter_decode']
+
+
+_CLOCK = getattr(time, 'perf_counter', time.time)
+
+
+class BatchResult(
+        namedtuple('BatchResult', 'index results error timed_out elapsed')):
+    """The outcome of decoding one image in a batch.
+
+    Attributes:
+        index (int): position of the image in the input.
+        results: :obj:`list` of :obj:`Decoded`; empty if the image could not be
+            decoded.
+        error (Exception): the error raised while decoding the image, or
+            `None`.
+        timed_out (bool): `True` if the image was not decoded within the
+            timeout.
+        elapsed (float): seconds spent decoding the image.
+    """
+    __slots__ = ()
+
+
+class BatchStats(object):
+    """Counts accumulated while decoding a batch.
+
+    Attributes:
+        images (int): number of images for which a result was produced.
+        decoded (int): number of images in which at least one symbol was
+            found.
+        symbols (int): total number of symbols found.
+        errors (int): number of images that raised an error.
+        timeouts (int): number of images that were not decoded within the
+            timeout.
+        recycled (int): number of workers that were replaced after a timeout
+            or a crash.
+        elapsed (float): wall-clock seconds spent on the batch.
+    """
+    def __init__(self):
+        self.images = self.decoded = self.symbols = 0
+        self.errors = self.timeouts = self.recycled = 0
+        self.elapsed = 0.0
+
+    def __repr__(self):
+        return (
+            'BatchStats(images={0}, decoded={1}, symbols={2}, errors={3}, '
+            'timeouts={4}, recycled={5}, elapsed={6:.3f})'
+        ).format(
+            self.images, self.decoded, self.symbols, self.errors,
+            self.timeouts, self.recycled, self.elapsed
+        )
+
+    def _add(self, result):
+        self.images += 1
+        self.decoded += bool(result.results)
+        self.symbols += len(result.results)
+        self.errors += result.error is not None
+        self.timeouts += result.timed_out
+
+
+def _serve(decode, receive, send):
+    """Decodes images received from `receive` until it returns `None`,
+    sending `(index, results, error, elapsed)` for each to `send`.
+    """
+    task = receive()
+    while task is not None:
+        index, image = task
+        start = _CLOCK()
+        try:
+            results, error = decode(image), None
+        except Exception as e:
+            results, error = [], e
+        send((index, results, error, _CLOCK() - start))
+        task = receive()
+
+
+def _decode_tasks(symbols, receive, send, buffer_pool=None):
+    """Serves decode requests using a single scanner.
+    """
+    try:
+        with _image_scanner() as scanner:
+            _configure_scanner(scanner, symbols)
+            return _serve(
+                lambda image: _scan_image(
+                    scanner, image, buffer_pool, vectorized=True
+                ),
+                receive, send
+            )
+    except PyZbarError as e:
+        failure = e
+
+    # The scanner could not be created - report the error for every image
+    def fail(image):
+        raise failure
+
+    _serve(fail, receive, send)
+
+
+class _ThreadWorker(object):
+    def __init__(self, symbols, done, buffer_pool):
+        self.tasks = queue.Queue()
+        self.thread = Thread(
+            target=_decode_tasks,
+            args=(
+                symbols, self.tasks.get, lambda r: done.put((self, r)),
+                buffer_pool
+            )
+        )
+        self.thread.daemon = True
+        self.thread.start()
+
+    def submit(self, index, image):
+        self.tasks.put((index, image))
+
+    def alive(self):
+        return self.thread.is_alive()
+
+    def stop(self):
+        # The thread exits once it has finished any image that it is decoding
+        self.tasks.put(None)
+
+
+class _ThreadPool(object):
+    def __init__(self, symbols, workers, buffer_pool=None):
+        self.symbols = symbols
+        self.buffer_pool = buffer_pool
+        self.done = queue.Queue()
+        self.workers = [
+            _ThreadWorker(symbols, self.done, buffer_pool)
+            for _ in range(workers)
+        ]
+
+    def prepare(self, image):
+        return image
+
+    def collect(self, timeout):
+        """Returns a list of (worker, result) tuples; result is `None` if the
+        worker died.
+        """
+        try:
+            collected = [self.done.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        else:
+            while True:
+                try:
+                    collected.append(self.done.get_nowait())
+                except queue.Empty:
+                    return collected
+
+    def replace(self, worker):
+        worker.stop()
+        self.workers.remove(worker)
+        replacement = _ThreadWorker(
+            self.symbols, self.done, self.buffer_pool
+        )
+        self.workers.append(replacement)
+        return replacement
+
+    def close(self):
+        for worker in self.workers:
+            worker.stop()
+
+
+def _process_main(conn, symbols):
+    try:
+        _decode_tasks(symbols, conn.recv, conn.send)
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        conn.close()
+
+
+class _ProcessWorker(object):
+    def __init__(self, symbols):
+        self.conn, child = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(
+            target=_process_main, args=(child, symbols)
+        )
+        self.process.daemon = True
+        self.process.start()
+        child.close()
+        self.busy = False
+
+    def submit(self, index, image):
+        self.conn.send((index, image))
+        self.busy = True
+
+    def alive(self):
+        return self.process.is_alive()
+
+    def stop(self):
+        if self.busy:
+            # Do not wait for an image that will not be collected
+            self.kill()
+            return
+        try:
+            self.conn.send(None)
+        except (IOError, OSError):
+            pass
+        self.process.join()
+        self.conn.close()
+
+    def kill(self):
+        self.process.terminate()
+        self.process.join()
+        self.conn.close()
+
+
+class _ProcessPool(object):
+    def __init__(self, symbols, workers, buffer_pool=None):
+        # Images are converted before they are sent to worker processes, so
+        # buffer_pool is not used
+        self.symbols = symbols
+        self.workers = [_ProcessWorker(symbols) for _ in range(workers)]
+
+    def prepare(self, image):
+        # Send only eight bits-per-pixel data to worker processes
+        return _pixel_data(image)
+
+    def collect(self, timeout):
+        """Returns a list of (worker, result) tuples; result is `None` if the
+        worker died. Only workers that are decoding an image are waited for,
+        so a worker that dies while idle is not reported here.
+        """
+        by_conn = dict((w.conn, w) for w in self.workers if w.busy)
+        collected = []
+        for conn in wait(list(by_conn), timeout):
+            worker = by_conn[conn]
+            worker.busy = False
+            try:
+                collected.append((worker, conn.recv()))
+            except EOFError:
+                collected.append((worker, None))
+        return collected
+
+    def replace(self, worker):
+        worker.kill()
+        self.workers.remove(worker)
+        replacement = _ProcessWorker(self.symbols)
+        self.workers.append(replacement)
+        return replacement
+
+    def close(self):
+        for worker in self.workers:
+            worker.stop()
+
+
+def _dispatch(pending, pool, timeout, stats, max_in_flight=None):
+    """Generator of `BatchResult`, in the order in which images are decoded.
+
+    Tuples (index, image) are taken from the iterator `pending` only when a
+    worker is free and fewer than `max_in_flight` images are being decoded.
+    """
+    start = _CLOCK()
+    idle = list(pool.workers)
+    busy = {}    # worker -> (index, time at which decoding started)
+    exhausted = False
+    try:
+        while True:
+            while idle and not exhausted and (
+                    max_in_flight is None or len(busy) < max_in_flight):
+                try:
+                    index, image = next(pending)
+                except StopIteration:
+                    exhausted = True
+                else:
+                    worker = idle.pop()
+                    if not worker.alive():
+                        # Died while idle, for example killed by the system
+                        stats.recycled += 1
+                        worker = pool.replace(worker)
+                    try:
+                        image = pool.prepare(image)
+                    except Exception as e:
+                        idle.append(worker)
+                        result = BatchResult(index, [], e, False, 0.0)
+                        stats._add(result)
+                        yield result
+                        continue
+                    try:
+                        worker.submit(index, image)
+                    except Exception as e:
+                        # The worker may be unusable
+                        stats.recycled += 1
+                        idle.append(pool.replace(worker))
+                        result = BatchResult(index, [], e, False, 0.0)
+                        stats._add(result)
+                        yield result
+                    else:
+                        busy[worker] = (index, _CLOCK())
+
+            if not busy:
+                break
+
+            wait_for = None
+            if timeout is not None:
+                earliest = min(started for _, started in busy.values())
+                wait_for = max(0, earliest + timeout - _CLOCK())
+
+            for worker, outcome in pool.collect(wait_for):
+                if worker not in busy:
+                    # Late result from an abandoned thread
+                    continue
+                index, started = busy.pop(worker)
+                if outcome is None:
+                    result = BatchResult(
+                        index, [], RuntimeError('Worker process died'), False,
+                        _CLOCK() - started
+                    )
+                    stats.recycled += 1
+                    idle.append(pool.replace(worker))
+                else:
+                    result = BatchResult(
+                        outcome[0], outcome[1], outcome[2], False, outcome[3]
+                    )
+                    idle.append(worker)
+                stats._add(result)
+                yield result
+
+            if timeout is not None:
+                now = _CLOCK()
+                for worker, (index, started) in list(busy.items()):
+                    if timeout <= now - started:
+                        del busy[worker]
+                        stats.recycled += 1
+                        idle.append(pool.replace(worker))
+                        result = BatchResult(index, [], None, True, now - started)
+                        stats._add(result)
+                        yield result
+    finally:
+        stats.elapsed += _CLOCK() - start
+
+
+def iter_decode(images, symbols=None, workers=None, max_in_flight=None,
+                timeout=None, processes=False, stats=None, buffer_pool=None,
+                shard=None):
+    """Generator that decodes barcodes in each of `images`, in parallel,
+    yielding results as soon as each image is decoded.
+
+    Images are pulled from `images` only as workers become free and results
+    are not retained, so memory use does not grow with the number of images.
+
+    Args:
+        images: iterable of `numpy.ndarray`, `PIL.Image` or tuple (pixels,
+            width, height); may be a lazy iterator.
+        max_in_flight (int): the greatest number of images taken from
+            `images` but not yet yielded; if `None`, the number of workers.
+            Each worker decodes one image at a time, so values greater than
+            `workers` have no effect.
+        Other arguments are as for `decode_many`.
+
+    Yields:
+        :obj:`BatchResult`: in the order in which images are decoded, which
+        is not necessarily the order of `images`.
+    """
+    workers = workers or multiprocessing.cpu_count()
+    if max_in_flight is not None:
+        if max_in_flight < 1:
+            raise ValueError('max_in_flight must be at least 1')
+        workers = min(workers, max_in_flight)
+    stats = BatchStats() if stats is None else stats
+    symbols = list(symbols) if symbols else None
+    if shard is None:
+        pending = enumerate(images)
+    else:
+        pending = select_shard(images, shard)
+    pool = (_ProcessPool if processes else _ThreadPool)(
+        symbols, workers, buffer_pool
+    )
+    try:
+        for result in _dispatch(pending, pool, timeout, stats, max_in_flight):
+            yield result
+    finally:
+        pool.close()
+
+
+def decode_many(images, symbols=None, workers=None, timeout=None,
+                processes=False, stats=None, buffer_pool=None, shard=None):
+    """Decodes barcodes in each of `images`, in parallel.
+
+    Args:
+        images: iterable of `numpy.ndarray`, `PIL.Image` or tuple (pixels,
+            width, height)
+        symbols: iter(ZBarSymbol) the symbol types to decode; if `None`, uses
+            `zbar`'s default behaviour, which is to decode all symbol types.
+        workers (int): number of workers; if `None`, the number of CPUs.
+        timeout (float): seconds allowed for each image; if `None`, images
+            are allowed as long as they need.
+        processes (bool): if `True`, images are decoded in worker processes,
+            which are terminated and replaced when an image times out. If
+            `False`, images are decoded in threads.
+        stats (BatchStats): if given, updated with counts for the batch.
+        buffer_pool (BufferPool): if given, thread workers convert
+            `numpy.ndarray` images into buffers from the pool.
+        shard: if given, 'index/count' or tuple (index, count) - only the
+            images in that shard are decoded. `PIL.Image`s opened from files
+            are assigned to shards by their filenames and other images by
+            their positions in `images`; see `pyzbar.sharding`. Indices of
+            results remain positions in `images`.
+
+    Returns:
+        :obj:`list` of :obj:`BatchResult`: in the same order as `images`.
+    """
+    results = iter_decode(
+        images, symbols=symbols, workers=workers, timeout=timeout,
+        processes=processes, stats=stats, buffer_pool=buffer_pool,
+        shard=shard
+    )
+    return sorted(results, key=lambda r: r.index)
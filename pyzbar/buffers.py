@@ -0,0 +1,102 @@
+"""A pool of reusable greyscale buffers.
+"""
+from collections import namedtuple
+from threading import Lock
+from weakref import WeakValueDictionary
+
+__all__ = ['BufferPool', 'PoolStats']
+
+
+class PoolStats(
+        namedtuple('PoolStats', 'hits misses returned discarded pooled')):
+    """Counts for a `BufferPool`.
+
+    Attributes:
+        hits (int): buffers handed out from the pool.
+        misses (int): buffers allocated because the pool had none of the right
+            shape.
+        returned (int): buffers returned to the pool.
+        discarded (int): buffers dropped on release because the pool was full.
+        pooled (int): buffers currently held by the pool.
+    """
+    __slots__ = ()
+
+
+class BufferPool(object):
+    """A bounded, thread-safe pool of C-contiguous `uint8` `numpy.ndarray`s,
+    keyed by shape.
+
+    Pass an instance to `pyzbar.pyzbar.decode` to have numpy images that are
+    not already eight bits-per-pixel and C-contiguous converted into a
+    recycled buffer, rather than a newly allocated one.
+
+    Args:
+        max_buffers (int): the greatest number of buffers held by the pool.
+    """
+    def __init__(self, max_buffers=8):
+        self.max_buffers = max_buffers
+        self._lock = Lock()
+        self._free = {}           # shape -> list of buffers
+        # Buffers handed out, by id; an entry is dropped if its buffer is
+        # garbage collected without being released, so ids are not confused
+        self._outstanding = WeakValueDictionary()
+        self._pooled = 0
+        self._hits = self._misses = self._returned = self._discarded = 0
+
+    def acquire(self, shape):
+        """Returns a `uint8` buffer of the given shape. Its contents are
+        undefined.
+        """
+        shape = tuple(shape)
+        with self._lock:
+            free = self._free.get(shape)
+            if free:
+                buffer = free.pop()
+                self._pooled -= 1
+                self._hits += 1
+            else:
+                buffer = None
+                self._misses += 1
+
+        if buffer is None:
+            import numpy as np
+            buffer = np.empty(shape, dtype='uint8')
+
+        with self._lock:
+            self._outstanding[id(buffer)] = buffer
+        return buffer
+
+    def release(self, buffer):
+        """Returns `buffer` to the pool. Buffers that were not handed out by
+        `acquire` are ignored.
+        """
+        with self._lock:
+            if self._outstanding.get(id(buffer)) is not buffer:
+                return
+            del self._outstanding[id(buffer)]
+            if self._pooled < self.max_buffers:
+                self._free.setdefault(buffer.shape, []).append(buffer)
+                self._pooled += 1
+                self._returned += 1
+            else:
+                self._discarded += 1
+
+    def clear(self):
+        """Drops all pooled buffers.
+        """
+        with self._lock:
+            self._free.clear()
+            self._pooled = 0
+
+    def stats(self):
+        """Returns:
+            PoolStats: counts for this pool.
+        """
+        with self._lock:
+            return PoolStats(
+                hits=self._hits,
+                misses=self._misses,
+                returned=self._returned,
+                discarded=self._discarded,
+                pooled=self._pooled,
+            )
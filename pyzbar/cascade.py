@@ -0,0 +1,214 @@
+"""Decodes hard images by trying an ordered list of preprocessing strategies.
+"""
+import time
+
+from collections import Counter, namedtuple
+
+from .preprocess import (
+    _as_bytes, _is_duplicate, _unrotate_decoded, binarize, invert, rotate,
+    stretch_contrast
+)
+from .pyzbar import _configure_scanner, _image_scanner, _pixel_data, _scan
+
+__all__ = [
+    'Cascade', 'CascadeResult', 'DEFAULT_STRATEGIES', 'Strategy',
+    'decode_cascade',
+]
+
+
+_CLOCK = getattr(time, 'perf_counter', time.time)
+
+
+class Strategy(namedtuple('Strategy', 'name transform rotation')):
+    """A preprocessing strategy.
+
+    Attributes:
+        name (str): reported in `CascadeResult.strategy`.
+        transform: function (pixels, width, height) -> (pixels, width, height),
+            or `None` to scan the greyscale image as it is.
+        rotation (int): clockwise rotation, in degrees, applied after
+            `transform`. Must be a multiple of 90. Locations are mapped back to
+            the coordinates of the original image.
+    """
+    __slots__ = ()
+
+    def __new__(cls, name, transform=None, rotation=0):
+        return super(Strategy, cls).__new__(cls, name, transform, rotation)
+
+
+class CascadeResult(namedtuple(
+        'CascadeResult',
+        'results strategy attempts elapsed timed_out skipped')):
+    """The outcome of decoding an image with a cascade.
+
+    Attributes:
+        results: :obj:`list` of :obj:`Decoded`.
+        strategy (str): name of the strategy that satisfied the success
+            condition; `None` if no strategy did, in which case `results` holds
+            the largest set of results that was found - or, if `expected` was
+            given, every distinct barcode that was found.
+        attempts (int): number of strategies that were tried.
+        elapsed (float): seconds spent on the image.
+        timed_out (bool): `True` if strategies were skipped because the time
+            budget was exhausted.
+        skipped (int): number of strategies that were not tried because the
+            success condition was satisfied.
+    """
+    __slots__ = ()
+
+    def __new__(cls, results, strategy, attempts, elapsed, timed_out,
+                skipped=0):
+        return super(CascadeResult, cls).__new__(
+            cls, results, strategy, attempts, elapsed, timed_out, skipped
+        )
+
+
+DEFAULT_STRATEGIES = (
+    Strategy('original'),
+    Strategy('stretch_contrast', stretch_contrast),
+    Strategy('binarize', binarize),
+    Strategy('invert', invert),
+    Strategy('rotate90', None, 90),
+)
+
+
+class Cascade(object):
+    """Decodes images using an ordered list of preprocessing strategies.
+
+    The image is converted to greyscale bytes once and a single scanner is
+    used for every strategy. Strategies are tried in order until one of them produces
+    results that satisfy `success`.
+
+    If `expected` is given, the distinct barcodes found by each strategy are
+    accumulated and the cascade stops as soon as there are `expected` of them
+    - for example, `expected=1` for images that each carry a single label.
+
+    Counts of attempts and successes per strategy are kept in `attempts` and
+    `hits`, and the total number of strategies skipped after a success in
+    `skipped`; `reorder` sorts the strategies so that those that most often
+    succeed are tried first.
+
+    Args:
+        strategies: iter(Strategy); if `None`, uses `DEFAULT_STRATEGIES`.
+        symbols: iter(ZBarSymbol) the symbol types to decode; if `None`,
+            decodes all symbol types.
+        timeout (float): per-image budget in seconds. Strategies are not
+            started once the budget is exhausted; the first strategy is
+            always tried. If `None`, all strategies may be tried.
+        success: function (list of Decoded) -> bool; if `None`, any non-empty
+            result is a success.
+        expected (int): if given, the number of distinct barcodes, found by
+            any of the strategies, that is a success. Cannot be given with
+            `success`.
+
+    Raises:
+        ValueError: If there are no strategies, if `expected` is less than 1
+            or if both `success` and `expected` are given.
+    """
+    def __init__(self, strategies=None, symbols=None, timeout=None,
+                 success=None, expected=None):
+        self.strategies = list(
+            DEFAULT_STRATEGIES if strategies is None else strategies
+        )
+        if not self.strategies:
+            raise ValueError('At least one strategy is required')
+        elif expected is not None and expected < 1:
+            raise ValueError('expected must be at least 1')
+        elif expected is not None and success is not None:
+            raise ValueError('Give either success or expected, not both')
+        self.symbols = symbols
+        self.timeout = timeout
+        self.expected = expected
+        if expected is not None:
+            self.success = lambda results: expected <= len(results)
+        else:
+            self.success = bool if success is None else success
+        self.attempts = Counter()
+        self.hits = Counter()
+        self.skipped = 0
+
+    def decode(self, image):
+        """Decodes `image`.
+
+        Args:
+            image: `numpy.ndarray`, `PIL.Image` or tuple (pixels, width,
+                height)
+
+        Returns:
+            CascadeResult: results and the strategy that produced them.
+        """
+        start = _CLOCK()
+        pixels, width, height = _pixel_data(image)
+        if any(s.transform or s.rotation % 360 for s in self.strategies):
+            # Transforms work on bytes - convert once rather than in each
+            pixels = _as_bytes(pixels)
+
+        best, strategy, attempts, timed_out = [], None, 0, False
+        with _image_scanner() as scanner:
+            _configure_scanner(scanner, self.symbols)
+            for candidate in self.strategies:
+                if (attempts and self.timeout is not None and
+                        self.timeout <= _CLOCK() - start):
+                    timed_out = True
+                    break
+
+                attempts += 1
+                self.attempts[candidate.name] += 1
+                results = self._apply(scanner, candidate, pixels, width, height)
+                if self.expected is not None:
+                    # Accumulate the distinct barcodes found by every strategy
+                    results = best + [
+                        d for d in results
+                        if not any(_is_duplicate(d, b) for b in best)
+                    ]
+                if self.success(results):
+                    self.hits[candidate.name] += 1
+                    best, strategy = results, candidate.name
+                    break
+                elif len(best) < len(results):
+                    best = results
+
+        skipped = 0 if strategy is None else len(self.strategies) - attempts
+        self.skipped += skipped
+        return CascadeResult(
+            results=best,
+            strategy=strategy,
+            attempts=attempts,
+            elapsed=_CLOCK() - start,
+            timed_out=timed_out,
+            skipped=skipped,
+        )
+
+    def _apply(self, scanner, strategy, pixels, width, height):
+        """Scans the image after applying `strategy`.
+        """
+        transformed = (pixels, width, height)
+        if strategy.transform:
+            transformed = strategy.transform(*transformed)
+        if strategy.rotation % 360:
+            transformed = rotate(*(transformed + (strategy.rotation,)))
+        return [
+            _unrotate_decoded(decoded, width, height, strategy.rotation)
+            for decoded in _scan(scanner, *transformed)
+        ]
+
+    def reorder(self):
+        """Sorts strategies by the number of times that each succeeded, most
+        successful first. Strategies with equal counts keep their order.
+        """
+        self.strategies.sort(key=lambda s: -self.hits[s.name])
+
+
+def decode_cascade(image, symbols=None, strategies=None, timeout=None,
+                   success=None, expected=None):
+    """Decodes `image`, trying preprocessing strategies in turn until one
+    succeeds. See `Cascade` for a description of the arguments.
+
+    Returns:
+        CascadeResult: results and the strategy that produced them.
+    """
+    cascade = Cascade(
+        strategies=strategies, symbols=symbols, timeout=timeout,
+        success=success, expected=expected
+    )
+    return cascade.decode(image)
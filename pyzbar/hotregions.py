@@ -0,0 +1,250 @@
+"""Decodes batches of similar documents, learning where barcodes are found.
+
+On scanned sheets and forms of one kind, barcodes are usually in roughly the
+same place on every page. `HotRegionDecoder` remembers the regions - relative
+to the size of the image - in which barcodes were found in earlier images and
+scans the regions with the most hits first. The whole image is scanned only
+when the regions do not yield enough barcodes. If the number of barcodes on
+each image is known, regions are scanned only until that many are found.
+"""
+from .locations import Rect
+from .preprocess import _is_duplicate, _translate_decoded, crop
+from .pyzbar import _pixel_data, _scan
+from .scanners import ScannerPool
+
+__all__ = ['HotRegion', 'HotRegionDecoder', 'HotRegionStats']
+
+
+class HotRegionStats(object):
+    """Counts accumulated by a `HotRegionDecoder`.
+
+    Attributes:
+        images (int): number of images decoded.
+        region_scans (int): number of regions scanned.
+        prior_hits (int): number of images that were decoded from their hot
+            regions alone, without a scan of the whole image.
+        full_scans (int): number of images that were scanned in full.
+        pixels_scanned (int): total number of pixels scanned, including
+            regions and full scans.
+        pixels_total (int): total number of pixels in the images.
+        regions_skipped (int): number of hot regions that were not scanned
+            because the expected number of barcodes had been found.
+    """
+    def __init__(self):
+        self.images = self.region_scans = self.prior_hits = 0
+        self.full_scans = self.pixels_scanned = self.pixels_total = 0
+        self.regions_skipped = 0
+
+    @property
+    def hit_rate(self):
+        """Fraction of images decoded from their hot regions alone.
+        """
+        return float(self.prior_hits) / self.images if self.images else 0.0
+
+    @property
+    def scanned_fraction(self):
+        """Pixels scanned as a fraction of those that full scans of every
+        image would have scanned.
+        """
+        if self.pixels_total:
+            return float(self.pixels_scanned) / self.pixels_total
+        else:
+            return 0.0
+
+    def __repr__(self):
+        return (
+            'HotRegionStats(images={0}, region_scans={1}, prior_hits={2}, '
+            'full_scans={3}, regions_skipped={4}, hit_rate={5:.3f}, '
+            'scanned_fraction={6:.3f})'
+        ).format(
+            self.images, self.region_scans, self.prior_hits, self.full_scans,
+            self.regions_skipped, self.hit_rate, self.scanned_fraction
+        )
+
+
+class HotRegion(object):
+    """A region, in coordinates relative to the size of the image, in which
+    barcodes have been found.
+
+    Attributes:
+        left, top, right, bottom (float): bounds, from 0 to 1.
+        hits (int): number of barcodes found in the region.
+    """
+    def __init__(self, left, top, right, bottom):
+        self.left, self.top, self.right, self.bottom = left, top, right, bottom
+        self.hits = 1
+
+    def __repr__(self):
+        return (
+            'HotRegion(left={0:.3f}, top={1:.3f}, right={2:.3f}, '
+            'bottom={3:.3f}, hits={4})'
+        ).format(self.left, self.top, self.right, self.bottom, self.hits)
+
+    def overlaps(self, left, top, right, bottom):
+        return (
+            left < self.right and self.left < right and
+            top < self.bottom and self.top < bottom
+        )
+
+    def extend(self, left, top, right, bottom):
+        """Grows the region to include the given bounds and counts a hit.
+        """
+        self.left, self.top = min(self.left, left), min(self.top, top)
+        self.right = max(self.right, right)
+        self.bottom = max(self.bottom, bottom)
+        self.hits += 1
+
+    def rect(self, width, height, margin):
+        """The region in pixels of an image of size (`width`, `height`),
+        expanded on every side by `margin` times its larger dimension.
+        """
+        left, top = self.left * width, self.top * height
+        region_width = (self.right - self.left) * width
+        region_height = (self.bottom - self.top) * height
+        pad = margin * max(region_width, region_height)
+        return Rect(
+            int(left - pad), int(top - pad),
+            int(region_width + 2 * pad) + 1, int(region_height + 2 * pad) + 1
+        )
+
+
+class HotRegionDecoder(object):
+    """Decodes a batch of similar images, scanning the regions in which
+    barcodes were found in earlier images before scanning the whole image.
+
+    Results are in the coordinates of the full image.
+
+    Args:
+        symbols: iter(ZBarSymbol) the symbol types to decode; if `None`,
+            decodes all symbol types.
+        margin (float): each region is expanded on every side by this
+            fraction of its larger dimension.
+        max_regions (int): the greatest number of regions, those with the most
+            hits, that are scanned before the whole image.
+        min_results (int): the image is scanned in full if its regions yield
+            fewer than this number of barcodes.
+        scanner_pool (ScannerPool): source of scanners; if `None`, the decoder
+            creates its own.
+        expected (int): if given, the number of barcodes on each image;
+            regions are scanned only until this many distinct barcodes are
+            found, and the image is scanned in full if they yield fewer.
+            Overrides `min_results`.
+
+    Raises:
+        ValueError: If `expected` is less than 1.
+    """
+    def __init__(self, symbols=None, margin=0.25, max_regions=3,
+                 min_results=1, scanner_pool=None, expected=None):
+        if expected is not None and expected < 1:
+            raise ValueError('expected must be at least 1')
+        self.symbols = symbols
+        self.margin = margin
+        self.max_regions = max_regions
+        self.min_results = min_results if expected is None else expected
+        self.expected = expected
+        self._own_pool = scanner_pool is None
+        self.scanner_pool = ScannerPool() if self._own_pool else scanner_pool
+        self.stats = HotRegionStats()
+        self.regions = []
+
+    def reset(self):
+        """Forgets the learned regions.
+        """
+        self.regions = []
+
+    def close(self):
+        """Releases scanners created by this decoder.
+        """
+        if self._own_pool:
+            self.scanner_pool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def decode(self, image, buffer_pool=None):
+        """Decodes `image`.
+
+        Args:
+            image: `numpy.ndarray`, `PIL.Image` or tuple (pixels, width,
+                height)
+            buffer_pool (BufferPool): as for `pyzbar.pyzbar.decode`.
+
+        Returns:
+            :obj:`list` of :obj:`Decoded`: The values decoded from barcodes.
+        """
+        self.stats.images += 1
+        pixels, width, height = _pixel_data(image, buffer_pool)
+        self.stats.pixels_total += width * height
+        try:
+            with self.scanner_pool.scanner(self.symbols) as scanner:
+                results = self._scan_regions(scanner, pixels, width, height)
+                if len(results) >= self.min_results:
+                    self.stats.prior_hits += 1
+                else:
+                    results = _scan(scanner, pixels, width, height)
+                    self.stats.full_scans += 1
+                    self.stats.pixels_scanned += width * height
+        finally:
+            if buffer_pool is not None:
+                buffer_pool.release(pixels)
+
+        self._learn(results, width, height)
+        return results
+
+    def decode_iter(self, images, buffer_pool=None):
+        """Generator that decodes each of `images` in turn, learning from
+        each.
+
+        Yields:
+            :obj:`list` of :obj:`Decoded`: results for each image.
+        """
+        for image in images:
+            yield self.decode(image, buffer_pool)
+
+    def _scan_regions(self, scanner, pixels, width, height):
+        """Scans the hot regions, in descending order of hits.
+
+        Returns:
+            :obj:`list` of :obj:`Decoded`
+        """
+        results = []
+        hottest = sorted(self.regions, key=lambda r: r.hits, reverse=True)
+        hottest = hottest[:self.max_regions]
+        for index, region in enumerate(hottest):
+            if self.expected is not None and self.expected <= len(results):
+                self.stats.regions_skipped += len(hottest) - index
+                break
+            rect = region.rect(width, height, self.margin)
+            region_pixels, region_width, region_height = crop(
+                pixels, width, height, rect
+            )
+            if region_width and region_height:
+                self.stats.region_scans += 1
+                self.stats.pixels_scanned += region_width * region_height
+                left, top = max(0, rect.left), max(0, rect.top)
+                for d in _scan(
+                        scanner, region_pixels, region_width, region_height):
+                    d = _translate_decoded(d, left, top)
+                    if not any(_is_duplicate(d, r) for r in results):
+                        results.append(d)
+        return results
+
+    def _learn(self, results, width, height):
+        """Adds the locations of `results` to the hot regions.
+        """
+        for decoded in results:
+            rect = decoded.rect
+            bounds = (
+                float(rect.left) / width, float(rect.top) / height,
+                float(rect.left + rect.width) / width,
+                float(rect.top + rect.height) / height,
+            )
+            for region in self.regions:
+                if region.overlaps(*bounds):
+                    region.extend(*bounds)
+                    break
+            else:
+                self.regions.append(HotRegion(*bounds))
@@ -3,7 +3,10 @@ from itertools import chain
 from operator import itemgetter
 
 
-__all__ = ['bounding_box', 'convex_hull', 'Point', 'Rect']
+__all__ = [
+    'bounding_box', 'bounding_boxes', 'convex_hull', 'convex_hulls', 'flatten',
+    'Point', 'Rect'
+]
 
 
 Point = namedtuple('Point', ['x', 'y'])
@@ -68,3 +71,214 @@ def convex_hull(points):
     )
 
     return list(map(Point._make, hull))
+
+
+# Directions in which the extreme points of each set are found by
+# `convex_hulls`, in counter-clockwise order
+_DIRECTIONS = (
+    (1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1), (1, -1)
+)
+
+
+def flatten(sets):
+    """Packs sets of (x, y) coordinates into the flat layout taken by
+    `bounding_boxes` and `convex_hulls`.
+
+    Args:
+        sets: iterable of iterables of (x, y) tuples.
+
+    Returns:
+        `tuple`: (xs, ys, offsets) - `numpy.ndarray`s of the x and y
+        coordinates of all sets, one set after another, and of the N + 1
+        offsets at which each set starts and the last ends; set `i` is
+        `xs[offsets[i]:offsets[i + 1]]`.
+    """
+    import numpy as np
+
+    sets = [list(points) for points in sets]
+    coordinates = np.array(
+        list(chain.from_iterable(sets)), dtype='int32'
+    ).reshape(-1, 2)
+    offsets = np.zeros(len(sets) + 1, dtype='intp')
+    np.cumsum([len(points) for points in sets], out=offsets[1:])
+    return (
+        np.ascontiguousarray(coordinates[:, 0]),
+        np.ascontiguousarray(coordinates[:, 1]),
+        offsets
+    )
+
+
+def _check_offsets(offsets):
+    """Returns `offsets` as an array of indices.
+
+    Raises:
+        ValueError: If a set is empty.
+    """
+    import numpy as np
+
+    offsets = np.asarray(offsets, dtype='intp')
+    if np.any(np.diff(offsets) <= 0):
+        raise ValueError('Every set of coordinates must contain a point')
+    return offsets
+
+
+def bounding_boxes(xs, ys, offsets):
+    """Computes the bounding boxes of many sets of (x, y) coordinates at once.
+
+    Args:
+        xs, ys, offsets: coordinates in the layout returned by `flatten`.
+
+    Returns:
+        `numpy.ndarray`: of shape (N, 4) - the left, top, width and height of
+        the bounding box of each set.
+
+    Raises:
+        ValueError: If a set is empty.
+    """
+    import numpy as np
+
+    xs, ys, offsets = np.asarray(xs), np.asarray(ys), _check_offsets(offsets)
+    if len(offsets) < 2:
+        return np.empty((0, 4), dtype=xs.dtype)
+    starts = offsets[:-1]
+    left = np.minimum.reduceat(xs, starts)
+    top = np.minimum.reduceat(ys, starts)
+    right = np.maximum.reduceat(xs, starts)
+    bottom = np.maximum.reduceat(ys, starts)
+    return np.stack([left, top, right - left, bottom - top], axis=1)
+
+
+def _discard_interior(xs, ys, sets, count):
+    """Discards the points that lie strictly inside the octagon formed by the
+    extreme points of their set in eight directions, which cannot be vertices
+    of its hull.
+    """
+    import numpy as np
+
+    starts = np.searchsorted(sets, np.arange(count))
+    positions = np.arange(len(xs))
+
+    # The first point of each set that is furthest in each direction
+    extremes = []
+    for dx, dy in _DIRECTIONS:
+        projection = dx * xs + dy * ys
+        furthest = np.maximum.reduceat(projection, starts)[sets]
+        candidates = np.where(projection == furthest, positions, len(xs))
+        extremes.append(np.minimum.reduceat(candidates, starts))
+
+    inside = np.ones(len(xs), dtype=bool)
+    for start, end in zip(extremes, extremes[1:] + extremes[:1]):
+        x0, y0 = xs[start][sets], ys[start][sets]
+        edge_x, edge_y = xs[end][sets] - x0, ys[end][sets] - y0
+        cross = edge_x * (ys - y0) - edge_y * (xs - x0)
+        # Edges between coincident extremes are ignored
+        inside &= (0 < cross) | ((0 == edge_x) & (0 == edge_y))
+    for extreme in extremes:
+        inside[extreme] = False
+
+    return xs[~inside], ys[~inside], sets[~inside]
+
+
+def _prune(xs, ys, sets, order):
+    """The points of each set that `convex_hull` keeps in one of its two
+    chains, found for all sets at once.
+
+    `order` visits the points of each set, one set after another, in the
+    order in which the chain is built. A point that does not turn strictly
+    clockwise from the points before and after it in the chain cannot be a
+    vertex of the chain, because it lies on or beyond the line between two
+    other points of its set. All such points are removed together, and the
+    removal is repeated with the new neighbours until every turn is
+    clockwise. The first and last points of each set are always kept.
+
+    Returns:
+        `numpy.ndarray`: `bool` mask of the points in the chain.
+    """
+    import numpy as np
+
+    keep = np.ones(len(xs), dtype=bool)
+    chain = order
+    while 2 < len(chain):
+        a, b, c = chain[:-2], chain[1:-1], chain[2:]
+        cross = (
+            (xs[b] - xs[a]) * (ys[c] - ys[a]) -
+            (ys[b] - ys[a]) * (xs[c] - xs[a])
+        )
+        remove = (0 <= cross) & (sets[a] == sets[b]) & (sets[b] == sets[c])
+        if not remove.any():
+            break
+        keep[b[remove]] = False
+        chain = chain[keep[chain]]
+    return keep
+
+
+def convex_hulls(xs, ys, offsets):
+    """Computes the convex hulls of many sets of (x, y) coordinates at once.
+
+    The points of every set are sorted and duplicates removed in one pass.
+    If the sets have more than eight points on average, points that lie
+    strictly inside the octagon formed by the extreme points of their set in
+    eight directions, which cannot be vertices of its hull, are discarded.
+    The two chains of Andrew's monotone chain algorithm, as used by
+    `convex_hull`, are then found for all sets together by repeatedly
+    removing the points at which a chain does not turn clockwise, so no step
+    loops over the sets in Python.
+
+    Args:
+        xs, ys, offsets: coordinates in the layout returned by `flatten`.
+
+    Returns:
+        `tuple`: (xs, ys, offsets) - the vertices of the hull of each set, in
+        the same layout and in the order returned by `convex_hull`.
+
+    Raises:
+        ValueError: If a set is empty.
+    """
+    import numpy as np
+
+    xs, ys, offsets = np.asarray(xs), np.asarray(ys), _check_offsets(offsets)
+    dtype = xs.dtype
+    count = len(offsets) - 1
+    if count < 1:
+        return xs[:0], ys[:0], np.zeros(1, dtype='intp')
+    # Wide enough for the cross products of image coordinates
+    xs, ys = xs.astype('int64'), ys.astype('int64')
+    sets = np.repeat(np.arange(count), np.diff(offsets))
+
+    # Sort by set, then x, then y, and discard duplicates
+    order = np.lexsort((ys, xs, sets))
+    xs, ys, sets = xs[order], ys[order], sets[order]
+    distinct = np.ones(len(xs), dtype=bool)
+    distinct[1:] = (
+        (sets[1:] != sets[:-1]) | (xs[1:] != xs[:-1]) | (ys[1:] != ys[:-1])
+    )
+    xs, ys, sets = xs[distinct], ys[distinct], sets[distinct]
+    # The octagon has eight vertices, so it can discard points only from sets
+    # that have more
+    if 8 * count < len(xs):
+        xs, ys, sets = _discard_interior(xs, ys, sets, count)
+    positions = np.arange(len(xs))
+    first = np.ones(len(xs), dtype=bool)
+    first[1:] = sets[1:] != sets[:-1]
+    last = np.ones(len(xs), dtype=bool)
+    last[:-1] = sets[1:] != sets[:-1]
+
+    # convex_hull joins the chain built forwards without its last point to
+    # the chain built backwards without its last point, which is the first
+    # point of the set. A set of one point is its own hull.
+    forward = _prune(xs, ys, sets, positions) & ~last
+    backward = _prune(xs, ys, sets, positions[::-1]) & ~first
+    forward |= first & last
+    hull = np.concatenate([
+        np.flatnonzero(forward), np.flatnonzero(backward)[::-1]
+    ])
+    # Order by set, then forward chain before backward, then along the chain
+    chain_index = np.concatenate([
+        positions[forward], len(xs) + (len(xs) - positions[backward][::-1])
+    ])
+    hull = hull[np.lexsort((chain_index, sets[hull]))]
+    hull_offsets = np.searchsorted(sets[hull], np.arange(count + 1))
+    return (
+        xs[hull].astype(dtype), ys[hull].astype(dtype),
+        hull_offsets.astype('intp')
+    )
@@ -0,0 +1,131 @@
+"""Decodes multi-page images and sequences of images one page at a time.
+"""
+from threading import Event, Thread
+
+try:
+    import queue
+except ImportError:
+    # Python 2
+    import Queue as queue
+
+from .pyzbar import _configure_scanner, _image_scanner, _pixel_data, _scan
+
+__all__ = ['iter_decode_pages']
+
+
+# Marks the end of the pages produced by a loader thread
+_END = object()
+
+
+def _is_path(item):
+    return isinstance(item, str) or hasattr(item, '__fspath__')
+
+
+def _pages_of(path):
+    """Generator of pages of the image file at `path`, converted to
+    greyscale. Only the current page is held in memory.
+    """
+    from PIL import Image, ImageSequence
+
+    image = Image.open(str(path))
+    try:
+        for page in ImageSequence.Iterator(image):
+            yield _pixel_data(page)
+    finally:
+        image.close()
+
+
+def _load(source):
+    """Generator of pages of `source` as tuples (pixels, width, height).
+    """
+    if _is_path(source):
+        for page in _pages_of(source):
+            yield page
+    else:
+        for item in source:
+            if _is_path(item):
+                for page in _pages_of(item):
+                    yield page
+            else:
+                yield _pixel_data(item)
+
+
+def _read_ahead(pages, depth):
+    """Generator that yields items from `pages`, which are produced by a
+    background thread that stays up to `depth` items ahead.
+    """
+    loaded = queue.Queue(maxsize=depth)
+    stop = Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                loaded.put(item, timeout=0.1)
+            except queue.Full:
+                pass
+            else:
+                return True
+        return False
+
+    def produce():
+        try:
+            for page in pages:
+                if not put((page, None)):
+                    return
+        except Exception as e:
+            put((_END, e))
+        else:
+            put((_END, None))
+        finally:
+            # Closes any file that is open when reading stops early
+            pages.close()
+
+    thread = Thread(target=produce)
+    thread.daemon = True
+    thread.start()
+    try:
+        while True:
+            page, error = loaded.get()
+            if page is _END:
+                if error:
+                    raise error
+                break
+            yield page
+    finally:
+        stop.set()
+        thread.join()
+
+
+def iter_decode_pages(source, symbols=None, read_ahead=0):
+    """Generator that decodes one page at a time, so that only the page being
+    decoded - and those read ahead - are held in memory.
+
+    Args:
+        source: path of an image file, each page of which is decoded (e.g. a
+            multi-page TIFF), or an iterable of paths and images
+            (`numpy.ndarray`, `PIL.Image` or tuple (pixels, width, height)).
+            Each page of each path is decoded. Paths are opened with `PIL`.
+        symbols: iter(ZBarSymbol) the symbol types to decode; if `None`,
+            decodes all symbol types.
+        read_ahead (int): number of pages that are loaded by a background
+            thread while the current page is scanned; if 0, pages are loaded
+            only when needed.
+
+    Yields:
+        :obj:`tuple` (page_index, results) - results is a :obj:`list` of
+        :obj:`Decoded`.
+    """
+    pages = _load(source)
+    if read_ahead:
+        pages = _read_ahead(pages, read_ahead)
+
+    try:
+        with _image_scanner() as scanner:
+            _configure_scanner(scanner, symbols)
+            for index, (pixels, width, height) in enumerate(pages):
+                results = _scan(scanner, pixels, width, height)
+                # Drop the page before yielding
+                del pixels
+                yield index, results
+    finally:
+        pages.close()
@@ -0,0 +1,114 @@
+"""Decodes one image with several scanners at once, each restricted to a group
+of symbol types, to reduce the time taken to decode a single large image.
+
+A scanner with every symbol type enabled passes each scan line through every
+decoder in turn. `decode_parallel` instead scans the same pixels concurrently
+with one scanner for each group - by default linear codes on one and QR and SQ
+codes on another - and merges the results.
+"""
+from threading import Thread
+
+from .preprocess import _is_duplicate
+from .pyzbar import ZBarSymbol, _pixel_data, _scan
+from .scanners import ScannerPool
+
+__all__ = ['DEFAULT_GROUPS', 'decode_parallel']
+
+
+# The scanner runs the linear decoders, including PDF417, on every scan line;
+# QR and SQ codes are located and decoded in separate passes.
+DEFAULT_GROUPS = (
+    (
+        ZBarSymbol.EAN2, ZBarSymbol.EAN5, ZBarSymbol.EAN8, ZBarSymbol.UPCE,
+        ZBarSymbol.ISBN10, ZBarSymbol.UPCA, ZBarSymbol.EAN13,
+        ZBarSymbol.ISBN13, ZBarSymbol.COMPOSITE, ZBarSymbol.I25,
+        ZBarSymbol.DATABAR, ZBarSymbol.DATABAR_EXP, ZBarSymbol.CODABAR,
+        ZBarSymbol.CODE39, ZBarSymbol.PDF417, ZBarSymbol.CODE93,
+        ZBarSymbol.CODE128,
+    ),
+    (ZBarSymbol.QRCODE, ZBarSymbol.SQCODE),
+)
+
+# Values of ZBarSymbol that are not symbol types
+_NOT_SYMBOLS = (ZBarSymbol.NONE, ZBarSymbol.PARTIAL)
+
+# Used when a pool is not given
+_SCANNER_POOL = ScannerPool()
+
+
+def _split(symbols, groups):
+    """Returns a list of lists of the members of `symbols` in each group.
+    Symbols that are not in any group form a group of their own.
+    """
+    if not symbols:
+        symbols = [s for s in ZBarSymbol if s not in _NOT_SYMBOLS]
+    remaining = list(symbols)
+    split = []
+    for group in groups:
+        members = [s for s in remaining if s in group]
+        if members:
+            split.append(members)
+            remaining = [s for s in remaining if s not in group]
+    if remaining:
+        split.append(remaining)
+    return split
+
+
+def decode_parallel(image, symbols=None, groups=DEFAULT_GROUPS,
+                    scanner_pool=None, buffer_pool=None):
+    """Decodes `image` with one scanner for each group of symbol types,
+    running concurrently on the same pixels.
+
+    Args:
+        image: `numpy.ndarray`, `PIL.Image` or tuple (pixels, width, height)
+        symbols: iter(ZBarSymbol) the symbol types to decode; if `None`,
+            decodes all symbol types.
+        groups: iterable of iterables of `ZBarSymbol` - each group of the
+            types in `symbols` is decoded by its own scanner. Types that are
+            not in any group are decoded together.
+        scanner_pool (ScannerPool): source of scanners; if `None`, a pool
+            shared by all calls is used.
+        buffer_pool (BufferPool): as for `pyzbar.pyzbar.decode`.
+
+    Returns:
+        :obj:`list` of :obj:`Decoded`: The values decoded from barcodes, in
+        the order of `groups`, without duplicates.
+
+    Raises:
+        PyZbarError: If the image could not be scanned.
+    """
+    scanner_pool = _SCANNER_POOL if scanner_pool is None else scanner_pool
+    split = _split(symbols, groups)
+    pixels, width, height = _pixel_data(image, buffer_pool)
+    outcomes = [None] * len(split)
+
+    def scan(index):
+        try:
+            with scanner_pool.scanner(split[index]) as scanner:
+                outcomes[index] = (_scan(scanner, pixels, width, height), None)
+        except Exception as e:
+            outcomes[index] = ([], e)
+
+    try:
+        # The last group is scanned by the calling thread
+        threads = [
+            Thread(target=scan, args=(index,))
+            for index in range(len(split) - 1)
+        ]
+        for thread in threads:
+            thread.start()
+        scan(len(split) - 1)
+        for thread in threads:
+            thread.join()
+    finally:
+        if buffer_pool is not None:
+            buffer_pool.release(pixels)
+
+    merged = []
+    for results, error in outcomes:
+        if error is not None:
+            raise error
+        for decoded in results:
+            if not any(_is_duplicate(decoded, m) for m in merged):
+                merged.append(decoded)
+    return merged
@@ -0,0 +1,267 @@
+"""Decodes a batch in two stages - loading and decoding - each with its own
+pool of threads, so that reading and decompressing the next images overlaps
+with scanning the current ones.
+
+Loaders open each source, convert it to greyscale and put it on a bounded
+queue, from which decoders take images to scan. The number of loaders, the
+number of decoders and the depth of the queue are set independently.
+`PrefetchStats` reports how busy each stage was and how long it waited for the
+other, which shows whether loading or decoding limits throughput::
+
+    stats = PrefetchStats()
+    for result in iter_decode_prefetched(paths, loaders=8, decoders=2,
+                                         stats=stats):
+        ...
+    stats.bottleneck
+"""
+import multiprocessing
+import time
+
+from threading import Event, Lock, Thread
+
+try:
+    import queue
+except ImportError:
+    # Python 2
+    import Queue as queue
+
+from .batch import BatchResult
+from .pyzbar import _configure_scanner, _image_scanner, _pixel_data, _scan
+
+__all__ = ['PrefetchStats', 'iter_decode_prefetched', 'load_grey']
+
+
+_CLOCK = getattr(time, 'perf_counter', time.time)
+
+# Marks the end of the loaded images
+_END = object()
+
+# Seconds between checks for cancellation by threads that are blocked
+_POLL_INTERVAL = 0.05
+
+
+class PrefetchStats(object):
+    """Time spent by each stage of `iter_decode_prefetched`.
+
+    Attributes:
+        loaders (int): number of loader threads.
+        decoders (int): number of decoder threads.
+        images (int): number of images for which a result was produced.
+        errors (int): number of images that could not be loaded or decoded.
+        load_busy (float): total seconds that loaders spent loading.
+        load_blocked (float): total seconds that loaders waited for space in
+            the queue - high when decoding is the bottleneck.
+        decode_busy (float): total seconds that decoders spent scanning.
+        decode_starved (float): total seconds that decoders waited for an
+            image - high when loading is the bottleneck.
+        elapsed (float): wall-clock seconds spent on the batch.
+    """
+    def __init__(self):
+        self.loaders = self.decoders = self.images = self.errors = 0
+        self.load_busy = self.load_blocked = 0.0
+        self.decode_busy = self.decode_starved = 0.0
+        self.elapsed = 0.0
+
+    def _utilisation(self, busy, threads):
+        capacity = self.elapsed * threads
+        return busy / capacity if capacity else 0.0
+
+    @property
+    def load_utilisation(self):
+        """Fraction of the loaders' time spent loading.
+        """
+        return self._utilisation(self.load_busy, self.loaders)
+
+    @property
+    def decode_utilisation(self):
+        """Fraction of the decoders' time spent scanning.
+        """
+        return self._utilisation(self.decode_busy, self.decoders)
+
+    @property
+    def bottleneck(self):
+        """'load' if decoders spent a larger fraction of their time waiting
+        for images than loaders spent waiting for space in the queue,
+        otherwise 'decode'.
+        """
+        starved = self._utilisation(self.decode_starved, self.decoders)
+        blocked = self._utilisation(self.load_blocked, self.loaders)
+        return 'load' if starved > blocked else 'decode'
+
+    def __repr__(self):
+        return (
+            'PrefetchStats(images={0}, errors={1}, loaders={2}, '
+            'decoders={3}, load_utilisation={4:.3f}, '
+            'decode_utilisation={5:.3f}, bottleneck={6!r}, elapsed={7:.3f})'
+        ).format(
+            self.images, self.errors, self.loaders, self.decoders,
+            self.load_utilisation, self.decode_utilisation, self.bottleneck,
+            self.elapsed
+        )
+
+
+def load_grey(source):
+    """Returns (pixels, width, height) of `source` - a path, which is opened
+    with `PIL`, or an image accepted by `decode`.
+    """
+    if isinstance(source, str) or hasattr(source, '__fspath__'):
+        from PIL import Image
+
+        with Image.open(str(source)) as image:
+            return _pixel_data(image)
+    else:
+        return _pixel_data(source)
+
+
+def iter_decode_prefetched(sources, symbols=None, loaders=4, decoders=None,
+                           queue_depth=None, load=load_grey, stats=None):
+    """Generator that loads images on one pool of threads and decodes them on
+    another, yielding results as soon as each image is decoded.
+
+    Sources are taken from `sources` only as loaders become free and at most
+    `queue_depth` loaded images wait to be decoded, so memory use does not
+    grow with the size of the batch.
+
+    Args:
+        sources: iterable of paths or images; may be a lazy iterator.
+        symbols: iter(ZBarSymbol) the symbol types to decode; if `None`,
+            decodes all symbol types.
+        loaders (int): number of threads that load images.
+        decoders (int): number of threads that decode images, each with its
+            own scanner; if `None`, the number of CPUs.
+        queue_depth (int): the greatest number of loaded images waiting to be
+            decoded; if `None`, twice the number of decoders.
+        load: function that returns the tuple (pixels, width, height) for a
+            member of `sources`.
+        stats (PrefetchStats): if given, updated with timings of each stage.
+
+    Yields:
+        :obj:`BatchResult`: in the order in which images are decoded. `index`
+        is the position of the source in `sources`; `elapsed` is the time
+        spent scanning. An image that could not be loaded has the error.
+    """
+    decoders = decoders or multiprocessing.cpu_count()
+    queue_depth = queue_depth or 2 * decoders
+    if loaders < 1 or queue_depth < 1:
+        raise ValueError('loaders and queue_depth must be at least 1')
+    stats = PrefetchStats() if stats is None else stats
+    stats.loaders, stats.decoders = loaders, decoders
+    symbols = list(symbols) if symbols else None
+
+    pending = enumerate(sources)
+    loaded = queue.Queue(maxsize=queue_depth)
+    results = queue.Queue(maxsize=decoders)
+    lock = Lock()
+    stop = Event()
+    running = [loaders, decoders]
+
+    def put(q, item):
+        """Puts `item` on `q` unless stopped; returns seconds blocked.
+        """
+        start = _CLOCK()
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=_POLL_INTERVAL)
+            except queue.Full:
+                pass
+            else:
+                break
+        return _CLOCK() - start
+
+    def next_source():
+        with lock:
+            return next(pending, None)
+
+    def run_loader():
+        item = None
+        try:
+            item = next_source()
+            while item is not None and not stop.is_set():
+                index, source = item
+                start = _CLOCK()
+                try:
+                    loaded_item = (index, load(source), None)
+                except Exception as e:
+                    loaded_item = (index, None, e)
+                busy = _CLOCK() - start
+                blocked = put(loaded, loaded_item)
+                with lock:
+                    stats.load_busy += busy
+                    stats.load_blocked += blocked
+                item = next_source()
+        except Exception as e:
+            # The source iterator raised
+            put(results, BatchResult(None, [], e, False, 0.0))
+        finally:
+            with lock:
+                running[0] -= 1
+                last = 0 == running[0]
+            if last:
+                for _ in range(decoders):
+                    put(loaded, _END)
+
+    def run_decoder():
+        try:
+            with _image_scanner() as scanner:
+                _configure_scanner(scanner, symbols)
+                while not stop.is_set():
+                    start = _CLOCK()
+                    try:
+                        item = loaded.get(timeout=_POLL_INTERVAL)
+                    except queue.Empty:
+                        with lock:
+                            stats.decode_starved += _CLOCK() - start
+                        continue
+                    starved = _CLOCK() - start
+                    if item is _END:
+                        break
+                    index, image, error = item
+                    start = _CLOCK()
+                    decoded = []
+                    if error is None:
+                        try:
+                            decoded = _scan(
+                                scanner, *image, vectorized=True
+                            )
+                        except Exception as e:
+                            error = e
+                    elapsed = _CLOCK() - start
+                    del image, item
+                    with lock:
+                        stats.decode_starved += starved
+                        stats.decode_busy += elapsed
+                    put(
+                        results,
+                        BatchResult(index, decoded, error, False, elapsed)
+                    )
+        except Exception as e:
+            put(results, BatchResult(None, [], e, False, 0.0))
+        finally:
+            with lock:
+                running[1] -= 1
+                last = 0 == running[1]
+            if last:
+                put(results, _END)
+
+    threads = [Thread(target=run_loader) for _ in range(loaders)]
+    threads += [Thread(target=run_decoder) for _ in range(decoders)]
+    start = _CLOCK()
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    try:
+        while True:
+            result = results.get()
+            if result is _END:
+                break
+            elif result.index is None:
+                # The sources or a scanner failed
+                raise result.error
+            stats.images += 1
+            stats.errors += result.error is not None
+            yield result
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+        stats.elapsed += _CLOCK() - start
@@ -0,0 +1,178 @@
+"""Rejects blank and low-information images before they are scanned.
+
+Blank pages, separator sheets and over-exposed frames cannot contain a barcode
+but still cost a full scan. `Prefilter` computes cheap statistics on a grid of
+samples of the image - the standard deviation, the range of values and the
+number of strong edges between neighbouring samples - and rejects images in
+which there is too little contrast for a barcode. Pass an instance to
+`decode`::
+
+    prefilter = Prefilter()
+    decode(image, prefilter=prefilter)
+    prefilter.stats
+
+The statistics are computed with `numpy`, if it is installed.
+"""
+from collections import namedtuple
+from threading import Lock
+
+__all__ = ['ImageStatistics', 'Prefilter', 'PrefilterStats', 'image_statistics']
+
+
+class ImageStatistics(
+        namedtuple('ImageStatistics', 'std spread edges samples')):
+    """Statistics of a grid of samples of an image.
+
+    Attributes:
+        std (float): standard deviation of the samples.
+        spread (int): difference between the lightest and darkest samples.
+        edges (int): number of pairs of horizontally or vertically adjacent
+            samples whose values differ by at least the edge threshold.
+        samples (int): number of samples.
+    """
+    __slots__ = ()
+
+
+def _step(width, height, grid):
+    """The distance between samples so that there are at most `grid` samples
+    along the longer side.
+    """
+    return max(1, -(-max(width, height) // grid))
+
+
+def _numpy_statistics(pixels, width, height, grid, edge_threshold):
+    import numpy as np
+
+    if not hasattr(pixels, 'ctypes'):
+        pixels = np.frombuffer(pixels, dtype='uint8', count=width * height)
+    step = _step(width, height, grid)
+    samples = pixels.reshape(height, width)[::step, ::step].astype('int16')
+    edges = (
+        np.count_nonzero(
+            np.abs(np.diff(samples, axis=0)) >= edge_threshold
+        ) +
+        np.count_nonzero(
+            np.abs(np.diff(samples, axis=1)) >= edge_threshold
+        )
+    )
+    return ImageStatistics(
+        float(samples.std()), int(samples.max()) - int(samples.min()),
+        int(edges), samples.size
+    )
+
+
+def _python_statistics(pixels, width, height, grid, edge_threshold):
+    step = _step(width, height, grid)
+    rows = [
+        bytearray(pixels[row:row + width:step])
+        for row in range(0, width * height, width * step)
+    ]
+    values = [v for row in rows for v in row]
+    mean = float(sum(values)) / len(values)
+    std = (sum((v - mean) ** 2 for v in values) / len(values)) ** 0.5
+    edges = sum(
+        1 for row in rows for a, b in zip(row, row[1:])
+        if abs(a - b) >= edge_threshold
+    )
+    edges += sum(
+        1 for above, below in zip(rows, rows[1:])
+        for a, b in zip(above, below) if abs(a - b) >= edge_threshold
+    )
+    return ImageStatistics(std, max(values) - min(values), edges, len(values))
+
+
+def image_statistics(pixels, width, height, grid=256, edge_threshold=32):
+    """Computes statistics of a grid of samples of an image.
+
+    Args:
+        pixels: eight bits-per-pixel image data - `bytes` or a C-contiguous
+            `numpy.ndarray`
+        width (int): width of the image
+        height (int): height of the image
+        grid (int): the greatest number of samples along each side.
+        edge_threshold (int): the least difference between adjacent samples
+            that counts as an edge.
+
+    Returns:
+        ImageStatistics
+    """
+    if not (width and height):
+        return ImageStatistics(0.0, 0, 0, 0)
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        statistics = _python_statistics
+    else:
+        statistics = _numpy_statistics
+    return statistics(pixels, width, height, grid, edge_threshold)
+
+
+class PrefilterStats(object):
+    """Counts accumulated by a `Prefilter`.
+
+    Attributes:
+        checked (int): number of images checked.
+        skipped (int): number of images rejected, which were not scanned.
+    """
+    def __init__(self):
+        self.checked = self.skipped = 0
+
+    @property
+    def skip_rate(self):
+        return float(self.skipped) / self.checked if self.checked else 0.0
+
+    def __repr__(self):
+        return 'PrefilterStats(checked={0}, skipped={1})'.format(
+            self.checked, self.skipped
+        )
+
+
+class Prefilter(object):
+    """Rejects images that have too little contrast to contain a barcode.
+
+    An image is rejected if any of its statistics falls below the
+    corresponding threshold. The defaults reject uniform and nearly uniform
+    images, such as `pyzbar/tests/empty.png`, blank scanned pages and
+    over-exposed frames, and accept every image in `pyzbar/tests` that
+    contains a barcode, including small barcodes on large pages.
+
+    Instances are safe to share between threads.
+
+    Args:
+        min_std (float): the least standard deviation of the samples.
+        min_spread (int): the least difference between the lightest and
+            darkest samples.
+        min_edges (int): the least number of strong edges between adjacent
+            samples.
+        edge_threshold (int): the least difference between adjacent samples
+            that counts as an edge.
+        grid (int): the greatest number of samples along each side of the
+            image.
+    """
+    def __init__(self, min_std=1.0, min_spread=32, min_edges=4,
+                 edge_threshold=32, grid=256):
+        self.min_std = min_std
+        self.min_spread = min_spread
+        self.min_edges = min_edges
+        self.edge_threshold = edge_threshold
+        self.grid = grid
+        self.stats = PrefilterStats()
+        self._lock = Lock()
+
+    def rejects(self, pixels, width, height):
+        """Returns:
+            bool: `True` if the image cannot contain a barcode and need not
+            be scanned.
+        """
+        statistics = image_statistics(
+            pixels, width, height, self.grid, self.edge_threshold
+        )
+        rejected = (
+            statistics.std < self.min_std or
+            statistics.spread < self.min_spread or
+            statistics.edges < self.min_edges
+        )
+        with self._lock:
+            self.stats.checked += 1
+            self.stats.skipped += rejected
+        return rejected
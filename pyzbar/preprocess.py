@@ -0,0 +1,234 @@
+"""Transforms of eight bits-per-pixel greyscale images.
+
+Each transform takes and returns a tuple (pixels, width, height), the same
+form accepted by `pyzbar.pyzbar.decode`. Transforms are implemented using
+`bytes.translate` and slicing so that they do not require numpy.
+"""
+from collections import Counter
+
+from .locations import Point, Rect, bounding_box, convex_hull
+
+__all__ = ['binarize', 'crop', 'invert', 'rotate', 'stretch_contrast']
+
+
+_RANGEFN = getattr(globals(), 'xrange', range)
+
+# Orientations in clockwise order
+_ORIENTATIONS = ['UP', 'RIGHT', 'DOWN', 'LEFT']
+
+# Upper bound on the number of pixels sampled when computing histograms
+_HISTOGRAM_SAMPLES = 1 << 16
+
+
+def _as_bytes(pixels):
+    """Returns `pixels` as an instance of `bytes`, copying only if required.
+    """
+    return pixels if isinstance(pixels, bytes) else bytes(bytearray(pixels))
+
+
+def _lookup(pixels, table):
+    """Maps each pixel value through the 256-entry `table`.
+    """
+    return _as_bytes(pixels).translate(bytes(bytearray(table)))
+
+
+def invert(pixels, width, height):
+    """Swaps dark and light - reveals light barcodes on dark backgrounds.
+
+    Returns:
+        :obj: `tuple` (pixels, width, height)
+    """
+    return _lookup(pixels, _RANGEFN(255, -1, -1)), width, height
+
+
+def stretch_contrast(pixels, width, height):
+    """Linearly maps the darkest pixel to 0 and the lightest to 255.
+
+    Returns:
+        :obj: `tuple` (pixels, width, height)
+    """
+    pixels = _as_bytes(pixels)
+    values = bytearray(pixels)
+    low, high = min(values), max(values)
+    if high <= low:
+        return pixels, width, height
+    else:
+        scale = 255.0 / (high - low)
+        table = (
+            min(255, max(0, int(round((value - low) * scale))))
+            for value in _RANGEFN(256)
+        )
+        return _lookup(pixels, table), width, height
+
+
+def _otsu_threshold(pixels):
+    """Otsu's threshold, computed from a subsample of `pixels`.
+    """
+    step = max(1, len(pixels) // _HISTOGRAM_SAMPLES)
+    histogram = Counter(bytearray(pixels[::step]))
+    total = sum(histogram.values())
+    sum_all = sum(value * count for value, count in histogram.items())
+
+    best, threshold = -1.0, 127
+    weight_below, sum_below = 0, 0
+    for value in _RANGEFN(256):
+        weight_below += histogram[value]
+        if not weight_below:
+            continue
+        weight_above = total - weight_below
+        if not weight_above:
+            break
+        sum_below += value * histogram[value]
+        mean_below = float(sum_below) / weight_below
+        mean_above = float(sum_all - sum_below) / weight_above
+        variance = (
+            weight_below * weight_above * (mean_below - mean_above) ** 2
+        )
+        if variance > best:
+            best, threshold = variance, value
+    return threshold
+
+
+def binarize(pixels, width, height, threshold=None):
+    """Maps pixels to either 0 or 255.
+
+    Args:
+        threshold (int): pixels with values greater than `threshold` become
+            255; if `None`, Otsu's method is used to compute a threshold.
+
+    Returns:
+        :obj: `tuple` (pixels, width, height)
+    """
+    pixels = _as_bytes(pixels)
+    if threshold is None:
+        threshold = _otsu_threshold(pixels)
+    table = (0 if value <= threshold else 255 for value in _RANGEFN(256))
+    return _lookup(pixels, table), width, height
+
+
+def rotate(pixels, width, height, degrees):
+    """Rotates clockwise by a multiple of 90 degrees.
+
+    Returns:
+        :obj: `tuple` (pixels, width, height) - width and height are swapped
+        for rotations of 90 and 270 degrees.
+    """
+    pixels = _as_bytes(pixels)
+    degrees %= 360
+    if 0 == degrees:
+        return pixels, width, height
+    elif 90 == degrees:
+        # Row r of the output is column r of the input, read bottom to top
+        rows = (pixels[c::width][::-1] for c in _RANGEFN(width))
+    elif 180 == degrees:
+        return pixels[::-1], width, height
+    elif 270 == degrees:
+        # Row r of the output is column (width - 1 - r), read top to bottom
+        rows = (pixels[c::width] for c in _RANGEFN(width - 1, -1, -1))
+    else:
+        raise ValueError(
+            'Unsupported rotation [{0}] degrees'.format(degrees)
+        )
+    return b''.join(rows), height, width
+
+
+def crop(pixels, width, height, rect):
+    """Extracts the region `rect`, clipped to the bounds of the image.
+
+    Args:
+        pixels: `bytes` or a two-dimensional `numpy.ndarray`
+        rect (Rect): the region to extract.
+
+    Returns:
+        :obj: `tuple` (pixels, width, height) - pixels is of the same type as
+        the input; width and height are zero if the region lies outside the
+        image.
+    """
+    left, top = max(0, rect.left), max(0, rect.top)
+    right = min(width, rect.left + rect.width)
+    bottom = min(height, rect.top + rect.height)
+    if right <= left or bottom <= top:
+        return pixels[:0], 0, 0
+    elif hasattr(pixels, 'ctypes'):
+        import numpy as np
+        region = np.ascontiguousarray(pixels[top:bottom, left:right])
+    else:
+        region = b''.join(
+            pixels[row + left:row + right]
+            for row in _RANGEFN(top * width, bottom * width, width)
+        )
+    return region, right - left, bottom - top
+
+
+def _translate_decoded(decoded, dx, dy):
+    """Moves the locations of `decoded` by (`dx`, `dy`).
+
+    Returns:
+        Decoded: with `rect` and `polygon` updated.
+    """
+    if not (dx or dy):
+        return decoded
+    else:
+        rect = decoded.rect
+        return decoded._replace(
+            rect=Rect(rect.left + dx, rect.top + dy, rect.width, rect.height),
+            polygon=[Point(x + dx, y + dy) for x, y in decoded.polygon],
+        )
+
+
+def _center(rect):
+    return rect.left + rect.width / 2.0, rect.top + rect.height / 2.0
+
+
+def _is_duplicate(a, b):
+    """`True` if `a` and `b` have the same type and data and their centres
+    are closer than half the size of the larger of them - i.e. they are the
+    same barcode, found in overlapping regions.
+    """
+    if a.type != b.type or a.data != b.data:
+        return False
+    else:
+        (ax, ay), (bx, by) = _center(a.rect), _center(b.rect)
+        size = max(a.rect.width, a.rect.height, b.rect.width, b.rect.height)
+        return abs(ax - bx) <= size / 2.0 and abs(ay - by) <= size / 2.0
+
+
+def _unrotate_point(x, y, width, height, degrees):
+    """Maps (x, y) in an image that was rotated clockwise by `degrees` back to
+    coordinates in the original image of size (`width`, `height`).
+    """
+    degrees %= 360
+    if 90 == degrees:
+        return y, height - 1 - x
+    elif 180 == degrees:
+        return width - 1 - x, height - 1 - y
+    elif 270 == degrees:
+        return width - 1 - y, x
+    else:
+        return x, y
+
+
+def _unrotate_decoded(decoded, width, height, degrees):
+    """Maps the locations and orientation of `decoded`, found in an image
+    that was rotated clockwise by `degrees`, back to the original image of
+    size (`width`, `height`).
+
+    Returns:
+        Decoded: with `rect`, `polygon` and `orientation` updated.
+    """
+    if 0 == degrees % 360:
+        return decoded
+    else:
+        polygon = convex_hull(
+            _unrotate_point(x, y, width, height, degrees)
+            for x, y in decoded.polygon
+        )
+        orientation = decoded.orientation
+        if orientation in _ORIENTATIONS:
+            index = _ORIENTATIONS.index(orientation) - (degrees % 360) // 90
+            orientation = _ORIENTATIONS[index % 4]
+        return decoded._replace(
+            rect=bounding_box(polygon),
+            polygon=polygon,
+            orientation=orientation,
+        )
@@ -1,15 +1,21 @@
 from collections import namedtuple
 from contextlib import contextmanager
-from ctypes import cast, c_void_p, string_at
+from ctypes import cast, c_ubyte, c_void_p, string_at
 
-from .locations import bounding_box, convex_hull, Point, Rect
+from .locations import (
+    bounding_box, bounding_boxes, convex_hull, convex_hulls, flatten, Point,
+    Rect
+)
 from .pyzbar_error import PyZbarError
 from .wrapper import (
     zbar_image_scanner_set_config,
     zbar_image_scanner_create, zbar_image_scanner_destroy,
-    zbar_image_create, zbar_image_destroy, zbar_image_set_format,
+    zbar_image_create, zbar_image_destroy, zbar_image_convert,
+    zbar_image_set_format,
     zbar_image_set_size, zbar_image_set_data, zbar_scan_image,
-    zbar_image_first_symbol, zbar_symbol_get_data_length,
+    zbar_image_first_symbol, zbar_image_get_symbols,
+    zbar_symbol_set_first_symbol, zbar_symbol_set_ref,
+    zbar_symbol_get_data_length,
     zbar_symbol_get_data, zbar_symbol_get_orientation,
     zbar_symbol_get_loc_size, zbar_symbol_get_loc_x, zbar_symbol_get_loc_y,
     zbar_symbol_get_quality, zbar_symbol_next, ZBarConfig, ZBarOrientation,
@@ -17,12 +23,16 @@ from .wrapper import (
 )
 
 __all__ = [
-    'decode', 'Point', 'Rect', 'Decoded', 'ZBarSymbol', 'EXTERNAL_DEPENDENCIES', 'ORIENTATION_AVAILABLE'
+    'decode', 'Point', 'Rect', 'Decoded', 'SymbolSet', 'ZBarSymbol',
+    'EXTERNAL_DEPENDENCIES', 'ORIENTATION_AVAILABLE', 'RETAIN_AVAILABLE'
 ]
 
 
 ORIENTATION_AVAILABLE = zbar_symbol_get_orientation is not None
 
+# decode(..., retain=True) needs memoryview.cast and release - Python 3
+RETAIN_AVAILABLE = hasattr(memoryview, 'cast')
+
 Decoded = namedtuple('Decoded', 'data type rect polygon quality orientation')
 
 # ZBar's magic 'fourcc' numbers that represent image formats
@@ -31,8 +41,41 @@ _FOURCC = {
     'GRAY': 1497715271
 }
 
+
+def _fourcc(code):
+    """ZBar's fourcc number for the four-character `code`.
+    """
+    return sum(ord(c) << (8 * index) for index, c in enumerate(code))
+
+
+# Camera formats accepted by `decode`: name -> (bytes per two pixels, whether
+# `zbar` must convert the frame). The first width x height bytes of the planar
+# formats are the luma (Y) plane, which is scanned as it is. `zbar` extracts the
+# luma from the packed formats.
+_FRAME_FORMATS = {
+    'Y800': (2, False),
+    'GREY': (2, False),
+    'NV12': (3, False),
+    'NV21': (3, False),
+    'I420': (3, False),
+    'YU12': (3, False),
+    'YV12': (3, False),
+    'YUYV': (4, True),
+    'YUY2': (4, True),
+    'YVYU': (4, True),
+    'UYVY': (4, True),
+    'VYUY': (4, True),
+}
+
 _RANGEFN = getattr(globals(), 'xrange', range)
 
+# Polygons are computed for all symbols at once only if there are at least
+# this many symbols or this many locations in all. With fewer, the fixed cost
+# of the numpy calls is greater than the cost of computing each polygon in
+# turn.
+_VECTORIZE_MIN_SYMBOLS = 32
+_VECTORIZE_MIN_LOCATIONS = 512
+
 
 @contextmanager
 def _image():
@@ -91,58 +134,264 @@ def _symbols_for_image(image):
         symbol = zbar_symbol_next(symbol)
 
 
-def _decode_symbols(symbols):
+def _symbols_for_set(symbol_set):
+    """Generator of the symbols in a `zbar_symbol_set`.
+
+    Args:
+        symbol_set: `zbar_symbol_set`
+
+    Yields:
+        POINTER(zbar_symbol): Symbol
+    """
+    symbol = zbar_symbol_set_first_symbol(symbol_set)
+    while symbol:
+        yield symbol
+        symbol = zbar_symbol_next(symbol)
+
+
+def _copy_data(symbol):
+    """Returns a copy of the data of `symbol` as `bytes`.
+    """
+    return string_at(
+        zbar_symbol_get_data(symbol),
+        zbar_symbol_get_data_length(symbol)
+    )
+
+
+class _SymbolSetReference(object):
+    """A reference to a `zbar_symbol_set`, which is dropped when this object is
+    garbage-collected.
+    """
+    def __init__(self, symbol_set):
+        zbar_symbol_set_ref(symbol_set, 1)
+        self.symbol_set = symbol_set
+
+    def __del__(self):
+        zbar_symbol_set_ref(self.symbol_set, -1)
+
+
+def _view_data(symbol, reference):
+    """Returns a read-only `memoryview` of the data of `symbol`, which keeps
+    `reference`, and so the symbol, alive.
+    """
+    length = zbar_symbol_get_data_length(symbol)
+    if not length:
+        return memoryview(b'')
+    address = cast(zbar_symbol_get_data(symbol), c_void_p).value
+    array = (c_ubyte * length).from_address(address)
+    array.reference = reference
+    view = memoryview(array).cast('B')
+    # memoryview.toreadonly was added in Python 3.8
+    return view.toreadonly() if hasattr(view, 'toreadonly') else view
+
+
+def _symbol_type(symbol):
+    """Returns the name of the type of `symbol`.
+    """
+    # The 'type' int should be a value in the ZBarSymbol enumeration
+    try:
+        symbol_type = ZBarSymbol(symbol.contents.type)
+    except ValueError:
+        # This release of zbar supports a type that pyzbar does not know about
+        return "Unrecognised type [{0}]".format(symbol.contents.type)
+    else:
+        return symbol_type.name
+
+
+def _orientation(symbol):
+    """Returns the name of the orientation of `symbol`, or `None` if this
+    release of `zbar` does not report orientation.
+    """
+    if zbar_symbol_get_orientation:
+        return ZBarOrientation(zbar_symbol_get_orientation(symbol)).name
+    else:
+        return None
+
+
+def _locations(symbol):
+    """Generator of the (x, y) locations of `symbol`.
+    """
+    for index in _RANGEFN(zbar_symbol_get_loc_size(symbol)):
+        yield (
+            zbar_symbol_get_loc_x(symbol, index),
+            zbar_symbol_get_loc_y(symbol, index)
+        )
+
+
+def _decode_symbols(symbols, data=_copy_data):
     """Generator of decoded symbol information.
 
     Args:
         symbols: iterable of instances of `POINTER(zbar_symbol)`
+        data: function that returns the data of a symbol
 
     Yields:
         Decoded: decoded symbol
     """
     for symbol in symbols:
-        data = string_at(
-            zbar_symbol_get_data(symbol),
-            zbar_symbol_get_data_length(symbol)
+        polygon = convex_hull(_locations(symbol))
+        yield Decoded(
+            data=data(symbol),
+            type=_symbol_type(symbol),
+            rect=bounding_box(polygon),
+            polygon=polygon,
+            orientation=_orientation(symbol),
+            quality=zbar_symbol_get_quality(symbol),
         )
-        # The 'type' int should be a value in the ZBarSymbol enumeration
-        try:
-            symbol_type = ZBarSymbol(symbol.contents.type)
-        except ValueError:
-            # This release of zbar supports a type that pyzbar does not know about
-            symbol_type = "Unrecognised type [{0}]".format(symbol.contents.type)
-        else:
-            symbol_type = symbol_type.name
 
-        quality = zbar_symbol_get_quality(symbol)
-        polygon = convex_hull(
-            (
-                zbar_symbol_get_loc_x(symbol, index),
-                zbar_symbol_get_loc_y(symbol, index)
-            )
-            for index in _RANGEFN(zbar_symbol_get_loc_size(symbol))
-        )
 
-        if zbar_symbol_get_orientation:
-            orientation = ZBarOrientation(zbar_symbol_get_orientation(symbol)).name
-        else:
-            orientation = None
+def _decode_symbol_batch(symbols, data=_copy_data):
+    """Decodes `symbols` as `_decode_symbols` does, but computes the polygons
+    and bounding boxes of all of them at once with `convex_hulls` and
+    `bounding_boxes` if there are enough symbols or locations for that to be
+    faster - see `_VECTORIZE_MIN_SYMBOLS`. Otherwise, or if `numpy` is not
+    installed, they are computed per symbol.
 
-        yield Decoded(
-            data=data,
-            type=symbol_type,
-            rect=bounding_box(polygon),
+    Args:
+        symbols: iterable of instances of `POINTER(zbar_symbol)`
+        data: function that returns the data of a symbol
+
+    Returns:
+        :obj:`list` of :obj:`Decoded`: decoded symbols
+    """
+    symbols = list(symbols)
+    locations = [list(_locations(symbol)) for symbol in symbols]
+    count = sum(len(points) for points in locations)
+    vectorize = bool(symbols) and (
+        _VECTORIZE_MIN_SYMBOLS <= len(symbols) or
+        _VECTORIZE_MIN_LOCATIONS <= count
+    )
+    if vectorize:
+        try:
+            import numpy  # noqa: F401
+        except ImportError:
+            vectorize = False
+
+    if vectorize:
+        xs, ys, offsets = convex_hulls(*flatten(locations))
+        rects = list(map(Rect._make, bounding_boxes(xs, ys, offsets).tolist()))
+        xs, ys, offsets = xs.tolist(), ys.tolist(), offsets.tolist()
+        polygons = [
+            list(map(Point._make, zip(xs[start:end], ys[start:end])))
+            for start, end in zip(offsets[:-1], offsets[1:])
+        ]
+    else:
+        polygons = [convex_hull(points) for points in locations]
+        rects = [bounding_box(polygon) for polygon in polygons]
+
+    return [
+        Decoded(
+            data=data(symbol),
+            type=_symbol_type(symbol),
+            rect=rect,
             polygon=polygon,
-            orientation=orientation,
-            quality=quality,
+            orientation=_orientation(symbol),
+            quality=zbar_symbol_get_quality(symbol),
         )
+        for symbol, rect, polygon in zip(symbols, rects, polygons)
+    ]
+
+
+class SymbolSet(object):
+    """The values decoded from an image by `decode(image, retain=True)`.
 
+    A sequence of :obj:`Decoded` that holds a reference to the symbols
+    decoded by `zbar`, rather than copies of their data: the `data` of each
+    `Decoded` is a read-only `memoryview` of `zbar`'s memory, which is copied
+    only if the caller copies it, for example with `bytes(decoded.data)`.
 
-def _pixel_data(image):
+    The views are valid until `release()` is called, either explicitly or on
+    leaving a `with` block; after that they raise `ValueError` if used.
+    `copy()` returns results with `data` copied to `bytes`, which remain
+    valid after the set is released. `zbar` frees the symbols once the set
+    has been released and any objects created from the views, such as a
+    `numpy.ndarray`, have been garbage-collected.
+
+    Requires Python 3, whose views can be cast and released.
+
+    Args:
+        symbol_set: `zbar_symbol_set`, which may be `NULL`
+
+    Raises:
+        PyZbarError: On Python 2.
+    """
+    def __init__(self, symbol_set):
+        if not RETAIN_AVAILABLE:
+            raise PyZbarError('retain=True requires Python 3')
+        self.released = False
+        if symbol_set:
+            reference = _SymbolSetReference(symbol_set)
+            self._decoded = list(_decode_symbols(
+                _symbols_for_set(symbol_set),
+                lambda symbol: _view_data(symbol, reference)
+            ))
+        else:
+            self._decoded = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.release()
+
+    def _check(self):
+        if self.released:
+            raise PyZbarError('Symbol set has been released')
+
+    def __len__(self):
+        self._check()
+        return len(self._decoded)
+
+    def __getitem__(self, index):
+        self._check()
+        return self._decoded[index]
+
+    def __iter__(self):
+        self._check()
+        return iter(self._decoded)
+
+    def __repr__(self):
+        if self.released:
+            return 'SymbolSet(released)'
+        else:
+            return 'SymbolSet({0!r})'.format(self._decoded)
+
+    def copy(self):
+        """Returns:
+            :obj:`list` of :obj:`Decoded`: the values, with `data` copied to
+            `bytes`.
+        """
+        return [d._replace(data=bytes(d.data)) for d in self]
+
+    def release(self):
+        """Releases the views of the data. Calling `release` more than once
+        has no effect.
+        """
+        for decoded in self._decoded:
+            try:
+                decoded.data.release()
+            except BufferError:
+                # The view is exported, and keeps the symbols alive until the
+                # exporting object is garbage-collected
+                pass
+        self._decoded = []
+        self.released = True
+
+
+def _pixel_data(image, buffer_pool=None):
     """Returns (pixels, width, height)
 
+    A C-contiguous, eight bits-per-pixel `numpy.ndarray` is returned as it is,
+    without copying its data. Other `numpy.ndarray`s are converted into a
+    buffer from `buffer_pool`, if given.
+
+    Args:
+        image: `numpy.ndarray`, `PIL.Image` or tuple (pixels, width, height)
+        buffer_pool (BufferPool): source of buffers for converted images.
+
     Returns:
-        :obj: `tuple` (pixels, width, height)
+        :obj: `tuple` (pixels, width, height) - pixels is either `bytes` or
+        a `numpy.ndarray`
     """
     # Test for PIL.Image, numpy.ndarray, and imageio.core.util without
     # requiring that cv2, PIL, or imageio are installed.
@@ -152,6 +401,7 @@ def _pixel_data(image):
         if 'L' != image.mode:
             image = image.convert('L')
         pixels = image.tobytes()
+        length = len(pixels)
         width, height = image.size
     elif 'numpy.ndarray' in image_type or 'imageio.core.util' in image_type:
         # Different versions of imageio use a subclass of numpy.ndarray
@@ -159,30 +409,39 @@ def _pixel_data(image):
         if 3 == len(image.shape):
             # Take just the first channel
             image = image[:, :, 0]
-        if 'uint8' != str(image.dtype):
-            image = image.astype('uint8')
-        try:
-            pixels = image.tobytes()
-        except AttributeError:
-            # `numpy.ndarray.tobytes()` introduced in `numpy` 1.9.0 - use the
-            # older `tostring` method.
-            pixels = image.tostring()
+        if 'uint8' == str(image.dtype) and image.flags['C_CONTIGUOUS']:
+            pixels = image
+        else:
+            import numpy as np
+            if buffer_pool is None:
+                pixels = np.empty(image.shape, dtype='uint8')
+            else:
+                pixels = buffer_pool.acquire(image.shape)
+            try:
+                # Same conversion as `image.astype('uint8')`
+                np.copyto(pixels, image, casting='unsafe')
+            except Exception:
+                if buffer_pool is not None:
+                    buffer_pool.release(pixels)
+                raise
+        length = pixels.nbytes
         height, width = image.shape[:2]
     else:
         # image should be a tuple (pixels, width, height)
         pixels, width, height = image
+        length = len(pixels)
 
         # Check dimensions
-        if 0 != len(pixels) % (width * height):
+        if 0 != length % (width * height):
             raise PyZbarError(
                 (
                     'Inconsistent dimensions: image data of {0} bytes is not '
                     'divisible by (width x height = {1})'
-                ).format(len(pixels), (width * height))
+                ).format(length, (width * height))
             )
 
     # Compute bits-per-pixel
-    bpp = 8 * len(pixels) // (width * height)
+    bpp = 8 * length // (width * height)
     if 8 != bpp:
         raise PyZbarError(
             'Unsupported bits-per-pixel [{0}]. Only [8] is supported.'.format(
@@ -193,44 +452,246 @@ def _pixel_data(image):
     return pixels, width, height
 
 
-def decode(image, symbols=None):
-    """Decodes datamatrix barcodes in `image`.
+def _configure_scanner(scanner, symbols, config=None):
+    """Restricts `scanner` to the symbol types in `symbols` and applies
+    `config`.
 
     Args:
-        image: `numpy.ndarray`, `PIL.Image` or tuple (pixels, width, height)
+        scanner: `zbar_image_scanner`
         symbols: iter(ZBarSymbol) the symbol types to decode; if `None`, uses
             `zbar`'s default behaviour, which is to decode all symbol types.
+        config: iter of tuples (ZBarSymbol, ZBarConfig, int) - settings
+            applied after `symbols`; `ZBarSymbol.NONE` applies a setting to
+            the scanner or to every symbol type.
+    """
+    if symbols:
+        # Disable all but the symbols of interest
+        disable = set(ZBarSymbol).difference(symbols)
+        for symbol in disable:
+            zbar_image_scanner_set_config(
+                scanner, symbol, ZBarConfig.CFG_ENABLE, 0
+            )
+        # I think it likely that zbar will detect all symbol types by
+        # default, in which case enabling the types of interest is
+        # redundant but it seems sensible to be over-cautious and enable
+        # them.
+        for symbol in symbols:
+            zbar_image_scanner_set_config(
+                scanner, symbol, ZBarConfig.CFG_ENABLE, 1
+            )
+    if config:
+        for symbol, setting, value in config:
+            zbar_image_scanner_set_config(scanner, symbol, setting, value)
+
+
+def _scan(scanner, pixels, width, height, fourcc=_FOURCC['L800'],
+          retain=False, vectorized=False):
+    """Scans image data using a configured scanner.
+
+    Args:
+        scanner: `zbar_image_scanner`
+        pixels: image data - `bytes` or a C-contiguous `numpy.ndarray`
+        width (int): width of the image
+        height (int): height of the image
+        fourcc (int): format of `pixels`; formats other than eight
+            bits-per-pixel greyscale are converted by `zbar`.
+        retain (bool): if `True`, returns a `SymbolSet`.
+        vectorized (bool): if `True`, computes the polygons and bounding
+            boxes of all symbols at once; see `_decode_symbol_batch`.
 
     Returns:
         :obj:`list` of :obj:`Decoded`: The values decoded from barcodes.
-    """
-    pixels, width, height = _pixel_data(image)
 
-    results = []
-    with _image_scanner() as scanner:
-        if symbols:
-            # Disable all but the symbols of interest
-            disable = set(ZBarSymbol).difference(symbols)
-            for symbol in disable:
-                zbar_image_scanner_set_config(
-                    scanner, symbol, ZBarConfig.CFG_ENABLE, 0
-                )
-            # I think it likely that zbar will detect all symbol types by
-            # default, in which case enabling the types of interest is
-            # redundant but it seems sensible to be over-cautious and enable
-            # them.
-            for symbol in symbols:
-                zbar_image_scanner_set_config(
-                    scanner, symbol, ZBarConfig.CFG_ENABLE, 1
+    Raises:
+        PyZbarError: If the image could not be converted or scanned.
+    """
+    with _image() as img:
+        zbar_image_set_format(img, fourcc)
+        zbar_image_set_size(img, width, height)
+        if hasattr(pixels, 'ctypes'):
+            # numpy.ndarray - pass a pointer to its data
+            data, length = c_void_p(pixels.ctypes.data), pixels.nbytes
+        else:
+            data, length = cast(pixels, c_void_p), len(pixels)
+        zbar_image_set_data(img, data, length, None)
+        if fourcc in (_FOURCC['L800'], _FOURCC['GRAY']):
+            return _scan_zbar_image(scanner, img, retain, vectorized)
+        else:
+            converted = zbar_image_convert(img, _FOURCC['L800'])
+            if not converted:
+                raise PyZbarError('Could not convert image')
+            try:
+                return _scan_zbar_image(
+                    scanner, converted, retain, vectorized
                 )
-        with _image() as img:
-            zbar_image_set_format(img, _FOURCC['L800'])
-            zbar_image_set_size(img, width, height)
-            zbar_image_set_data(img, cast(pixels, c_void_p), len(pixels), None)
-            decoded = zbar_scan_image(scanner, img)
-            if decoded < 0:
-                raise PyZbarError('Unsupported image format')
-            else:
-                results.extend(_decode_symbols(_symbols_for_image(img)))
+            finally:
+                zbar_image_destroy(converted)
+
+
+def _scan_zbar_image(scanner, img, retain=False, vectorized=False):
+    """Scans an eight bits-per-pixel `zbar_image`.
+
+    Returns:
+        :obj:`list` of :obj:`Decoded`: The values decoded from barcodes, or a
+        `SymbolSet` of them if `retain` is `True`.
+    """
+    decoded = zbar_scan_image(scanner, img)
+    if decoded < 0:
+        raise PyZbarError('Unsupported image format')
+    elif retain:
+        return SymbolSet(zbar_image_get_symbols(img))
+    elif vectorized:
+        return _decode_symbol_batch(_symbols_for_image(img))
+    else:
+        return list(_decode_symbols(_symbols_for_image(img)))
+
+
+def _frame_data(image, format):
+    """Returns (pixels, width, height, fourcc) for a camera frame in `format`.
+
+    A `numpy.ndarray` frame must be C-contiguous and eight bits-per-element,
+    with shape (height, width) for Y800 and GREY, (height * 3 / 2, width) for
+    the planar 4:2:0 formats and (height, width, 2) or (height, width * 2) for
+    the packed 4:2:2 formats. The luma plane of the planar formats is passed
+    to `zbar` without copying.
+
+    Args:
+        image: `numpy.ndarray` or tuple (pixels, width, height)
+        format (:obj:`str`): a key of `_FRAME_FORMATS`
+
+    Returns:
+        :obj: `tuple` (pixels, width, height, fourcc)
+
+    Raises:
+        PyZbarError: If the format is not supported, if the shape of an array
+            is not that of a whole frame or if the frame is too small.
+    """
+    try:
+        bytes_per_two, convert = _FRAME_FORMATS[format]
+    except KeyError:
+        raise PyZbarError(
+            'Unsupported format [{0}]. Supported formats are {1}.'.format(
+                format, sorted(_FRAME_FORMATS)
+            )
+        )
+
+    if 'numpy.ndarray' in str(type(image)):
+        if 'uint8' != str(image.dtype) or not image.flags['C_CONTIGUOUS']:
+            raise PyZbarError(
+                'Frames must be C-contiguous arrays of uint8'
+            )
+        shape = image.shape
+        if convert:
+            whole = (
+                (3 == len(shape) and 2 == shape[2]) or
+                (2 == len(shape) and 0 == shape[1] % 2)
+            )
+        else:
+            # Planar 4:2:0 frames have half as many rows again of chroma
+            whole = 2 == len(shape) and 0 == shape[0] * 2 % bytes_per_two
+        if not whole:
+            raise PyZbarError(
+                (
+                    'Array of shape {0} is not a whole frame in format [{1}]'
+                ).format(shape, format)
+            )
+        elif convert:
+            height = shape[0]
+            width = image.size // (2 * height)
+        else:
+            width = shape[1]
+            height = 2 * shape[0] // bytes_per_two
+        pixels, length = image, image.nbytes
+    else:
+        pixels, width, height = image
+        length = len(pixels)
+
+    expected = width * height * bytes_per_two // 2
+    if length < expected:
+        raise PyZbarError(
+            (
+                'Frame data of {0} bytes is too small for a {1} x {2} image '
+                'in format [{3}], which requires {4} bytes'
+            ).format(length, width, height, format, expected)
+        )
+
+    if convert:
+        return pixels, width, height, _fourcc(format)
+    else:
+        if hasattr(pixels, 'ctypes'):
+            # A view of just the luma plane
+            pixels = pixels.reshape(-1)[:width * height]
+        return pixels, width, height, _FOURCC['L800']
+
 
-    return results
+def _scan_image(scanner, image, buffer_pool=None, format=None,
+                prefilter=None, retain=False, vectorized=False):
+    """Converts `image` to eight bits-per-pixel and scans it. A buffer taken
+    from `buffer_pool` for the conversion is returned once the scan is
+    complete. Camera frames in `format` are not converted by `pyzbar`. Images
+    rejected by `prefilter` are not scanned. If `vectorized` is `True`, the
+    geometry of all symbols is computed at once when they have enough
+    locations for that to be faster.
+
+    Returns:
+        :obj:`list` of :obj:`Decoded`: The values decoded from barcodes, or a
+        `SymbolSet` of them if `retain` is `True`.
+    """
+    if format is not None:
+        pixels, width, height, fourcc = _frame_data(image, format)
+        if (prefilter is not None and fourcc == _FOURCC['L800'] and
+                prefilter.rejects(pixels, width, height)):
+            return SymbolSet(None) if retain else []
+        return _scan(
+            scanner, pixels, width, height, fourcc, retain, vectorized
+        )
+
+    pixels, width, height = _pixel_data(image, buffer_pool)
+    try:
+        if prefilter is not None and prefilter.rejects(pixels, width, height):
+            return SymbolSet(None) if retain else []
+        return _scan(
+            scanner, pixels, width, height, retain=retain,
+            vectorized=vectorized
+        )
+    finally:
+        if buffer_pool is not None:
+            buffer_pool.release(pixels)
+
+
+def decode(image, symbols=None, buffer_pool=None, format=None, config=None,
+           prefilter=None, retain=False):
+    """Decodes datamatrix barcodes in `image`.
+
+    Args:
+        image: `numpy.ndarray`, `PIL.Image` or tuple (pixels, width, height)
+        symbols: iter(ZBarSymbol) the symbol types to decode; if `None`, uses
+            `zbar`'s default behaviour, which is to decode all symbol types.
+        buffer_pool (BufferPool): if given, `numpy.ndarray` images that need
+            converting to eight bits-per-pixel are converted into a buffer
+            from the pool, which is returned to the pool once the image has
+            been scanned.
+        format (:obj:`str`): if given, `image` is a camera frame - a
+            `numpy.ndarray` or tuple (pixels, width, height) - in this
+            fourcc format, e.g. 'NV12', 'I420' or 'YUYV', which is passed to
+            `zbar` without conversion to RGB or greyscale.
+        config: iter of tuples (ZBarSymbol, ZBarConfig, int) - additional
+            scanner settings, such as `ZBarConfig.CFG_X_DENSITY` or
+            `ZBarConfig.CFG_MIN_LEN`; `ZBarSymbol.NONE` applies a setting to
+            the scanner or to every symbol type. Profiles created by
+            `pyzbar.autotune` give `symbols` and `config`.
+        prefilter (Prefilter): if given, images that it rejects as blank are
+            not scanned and an empty list is returned.
+        retain (bool): if `True`, the data of each barcode is not copied;
+            a `SymbolSet` is returned, which should be released once its
+            `data` are no longer needed. Requires Python 3.
+
+    Returns:
+        :obj:`list` of :obj:`Decoded`: The values decoded from barcodes, or a
+        `SymbolSet` of them if `retain` is `True`.
+    """
+    with _image_scanner() as scanner:
+        _configure_scanner(scanner, symbols, config)
+        return _scan_image(
+            scanner, image, buffer_pool, format, prefilter, retain
+        )
@@ -0,0 +1,293 @@
+"""Records images that are slow to decode, so that they can be examined and
+replayed after the event.
+
+`SlowImageRecorder` decodes images like `decode` and times each stage. When
+an image takes at least `threshold` seconds, its greyscale pixels are saved as
+a gzip-compressed PGM, alongside a JSON file of its dimensions, the symbol
+types and scanner settings, the stage timings and the results. The oldest
+cases are deleted to keep the directory within `max_bytes`::
+
+    recorder = SlowImageRecorder('slow-images', threshold=0.25)
+    recorder.decode(image, symbols=[ZBarSymbol.QRCODE])
+
+Run ``python -m pyzbar.recorder slow-images`` to decode each recorded case
+again, timed in the same way as `pyzbar.autotune` times configurations.
+"""
+from __future__ import print_function
+
+import argparse
+import base64
+import gzip
+import itertools
+import json
+import os
+import sys
+import time
+
+from collections import deque, namedtuple
+from threading import Lock
+
+from .autotune import (
+    Profile, _describe, _profile_from_json, _profile_to_json, _run
+)
+from .pyzbar import _configure_scanner, _image_scanner, _pixel_data, _scan
+
+__all__ = [
+    'Case', 'RecorderStats', 'SlowImageRecorder', 'load_case', 'main',
+    'replay'
+]
+
+
+_CLOCK = getattr(time, 'perf_counter', time.time)
+
+# Distinguishes cases recorded in the same microsecond
+_SEQUENCE = itertools.count()
+
+
+class Case(namedtuple(
+        'Case', 'name pixels width height profile timings results')):
+    """An image recorded by `SlowImageRecorder`.
+
+    Attributes:
+        name (str): name of the files of the case, without their extensions.
+        pixels (bytes): eight bits-per-pixel greyscale image data.
+        width (int): width of the image.
+        height (int): height of the image.
+        profile (Profile): the symbol types and scanner settings used.
+        timings (dict): seconds spent in each stage - 'convert', 'configure',
+            'scan' and 'total'.
+        results: :obj:`list` of dicts of the barcodes that were decoded.
+    """
+    __slots__ = ()
+
+
+class RecorderStats(object):
+    """Counts accumulated by a `SlowImageRecorder`.
+
+    Attributes:
+        checked (int): number of images decoded.
+        recorded (int): number of slow images recorded.
+        evicted (int): number of cases deleted to stay within the budget.
+        bytes (int): bytes used by cases in the directory.
+    """
+    def __init__(self):
+        self.checked = self.recorded = self.evicted = self.bytes = 0
+
+    def __repr__(self):
+        return (
+            'RecorderStats(checked={0}, recorded={1}, evicted={2}, '
+            'bytes={3})'
+        ).format(self.checked, self.recorded, self.evicted, self.bytes)
+
+
+def _result_json(decoded):
+    return {
+        'data_base64': base64.b64encode(decoded.data).decode('ascii'),
+        'type': decoded.type,
+        'rect': list(decoded.rect),
+        'polygon': [list(point) for point in decoded.polygon],
+        'quality': decoded.quality,
+    }
+
+
+def _paths(directory, name):
+    """Paths of the image and the description of the case `name`.
+    """
+    return (
+        os.path.join(directory, name + '.pgm.gz'),
+        os.path.join(directory, name + '.json'),
+    )
+
+
+class SlowImageRecorder(object):
+    """Decodes images and records those that take at least `threshold`
+    seconds.
+
+    Instances are safe to share between threads.
+
+    Args:
+        directory (str): directory in which cases are recorded; created if
+            it does not exist. Cases already in the directory count towards
+            `max_bytes`.
+        threshold (float): seconds at or above which an image is recorded.
+        max_bytes (int): the greatest number of bytes used by cases; the
+            oldest cases are deleted to make room.
+        compresslevel (int): `gzip` compression level of the images.
+    """
+    def __init__(self, directory, threshold=0.1, max_bytes=256 * 1024 * 1024,
+                 compresslevel=6):
+        self.directory = str(directory)
+        self.threshold = threshold
+        self.max_bytes = max_bytes
+        self.compresslevel = compresslevel
+        self.stats = RecorderStats()
+        self._lock = Lock()
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+
+        # Names sort in the order in which cases were recorded
+        self._cases = deque()
+        for name in sorted(_case_names(self.directory)):
+            size = sum(
+                os.path.getsize(path) for path in _paths(self.directory, name)
+            )
+            self._cases.append((name, size))
+            self.stats.bytes += size
+
+    def decode(self, image, symbols=None, config=None, buffer_pool=None):
+        """Decodes `image`, recording it if it is slow. Arguments are as for
+        `pyzbar.pyzbar.decode`.
+
+        Returns:
+            :obj:`list` of :obj:`Decoded`: The values decoded from barcodes.
+        """
+        start = _CLOCK()
+        pixels, width, height = _pixel_data(image, buffer_pool)
+        try:
+            converted = _CLOCK()
+            with _image_scanner() as scanner:
+                _configure_scanner(scanner, symbols, config)
+                configured = _CLOCK()
+                results = _scan(scanner, pixels, width, height)
+            finished = _CLOCK()
+
+            timings = {
+                'convert': converted - start,
+                'configure': configured - converted,
+                'scan': finished - configured,
+                'total': finished - start,
+            }
+            with self._lock:
+                self.stats.checked += 1
+            if self.threshold <= timings['total']:
+                profile = Profile(
+                    None if symbols is None else list(symbols),
+                    list(config) if config else []
+                )
+                self._record(pixels, width, height, profile, timings, results)
+        finally:
+            if buffer_pool is not None:
+                buffer_pool.release(pixels)
+        return results
+
+    def _record(self, pixels, width, height, profile, timings, results):
+        now = time.time()
+        name = '{0}{1:06d}-{2}-{3:06d}'.format(
+            time.strftime('%Y%m%dT%H%M%S', time.gmtime(now)),
+            int(now % 1 * 1e6), os.getpid(), next(_SEQUENCE)
+        )
+        image_path, json_path = _paths(self.directory, name)
+        data = pixels.tobytes() if hasattr(pixels, 'tobytes') else pixels
+        with gzip.open(image_path, 'wb', self.compresslevel) as f:
+            f.write('P5\n{0} {1}\n255\n'.format(width, height).encode('ascii'))
+            f.write(data[:width * height])
+        # The description is written last, so that only complete cases are
+        # replayed
+        with open(json_path, 'w') as f:
+            json.dump(
+                {
+                    'width': width,
+                    'height': height,
+                    'profile': _profile_to_json(profile),
+                    'timings': timings,
+                    'results': [_result_json(d) for d in results],
+                },
+                f, indent=2
+            )
+
+        size = os.path.getsize(image_path) + os.path.getsize(json_path)
+        with self._lock:
+            self._cases.append((name, size))
+            self.stats.recorded += 1
+            self.stats.bytes += size
+            evict = []
+            while self._cases and self.max_bytes < self.stats.bytes:
+                evicted, evicted_size = self._cases.popleft()
+                self.stats.bytes -= evicted_size
+                self.stats.evicted += 1
+                evict.append(evicted)
+        for evicted in evict:
+            for path in reversed(_paths(self.directory, evicted)):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+def _case_names(directory):
+    """Names of the complete cases in `directory`.
+    """
+    return [
+        f[:-len('.json')] for f in os.listdir(directory)
+        if f.endswith('.json') and
+        os.path.exists(os.path.join(directory, f[:-len('.json')] + '.pgm.gz'))
+    ]
+
+
+def load_case(directory, name):
+    """Reads the case `name` from `directory`.
+
+    Returns:
+        Case
+    """
+    image_path, json_path = _paths(str(directory), name)
+    with open(json_path) as f:
+        description = json.load(f)
+    width, height = description['width'], description['height']
+    with gzip.open(image_path, 'rb') as f:
+        # The header is written by SlowImageRecorder as three lines
+        for _ in range(3):
+            f.readline()
+        pixels = f.read(width * height)
+    return Case(
+        name, pixels, width, height,
+        _profile_from_json(description['profile']), description['timings'],
+        description['results']
+    )
+
+
+def replay(directory, repeat=3):
+    """Generator that decodes each case in `directory` again, in the order in
+    which they were recorded.
+
+    Args:
+        directory (str): directory of a `SlowImageRecorder`.
+        repeat (int): each case is timed this many times and the fastest time
+            is used.
+
+    Yields:
+        :obj:`tuple` (Case, Trial) - recall in Trial is the fraction of the
+        recorded values that were decoded again.
+    """
+    for name in sorted(_case_names(str(directory))):
+        case = load_case(directory, name)
+        expected = frozenset(
+            base64.b64decode(r['data_base64']) for r in case.results
+        )
+        sample = ((case.pixels, case.width, case.height), expected)
+        yield case, _run(case.profile, [sample], repeat)
+
+
+def main(args=None):
+    if args is None:
+        args = sys.argv[1:]
+
+    parser = argparse.ArgumentParser(
+        description='Decodes images recorded by SlowImageRecorder again'
+    )
+    parser.add_argument('directory')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(args)
+
+    for case, trial in replay(args.directory, args.repeat):
+        print(
+            '{0} {1}x{2} recorded={3:.4f}s replayed={4:.4f}s recall={5:.3f} '
+            '{6}'.format(
+                case.name, case.width, case.height, case.timings['total'],
+                trial.seconds, trial.recall, _describe(case.profile)
+            )
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""A thread-safe pool of `zbar` image scanners.
+
+A `zbar_image_scanner` must not be used by more than one thread at a time,
+but distinct scanners can be used concurrently. Creating and configuring a
+scanner allocates its decoders, so threads that decode many images should
+check scanners out of a `ScannerPool` rather than creating one per image.
+"""
+from contextlib import contextmanager
+from threading import Lock
+
+from .pyzbar import _configure_scanner, _scan_image
+from .pyzbar_error import PyZbarError
+from .wrapper import zbar_image_scanner_create, zbar_image_scanner_destroy
+
+__all__ = ['ScannerPool']
+
+
+def _config_key(symbols, config=None):
+    """A hashable key for a scanner configuration.
+    """
+    return (
+        frozenset(symbols) if symbols else None,
+        tuple(tuple(setting) for setting in config) if config else None
+    )
+
+
+class ScannerPool(object):
+    """A pool of scanners, keyed by configuration, that are checked out by one
+    thread at a time.
+
+    Instances are safe to share between threads, including on free-threaded
+    builds of CPython, which do not rely on the GIL.
+
+    Args:
+        max_idle (int): the greatest number of idle scanners retained for each
+            configuration; if `None`, all are retained.
+    """
+    def __init__(self, max_idle=None):
+        self.max_idle = max_idle
+        self._lock = Lock()
+        self._idle = {}     # configuration key -> list of scanners
+        self._closed = False
+        self.created = 0
+
+    @contextmanager
+    def scanner(self, symbols=None, config=None):
+        """A context manager that checks out a scanner configured to decode
+        `symbols`. The scanner must be used only within the context and by
+        only the thread that checked it out.
+
+        Args:
+            symbols: iter(ZBarSymbol) the symbol types to decode; if `None`,
+                decodes all symbol types.
+            config: iter of tuples (ZBarSymbol, ZBarConfig, int) - additional
+                settings, as for `pyzbar.pyzbar.decode`.
+
+        Yields:
+            POINTER(zbar_image_scanner): The scanner
+
+        Raises:
+            PyZbarError: If the pool is closed or a scanner could not be
+                created.
+        """
+        key = _config_key(symbols, config)
+        with self._lock:
+            if self._closed:
+                raise PyZbarError('Scanner pool is closed')
+            idle = self._idle.get(key)
+            scanner = idle.pop() if idle else None
+
+        if scanner is None:
+            scanner = zbar_image_scanner_create()
+            if not scanner:
+                raise PyZbarError('Could not create image scanner')
+            _configure_scanner(scanner, symbols, config)
+            with self._lock:
+                self.created += 1
+
+        try:
+            yield scanner
+        finally:
+            with self._lock:
+                idle = self._idle.setdefault(key, [])
+                retain = not self._closed and (
+                    self.max_idle is None or len(idle) < self.max_idle
+                )
+                if retain:
+                    idle.append(scanner)
+            if not retain:
+                zbar_image_scanner_destroy(scanner)
+
+    def decode(self, image, symbols=None, buffer_pool=None, format=None,
+               config=None, prefilter=None, retain=False):
+        """Decodes `image` using a scanner checked out of the pool. Arguments
+        are as for `pyzbar.pyzbar.decode`.
+
+        Returns:
+            :obj:`list` of :obj:`Decoded`: The values decoded from barcodes, or
+            a `SymbolSet` of them if `retain` is `True`.
+        """
+        with self.scanner(symbols, config) as scanner:
+            return _scan_image(
+                scanner, image, buffer_pool, format, prefilter, retain
+            )
+
+    def idle(self):
+        """Returns:
+            int: number of scanners that are not checked out.
+        """
+        with self._lock:
+            return sum(len(scanners) for scanners in self._idle.values())
+
+    def close(self):
+        """Destroys idle scanners. Scanners that are checked out are destroyed
+        when they are returned.
+        """
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, {}
+        for scanners in idle.values():
+            for scanner in scanners:
+                zbar_image_scanner_destroy(scanner)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -5,7 +5,7 @@ import argparse
 import sys
 
 import pyzbar
-from pyzbar.pyzbar import decode
+from pyzbar.pages import iter_decode_pages
 
 
 def main(args=None):
@@ -16,17 +16,52 @@ def main(args=None):
         description='Reads barcodes in images, using the zbar library'
     )
     parser.add_argument('image', nargs='+')
+    parser.add_argument(
+        '-o', '--output',
+        help='File to which results are written, one row per barcode; the '
+             'format is chosen from the extension: .jsonl, .csv, .parquet or '
+             '.arrow'
+    )
+    parser.add_argument(
+        '--output-format', choices=('jsonl', 'csv', 'parquet', 'arrow'),
+        help='Format of the output file, if not chosen from its extension'
+    )
+    parser.add_argument(
+        '--shard', metavar='INDEX/COUNT',
+        help='Read only the images in this shard, such as 0/4; images are '
+             'assigned to shards by a hash of their paths'
+    )
     parser.add_argument(
         '-v', '--version', action='version',
         version='%(prog)s ' + pyzbar.__version__
     )
     args = parser.parse_args(args)
 
-    from PIL import Image
+    images = args.image
+    if args.shard:
+        from pyzbar.sharding import select_shard
+
+        try:
+            images = [path for _, path in select_shard(images, args.shard)]
+        except ValueError as e:
+            parser.error(str(e))
+
+    if args.output:
+        from pyzbar.writers import open_writer
 
-    for image in args.image:
-        for barcode in decode(Image.open(image)):
-            print(barcode.data)
+        try:
+            writer = open_writer(args.output, args.output_format)
+        except ValueError as e:
+            parser.error(str(e))
+        with writer:
+            for path in images:
+                for page, barcodes in iter_decode_pages(path, read_ahead=1):
+                    writer.write(path, barcodes, page)
+    else:
+        # Each page of multi-page images is read
+        for _, barcodes in iter_decode_pages(images, read_ahead=1):
+            for barcode in barcodes:
+                print(barcode.data)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,578 @@
+"""A local HTTP service that decodes images using a warm pool of scanners.
+
+Run with ``python -m pyzbar.server``. Requires Python 3. Only the standard
+library is required; images other than raw pixels and binary PGMs are opened
+with Pillow, if it is installed.
+
+Endpoints:
+    POST /decode: the body is an image file, raw eight bits-per-pixel data
+        with `width` and `height` query parameters (and optionally a camera
+        `format`, as for `pyzbar.pyzbar.decode`) or a multipart/form-data
+        upload of image files. A `symbols` query parameter restricts the
+        symbol types, e.g. ``?symbols=QRCODE,CODE128``.
+    GET /metrics: throughput, latency and queue depth in the Prometheus text
+        format.
+
+Requests that arrive together are grouped into micro-batches: each worker
+thread takes up to `batch_size` queued images, waiting at most `batch_wait`
+seconds for the batch to fill, and decodes them with one scanner.
+"""
+import argparse
+import base64
+import json
+import multiprocessing
+import sys
+import time
+
+from io import BytesIO
+from threading import Event, Lock, Thread
+
+try:
+    import queue
+
+    from email.parser import BytesParser
+    from email.policy import HTTP
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import parse_qs, urlparse
+except ImportError:
+    # Python 2
+    raise ImportError('pyzbar.server requires Python 3')
+
+from .pyzbar import _FRAME_FORMATS, ZBarSymbol, _scan_image
+from .pyzbar_error import PyZbarError
+from .scanners import ScannerPool, _config_key
+
+__all__ = ['DecodeService', 'ServiceMetrics', 'make_server', 'main']
+
+
+_CLOCK = getattr(time, 'perf_counter', time.time)
+
+# Upper bounds, in seconds, of the buckets of the request latency histogram
+_LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0
+)
+
+
+class ServiceMetrics(object):
+    """Counts accumulated by a `DecodeService`, rendered in the Prometheus
+    text format by `render`.
+    """
+    def __init__(self):
+        self._lock = Lock()
+        self.requests = self.request_errors = 0
+        self.images = self.symbols = self.errors = 0
+        self.batches = 0
+        self.latency_sum = 0.0
+        self.latency_counts = [0] * len(_LATENCY_BUCKETS)
+        self._started = _CLOCK()
+
+    def _request(self, failed):
+        with self._lock:
+            self.requests += 1
+            self.request_errors += failed
+
+    def _batch(self):
+        with self._lock:
+            self.batches += 1
+
+    def _image(self, job, latency):
+        with self._lock:
+            self.images += 1
+            self.symbols += len(job.results)
+            self.errors += job.error is not None
+            self.latency_sum += latency
+            for index, bound in enumerate(_LATENCY_BUCKETS):
+                if latency <= bound:
+                    self.latency_counts[index] += 1
+
+    def render(self, queue_depth=0):
+        """Returns:
+            str: the metrics in the Prometheus text exposition format.
+        """
+        with self._lock:
+            lines = []
+
+            def metric(name, kind, description, value):
+                lines.append('# HELP pyzbar_{0} {1}'.format(name, description))
+                lines.append('# TYPE pyzbar_{0} {1}'.format(name, kind))
+                lines.append('pyzbar_{0} {1}'.format(name, value))
+
+            metric(
+                'requests_total', 'counter', 'HTTP decode requests.',
+                self.requests
+            )
+            metric(
+                'request_errors_total', 'counter',
+                'HTTP decode requests that failed.', self.request_errors
+            )
+            metric('images_total', 'counter', 'Images decoded.', self.images)
+            metric(
+                'symbols_total', 'counter', 'Symbols found.', self.symbols
+            )
+            metric(
+                'image_errors_total', 'counter',
+                'Images that could not be decoded.', self.errors
+            )
+            metric(
+                'batches_total', 'counter', 'Micro-batches decoded.',
+                self.batches
+            )
+            metric(
+                'queue_depth', 'gauge', 'Images waiting to be decoded.',
+                queue_depth
+            )
+            metric(
+                'uptime_seconds', 'gauge', 'Seconds since the service started.',
+                '{0:.3f}'.format(_CLOCK() - self._started)
+            )
+
+            name = 'pyzbar_image_latency_seconds'
+            lines.append(
+                '# HELP {0} Seconds from queueing an image until it was '
+                'decoded.'.format(name)
+            )
+            lines.append('# TYPE {0} histogram'.format(name))
+            for bound, count in zip(_LATENCY_BUCKETS, self.latency_counts):
+                lines.append('{0}_bucket{{le="{1}"}} {2}'.format(
+                    name, bound, count
+                ))
+            lines.append('{0}_bucket{{le="+Inf"}} {1}'.format(name, self.images))
+            lines.append('{0}_sum {1:.6f}'.format(name, self.latency_sum))
+            lines.append('{0}_count {1}'.format(name, self.images))
+            return '\n'.join(lines) + '\n'
+
+
+class _Job(object):
+    """An image waiting to be decoded.
+    """
+    def __init__(self, image, symbols, format):
+        self.image = image
+        self.symbols = symbols
+        self.format = format
+        self.results = []
+        self.error = None
+        self.done = Event()
+        self.queued = _CLOCK()
+
+
+class DecodeService(object):
+    """Decodes images submitted from any thread in micro-batches, using worker
+    threads that share a pool of scanners.
+
+    Args:
+        workers (int): number of worker threads; if `None`, the number of
+            CPUs.
+        batch_size (int): the greatest number of images in a batch.
+        batch_wait (float): seconds that a worker waits for a batch to fill
+            once it has the first image.
+    """
+    def __init__(self, workers=None, batch_size=8, batch_wait=0.002):
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.scanner_pool = ScannerPool()
+        self.metrics = ServiceMetrics()
+        self._jobs = queue.Queue()
+        self._threads = []
+        for _ in range(workers or multiprocessing.cpu_count()):
+            thread = Thread(target=self._work)
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def queue_depth(self):
+        """Returns:
+            int: the number of images waiting to be decoded.
+        """
+        return self._jobs.qsize()
+
+    def submit(self, image, symbols=None, format=None):
+        """Queues `image` to be decoded. Arguments are as for
+        `pyzbar.pyzbar.decode`.
+
+        Returns:
+            An object whose `done` `Event` is set once the image has been
+            decoded, when its `results` and `error` attributes are valid.
+        """
+        job = _Job(image, list(symbols) if symbols else None, format)
+        self._jobs.put(job)
+        return job
+
+    def decode(self, image, symbols=None, format=None):
+        """Decodes `image`, waiting for the result.
+
+        Returns:
+            :obj:`list` of :obj:`Decoded`: The values decoded from barcodes.
+        """
+        job = self.submit(image, symbols, format)
+        job.done.wait()
+        if job.error is not None:
+            raise job.error
+        return job.results
+
+    def close(self):
+        """Stops the worker threads once queued images have been decoded.
+        """
+        for _ in self._threads:
+            self._jobs.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self.scanner_pool.close()
+
+    def _next_batch(self):
+        """Returns a list of up to `batch_size` jobs, or `None` if the
+        service is closing.
+        """
+        job = self._jobs.get()
+        if job is None:
+            return None
+        batch = [job]
+        deadline = _CLOCK() + self.batch_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - _CLOCK()
+            if remaining <= 0:
+                break
+            try:
+                job = self._jobs.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if job is None:
+                # Leave the signal to stop for the next call
+                self._jobs.put(None)
+                break
+            batch.append(job)
+        return batch
+
+    def _work(self):
+        batch = self._next_batch()
+        while batch is not None:
+            self.metrics._batch()
+            by_config = {}
+            for job in batch:
+                by_config.setdefault(_config_key(job.symbols), []).append(job)
+            for jobs in by_config.values():
+                try:
+                    with self.scanner_pool.scanner(jobs[0].symbols) as scanner:
+                        for job in jobs:
+                            try:
+                                job.results = _scan_image(
+                                    scanner, job.image, None, job.format
+                                )
+                            except Exception as e:
+                                job.error = e
+                except PyZbarError as e:
+                    for job in jobs:
+                        job.error = e
+                for job in jobs:
+                    self.metrics._image(job, _CLOCK() - job.queued)
+                    job.image = None
+                    job.done.set()
+            batch = self._next_batch()
+
+
+class _RequestError(Exception):
+    """An error that is reported to the client with an HTTP status code.
+    """
+    def __init__(self, status, message):
+        super(_RequestError, self).__init__(message)
+        self.status = status
+
+
+def _read_pgm(data):
+    """Returns (pixels, width, height) of a binary (P5) PGM image with eight
+    bits per pixel.
+    """
+    fields, pos = [], 2
+    while len(fields) < 3:
+        while data[pos:pos + 1].isspace():
+            pos += 1
+        if data[pos:pos + 1] == b'#':
+            pos = data.find(b'\n', pos)
+            if pos < 0:
+                break
+        else:
+            start = pos
+            while pos < len(data) and not data[pos:pos + 1].isspace():
+                pos += 1
+            try:
+                fields.append(int(data[start:pos]))
+            except ValueError:
+                break
+    if len(fields) < 3:
+        raise _RequestError(400, 'Malformed PGM header')
+
+    width, height, maxval = fields
+    if width <= 0 or height <= 0:
+        raise _RequestError(400, 'PGM width and height must be positive')
+    elif 255 < maxval:
+        raise _RequestError(400, 'Only eight bits-per-pixel PGMs are supported')
+    # A single whitespace character separates the header from the pixels
+    pixels = data[pos + 1:pos + 1 + width * height]
+    if len(pixels) < width * height:
+        raise _RequestError(400, 'Truncated PGM')
+    return pixels, width, height
+
+
+def _load_image(data, params):
+    """Returns (image, format) for the request body `data`.
+    """
+    if 'width' in params or 'height' in params:
+        try:
+            width, height = int(params['width'][0]), int(params['height'][0])
+        except (KeyError, ValueError):
+            raise _RequestError(400, 'width and height must both be integers')
+        if width <= 0 or height <= 0:
+            raise _RequestError(400, 'width and height must be positive')
+
+        format = params.get('format', [None])[0]
+        if format is None:
+            expected = width * height
+        elif format in _FRAME_FORMATS:
+            expected = width * height * _FRAME_FORMATS[format][0] // 2
+        else:
+            raise _RequestError(400, 'Unsupported format {0}'.format(format))
+        if len(data) != expected:
+            raise _RequestError(
+                400,
+                (
+                    'Expected {0} bytes of pixels for a {1} x {2} image, '
+                    'not {3}'
+                ).format(expected, width, height, len(data))
+            )
+        return (data, width, height), format
+    elif data.startswith(b'P5'):
+        return _read_pgm(data), None
+    else:
+        try:
+            from PIL import Image
+        except ImportError:
+            raise _RequestError(
+                415, 'Pillow is required to decode images other than PGM'
+            )
+        try:
+            image = Image.open(BytesIO(data)).convert('L')
+        except Exception:
+            raise _RequestError(400, 'Could not read image')
+        return (image.tobytes(), image.size[0], image.size[1]), None
+
+
+def _parse_symbols(params):
+    names = ','.join(params.get('symbols', [])).split(',')
+    try:
+        return [ZBarSymbol[name.strip().upper()] for name in names if name]
+    except KeyError as e:
+        raise _RequestError(400, 'Unknown symbol type {0}'.format(e))
+
+
+def _multipart_parts(body, content_type):
+    """Returns a list of (name, data) of the files in a multipart body.
+    """
+    message = BytesParser(policy=HTTP).parsebytes(
+        b'Content-Type: ' + content_type.encode('latin-1') + b'\r\n\r\n' + body
+    )
+    if not message.is_multipart():
+        raise _RequestError(400, 'Malformed multipart body')
+    return [
+        (
+            part.get_filename() or part.get_param(
+                'name', header='content-disposition'
+            ),
+            part.get_payload(decode=True)
+        )
+        for part in message.iter_parts()
+    ]
+
+
+def _to_json(decoded):
+    """A dict of the fields of `decoded` that can be serialised to JSON.
+    """
+    try:
+        text = decoded.data.decode('utf-8')
+    except UnicodeDecodeError:
+        text = None
+    return {
+        'data': text,
+        'data_base64': base64.b64encode(decoded.data).decode('ascii'),
+        'type': decoded.type,
+        'rect': decoded.rect._asdict(),
+        'polygon': [list(point) for point in decoded.polygon],
+        'quality': decoded.quality,
+        'orientation': decoded.orientation,
+    }
+
+
+def _outcome(job):
+    if job.error is not None:
+        return {'error': str(job.error)}
+    else:
+        return {'results': [_to_json(d) for d in job.results]}
+
+
+class _Server(ThreadingMixIn, HTTPServer):
+    """Handles each request on a new thread. The same as
+    `http.server.ThreadingHTTPServer`, which was added in Python 3.7.
+    """
+    daemon_threads = True
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            BaseHTTPRequestHandler.log_message(self, format, *args)
+
+    def _send(self, status, body, content_type='application/json'):
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if '/metrics' == urlparse(self.path).path:
+            service = self.server.service
+            self._send(
+                200,
+                service.metrics.render(service.queue_depth()).encode('utf-8'),
+                'text/plain; version=0.0.4; charset=utf-8'
+            )
+        else:
+            self._send(404, {'error': 'Not found'})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if '/decode' != url.path:
+            self._send(404, {'error': 'Not found'})
+            return
+
+        service = self.server.service
+        try:
+            status, response = 200, self._decode(service, parse_qs(url.query))
+        except _RequestError as e:
+            status, response = e.status, {'error': str(e)}
+        service.metrics._request(200 != status)
+        self._send(status, response)
+
+    def _decode(self, service, params):
+        length = self.headers.get('Content-Length')
+        if length is None:
+            raise _RequestError(411, 'Content-Length is required')
+        elif not length.strip().isdigit():
+            raise _RequestError(
+                400, 'Content-Length must be a non-negative integer'
+            )
+        length = int(length)
+        if self.server.max_body_size < length:
+            raise _RequestError(
+                413,
+                'Body of {0} bytes is larger than the limit of {1}'.format(
+                    length, self.server.max_body_size
+                )
+            )
+        body = self.rfile.read(length)
+        symbols = _parse_symbols(params)
+
+        content_type = self.headers.get('Content-Type', '')
+        if content_type.startswith('multipart/form-data'):
+            named = []
+            for name, data in _multipart_parts(body, content_type):
+                try:
+                    image, format = _load_image(data, params)
+                except _RequestError as e:
+                    named.append((name, e))
+                else:
+                    named.append(
+                        (name, service.submit(image, symbols, format))
+                    )
+            images = []
+            for name, job in named:
+                if isinstance(job, _RequestError):
+                    outcome = {'error': str(job)}
+                else:
+                    job.done.wait()
+                    outcome = _outcome(job)
+                outcome['name'] = name
+                images.append(outcome)
+            return {'images': images}
+        else:
+            image, format = _load_image(body, params)
+            job = service.submit(image, symbols, format)
+            job.done.wait()
+            if job.error is not None:
+                raise _RequestError(422, str(job.error))
+            return _outcome(job)
+
+
+def make_server(service, host='127.0.0.1', port=0, quiet=False,
+                max_body_size=64 * 1024 * 1024):
+    """Returns an HTTP server for `service`; call its `serve_forever` method
+    to handle requests.
+
+    Args:
+        service (DecodeService): decodes the images.
+        host (str): address on which to listen.
+        port (int): port on which to listen; if 0, a free port is chosen.
+        quiet (bool): if `True`, requests are not logged to stderr.
+        max_body_size (int): the largest request body, in bytes; larger
+            requests are refused with status 413.
+
+    Returns:
+        http.server.HTTPServer: that handles each request on a new thread.
+    """
+    server = _Server((host, port), _Handler)
+    server.service = service
+    server.quiet = quiet
+    server.max_body_size = max_body_size
+    return server
+
+
+def main(args=None):
+    if args is None:
+        args = sys.argv[1:]
+
+    parser = argparse.ArgumentParser(
+        description='Local HTTP service that reads barcodes in images'
+    )
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument(
+        '--workers', type=int, help='Number of decoding threads'
+    )
+    parser.add_argument(
+        '--batch-size', type=int, default=8,
+        help='Greatest number of images in a micro-batch'
+    )
+    parser.add_argument(
+        '--batch-wait', type=float, default=2,
+        help='Milliseconds to wait for a micro-batch to fill'
+    )
+    parser.add_argument(
+        '--max-body-size', type=int, default=64,
+        help='Largest request body accepted, in megabytes'
+    )
+    parser.add_argument(
+        '-q', '--quiet', action='store_true', help='Do not log requests'
+    )
+    args = parser.parse_args(args)
+
+    service = DecodeService(
+        args.workers, args.batch_size, args.batch_wait / 1000.0
+    )
+    server = make_server(
+        service, args.host, args.port, args.quiet,
+        args.max_body_size * 1024 * 1024
+    )
+    print('Serving on http://{0}:{1}/'.format(*server.server_address[:2]))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == '__main__':
+    main()
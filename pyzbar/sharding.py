@@ -0,0 +1,143 @@
+"""Divides inputs between shards deterministically, so that a large batch can
+be decoded on several machines, and merges the results of the shards.
+
+An input is assigned to a shard by a hash of its key - for a file, the path as
+given - so the assignment depends only on the key and the number of shards. It
+is the same on every machine and every run, and adding inputs does not move
+existing inputs between shards::
+
+    $ read_zbar --shard 0/3 --output shard0.jsonl scans/*.tif
+    $ read_zbar --shard 1/3 --output shard1.jsonl scans/*.tif
+    $ read_zbar --shard 2/3 --output shard2.jsonl scans/*.tif
+    $ python -m pyzbar.sharding -o results.parquet shard*.jsonl
+
+Shards are numbered from 0.
+"""
+from __future__ import print_function
+
+import argparse
+import hashlib
+import os
+import sys
+
+from .writers import open_writer, read_rows
+
+__all__ = ['main', 'merge', 'parse_shard', 'select_shard', 'shard_of']
+
+
+def parse_shard(shard):
+    """Returns the tuple (index, count) for `shard`.
+
+    Args:
+        shard: a string 'index/count', such as '0/4', or a tuple
+            (index, count).
+
+    Raises:
+        ValueError: If `shard` is not valid.
+    """
+    if isinstance(shard, str):
+        try:
+            index, count = (int(v) for v in shard.split('/'))
+        except ValueError:
+            raise ValueError(
+                'Shard [{0}] is not of the form index/count'.format(shard)
+            )
+    else:
+        index, count = shard
+    if not 0 <= index < count:
+        raise ValueError(
+            'Shard index {0} is not between 0 and {1}'.format(index, count - 1)
+        )
+    return index, count
+
+
+def _key(item, index):
+    """The key by which `item`, at `index` in its input, is assigned to a
+    shard: the path of a path, the filename of a `PIL.Image` opened from a
+    file, otherwise `index`.
+    """
+    if isinstance(item, str) or hasattr(item, '__fspath__'):
+        return os.path.normpath(str(item)).replace(os.sep, '/')
+    elif getattr(item, 'filename', None):
+        return _key(item.filename, index)
+    else:
+        return str(index)
+
+
+def shard_of(key, count):
+    """Returns the shard, between 0 and `count` - 1, of `key`.
+
+    The shard is taken from a SHA-1 hash of `key`, which unlike `hash` does not
+    vary between processes.
+    """
+    digest = hashlib.sha1(str(key).encode('utf-8')).hexdigest()
+    return int(digest[:16], 16) % count
+
+
+def select_shard(items, shard, key=None):
+    """Generator of the members of `items` that are in `shard`.
+
+    Args:
+        items: iterable of paths, images or other inputs.
+        shard: 'index/count' or tuple (index, count).
+        key: function of (item, index) that returns the key of an item; if
+            `None`, the path of paths, the filename of `PIL.Image`s opened
+            from files and the index of other items.
+
+    Yields:
+        :obj:`tuple` (index, item) - index is the position of item in
+        `items`.
+    """
+    index, count = parse_shard(shard)
+    key = _key if key is None else key
+    for position, item in enumerate(items):
+        if index == shard_of(key(item, position), count):
+            yield position, item
+
+
+def merge(inputs, output, format=None, **kwargs):
+    """Combines the results of shards into one file.
+
+    Rows are copied a chunk at a time, in the order of `inputs`, so memory use
+    does not depend on the size of the inputs.
+
+    Args:
+        inputs: paths of files written by the writers in `pyzbar.writers`, in
+            any of their formats.
+        output: path of the file to write.
+        format (str): format of `output`, as for `open_writer`.
+        **kwargs: passed to the writer.
+
+    Returns:
+        int: the number of rows written.
+    """
+    with open_writer(output, format, **kwargs) as writer:
+        for path in inputs:
+            writer.write_rows(read_rows(path))
+    return writer.rows_written
+
+
+def main(args=None):
+    if args is None:
+        args = sys.argv[1:]
+
+    parser = argparse.ArgumentParser(
+        description='Merges the results of shards into one file'
+    )
+    parser.add_argument('input', nargs='+', help='Results of each shard')
+    parser.add_argument('-o', '--output', required=True)
+    parser.add_argument(
+        '--output-format', choices=('jsonl', 'csv', 'parquet', 'arrow'),
+        help='Format of the output file, if not chosen from its extension'
+    )
+    args = parser.parse_args(args)
+
+    try:
+        rows = merge(args.input, args.output, args.output_format)
+    except ValueError as e:
+        parser.error(str(e))
+    print('Wrote {0} rows to [{1}]'.format(rows, args.output), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
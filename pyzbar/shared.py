@@ -0,0 +1,291 @@
+"""Decodes images in worker processes that read pixels from shared memory.
+
+Images are copied into a ring of `multiprocessing.shared_memory` slots. Worker
+processes scan the slot in place; only slot indices and compact results are
+sent between processes. Requires Python 3.8 or later.
+"""
+import multiprocessing
+
+from collections import deque
+from ctypes import addressof, c_ubyte
+
+try:
+    import queue
+except ImportError:
+    # Python 2
+    import Queue as queue
+
+try:
+    from multiprocessing.shared_memory import SharedMemory
+except ImportError:
+    # Python < 3.8
+    SharedMemory = None
+
+from .locations import Point, Rect
+from .pyzbar import (
+    Decoded, _configure_scanner, _image_scanner, _pixel_data, _scan
+)
+from .pyzbar_error import PyZbarError
+
+__all__ = ['SharedMemoryDecoder']
+
+
+# Seconds between checks that worker processes are still alive
+_POLL_INTERVAL = 1.0
+
+
+def _compact(decoded):
+    """`Decoded` as a tuple of builtin types, to be sent between processes.
+    """
+    return (
+        decoded.data, decoded.type, tuple(decoded.rect),
+        tuple(tuple(point) for point in decoded.polygon), decoded.quality,
+        decoded.orientation
+    )
+
+
+def _expand(compact):
+    """The inverse of `_compact`.
+    """
+    data, symbol_type, rect, polygon, quality, orientation = compact
+    return Decoded(
+        data=data, type=symbol_type, rect=Rect(*rect),
+        polygon=[Point(*point) for point in polygon], quality=quality,
+        orientation=orientation,
+    )
+
+
+def _worker_main(names, symbols, tasks, results):
+    """Scans slots named in `tasks` until it receives `None`.
+    """
+    blocks = [SharedMemory(name=name) for name in names]
+    # Each slot's memory is exported to ctypes once; the export must be
+    # released before the slot is closed
+    slots = [(c_ubyte * block.size).from_buffer(block.buf) for block in blocks]
+    try:
+        with _image_scanner() as scanner:
+            _configure_scanner(scanner, symbols)
+            for job, slot, width, height in iter(tasks.get, None):
+                # The first width x height bytes of the slot
+                pixels = (c_ubyte * (width * height)).from_address(
+                    addressof(slots[slot])
+                )
+                try:
+                    compact = [
+                        _compact(d) for d in _scan(scanner, pixels, width, height)
+                    ]
+                except Exception as e:
+                    results.put((job, slot, None, str(e)))
+                else:
+                    results.put((job, slot, compact, None))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        del slots
+        for block in blocks:
+            block.close()
+
+
+def _check_fits(width, height, slot_size):
+    if width * height > slot_size:
+        raise PyZbarError(
+            'Image of {0} x {1} pixels does not fit in a slot of {2} '
+            'bytes'.format(width, height, slot_size)
+        )
+
+
+class _SlotBuffer(object):
+    """Stands in for a `BufferPool`, so that `numpy.ndarray` images that need
+    converting are converted directly into a slot.
+    """
+    def __init__(self, block, slot_size):
+        self.block = block
+        self.slot_size = slot_size
+        self.used = False
+
+    def acquire(self, shape):
+        import numpy as np
+        height, width = shape
+        _check_fits(width, height, self.slot_size)
+        self.used = True
+        return np.ndarray(shape, dtype='uint8', buffer=self.block.buf)
+
+    def release(self, buffer):
+        pass
+
+
+class SharedMemoryDecoder(object):
+    """Decodes images in worker processes, passing pixels through shared
+    memory.
+
+    Each image is converted to greyscale and copied into a free slot - a block
+    of shared memory - and the slot's index is sent to a worker. The worker
+    scans the slot in place and returns the results; the slot is then free for
+    another image. A slot is never reused while a worker might be reading it.
+
+    Requires Python 3.8 or later, for `multiprocessing.shared_memory`.
+
+    Args:
+        slot_size (int): size of each slot in bytes; the greatest
+            width x height of an image that can be decoded.
+        slots (int): number of slots, which bounds the number of images that
+            are in flight; if `None`, twice the number of workers.
+        workers (int): number of worker processes; if `None`, the number of
+            CPUs.
+        symbols: iter(ZBarSymbol) the symbol types to decode; if `None`,
+            decodes all symbol types.
+
+    Raises:
+        ImportError: If `multiprocessing.shared_memory`, added in Python 3.8,
+            is not available.
+    """
+    def __init__(self, slot_size, slots=None, workers=None, symbols=None):
+        if SharedMemory is None:
+            raise ImportError(
+                'SharedMemoryDecoder requires Python 3.8 or later'
+            )
+        workers = workers or multiprocessing.cpu_count()
+        slots = slots or 2 * workers
+        self.slot_size = slot_size
+        self._blocks = []
+        self._processes = []
+        try:
+            for _ in range(slots):
+                self._blocks.append(SharedMemory(create=True, size=slot_size))
+            self._tasks = multiprocessing.Queue()
+            self._results = multiprocessing.Queue()
+            names = [block.name for block in self._blocks]
+            symbols = list(symbols) if symbols else None
+            for _ in range(workers):
+                process = multiprocessing.Process(
+                    target=_worker_main,
+                    args=(names, symbols, self._tasks, self._results)
+                )
+                process.daemon = True
+                process.start()
+                self._processes.append(process)
+        except Exception:
+            self.close()
+            raise
+        self._free = deque(range(slots))
+        self._next_job = 0
+
+    def _write(self, slot, image):
+        """Copies `image` into `slot`.
+
+        Returns:
+            :obj: `tuple` (width, height)
+        """
+        block = self._blocks[slot]
+        buffer = _SlotBuffer(block, self.slot_size)
+        pixels, width, height = _pixel_data(image, buffer)
+        if not buffer.used:
+            # Not converted directly into the slot
+            _check_fits(width, height, self.slot_size)
+            block.buf[:width * height] = memoryview(pixels).cast('B')
+        return width, height
+
+    def _receive(self, done):
+        """Waits for one result, frees its slot and stores it in `done`.
+        """
+        while True:
+            try:
+                job, slot, compact, error = self._results.get(
+                    timeout=_POLL_INTERVAL
+                )
+            except queue.Empty:
+                if not all(p.is_alive() for p in self._processes):
+                    raise PyZbarError('Worker process died')
+            else:
+                self._free.append(slot)
+                if error is None:
+                    done[job] = [_expand(c) for c in compact]
+                else:
+                    done[job] = PyZbarError(error)
+                return
+
+    def decode_iter(self, images):
+        """Generator that decodes each of `images`.
+
+        Args:
+            images: iterable of `numpy.ndarray`, `PIL.Image` or tuple
+                (pixels, width, height)
+
+        Yields:
+            :obj:`list` of :obj:`Decoded`: results for each image, in the
+            same order as `images`.
+
+        Raises:
+            PyZbarError: If an image could not be decoded or a worker process
+                died.
+        """
+        if not self._processes:
+            raise PyZbarError('Decoder is closed')
+
+        next_result = self._next_job
+        done = {}
+        try:
+            for image in images:
+                while not self._free:
+                    self._receive(done)
+                slot = self._free.popleft()
+                try:
+                    width, height = self._write(slot, image)
+                except Exception:
+                    self._free.appendleft(slot)
+                    raise
+                self._tasks.put((self._next_job, slot, width, height))
+                self._next_job += 1
+
+                while next_result in done:
+                    outcome = done.pop(next_result)
+                    next_result += 1
+                    yield self._result(outcome)
+
+            while next_result < self._next_job:
+                while next_result not in done:
+                    self._receive(done)
+                outcome = done.pop(next_result)
+                next_result += 1
+                yield self._result(outcome)
+        finally:
+            # If iteration stopped early, wait for the images still in flight
+            # so that their slots are free and their results are not received
+            # by a later call
+            for job in range(next_result, self._next_job):
+                while job not in done:
+                    self._receive(done)
+
+    def _result(self, outcome):
+        """Returns `outcome` or raises it, if it is an exception.
+        """
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    def decode(self, image):
+        """Decodes `image`.
+
+        Returns:
+            :obj:`list` of :obj:`Decoded`: The values decoded from barcodes.
+        """
+        return next(self.decode_iter([image]))
+
+    def close(self):
+        """Stops the worker processes and frees the shared memory.
+        """
+        for _ in self._processes:
+            self._tasks.put(None)
+        for process in self._processes:
+            process.join()
+        self._processes = []
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,106 @@
+"""Decodes a stack of frames of the same size, held in one `numpy.ndarray`.
+
+Frames from video chunks or burst captures are often held as a single array
+of shape (N, H, W) or (N, H, W, C). `decode_stack` converts the whole stack to
+eight bits-per-pixel in one pass, if it needs converting, and scans each frame
+in place with a scanner that is reused for every frame.
+"""
+from threading import Thread
+
+from .pyzbar import _configure_scanner, _image_scanner, _scan
+
+__all__ = ['decode_stack']
+
+
+def _grey_stack(frames, buffer_pool):
+    """Returns a C-contiguous `uint8` array of shape (N, H, W) of `frames` and
+    whether it was taken from `buffer_pool`.
+
+    As for `decode`, the first channel of frames with channels is used.
+    """
+    if 3 == frames.ndim:
+        planes = frames
+    elif 4 == frames.ndim:
+        planes = frames[..., 0]
+    else:
+        raise ValueError(
+            'frames must have shape (N, H, W) or (N, H, W, C), not {0}'.format(
+                frames.shape
+            )
+        )
+    if 'uint8' == str(planes.dtype) and planes.flags['C_CONTIGUOUS']:
+        return planes, False
+    else:
+        import numpy as np
+        if buffer_pool is None:
+            grey, pooled = np.empty(planes.shape, dtype='uint8'), False
+        else:
+            grey, pooled = buffer_pool.acquire(planes.shape), True
+        try:
+            # Same conversion as `planes.astype('uint8')`
+            np.copyto(grey, planes, casting='unsafe')
+        except Exception:
+            if pooled:
+                buffer_pool.release(grey)
+            raise
+        return grey, pooled
+
+
+def decode_stack(frames, symbols=None, workers=1, buffer_pool=None):
+    """Decodes each frame of `frames`.
+
+    Args:
+        frames: `numpy.ndarray` of shape (N, H, W) or (N, H, W, C). A
+            C-contiguous `uint8` array of shape (N, H, W) is scanned without
+            copying; other arrays are converted in one pass.
+        symbols: iter(ZBarSymbol) the symbol types to decode; if `None`,
+            decodes all symbol types.
+        workers (int): number of threads, each with its own scanner, between
+            which the frames are divided.
+        buffer_pool (BufferPool): if given, the source of the buffer into
+            which `frames` are converted, if they need converting.
+
+    Returns:
+        :obj:`list` of :obj:`list` of :obj:`Decoded`: the values decoded from
+        barcodes in each frame, in the order of `frames`.
+
+    Raises:
+        ValueError: If `frames` does not have three or four dimensions.
+        PyZbarError: If a frame could not be scanned.
+    """
+    grey, pooled = _grey_stack(frames, buffer_pool)
+    count, height, width = grey.shape
+    results = [None] * count
+    errors = []
+
+    def scan(start, stop):
+        try:
+            with _image_scanner() as scanner:
+                _configure_scanner(scanner, symbols)
+                for index in range(start, stop):
+                    results[index] = _scan(
+                        scanner, grey[index], width, height, vectorized=True
+                    )
+        except Exception as e:
+            errors.append(e)
+
+    try:
+        workers = max(1, min(workers, count))
+        bounds = [count * worker // workers for worker in range(workers + 1)]
+        # The last block of frames is scanned by the calling thread
+        threads = [
+            Thread(target=scan, args=(bounds[worker], bounds[worker + 1]))
+            for worker in range(workers - 1)
+        ]
+        for thread in threads:
+            thread.start()
+        scan(bounds[-2], bounds[-1])
+        for thread in threads:
+            thread.join()
+    finally:
+        if pooled:
+            buffer_pool.release(grey)
+
+    if errors:
+        raise errors[0]
+    return results
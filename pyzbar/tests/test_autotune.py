@@ -0,0 +1,129 @@
+import json
+import unittest
+
+from io import StringIO
+from pathlib import Path
+
+from PIL import Image
+
+from pyzbar.autotune import Profile, autotune, dump_profile, load_profile
+from pyzbar.pyzbar import ZBarSymbol, decode
+from pyzbar.wrapper import ZBarConfig
+
+
+TESTDATA = Path(__file__).parent
+
+
+class TestAutotune(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        code128, qrcode, empty = (
+            Image.open(str(TESTDATA.joinpath(fname))).convert('L')
+            for fname in ('code128.png', 'qrcode.png', 'empty.png')
+        )
+        cls.samples = [
+            (code128, [b'Foramenifera', b'Rana temporaria']),
+            (qrcode, [b'Thalassiodracon']),
+            (empty, []),
+        ]
+
+        # assertRaisesRegexp was a deprecated alias removed in Python 3.11
+        if not hasattr(cls, 'assertRaisesRegex'):
+            cls.assertRaisesRegex = cls.assertRaisesRegexp
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.samples = None
+
+    def test_autotune(self):
+        trials = []
+        best = autotune(
+            self.samples, densities=(1, 2), repeat=1, trials=trials
+        )
+        self.assertEqual(1.0, best.recall)
+        self.assertEqual(0, best.false_positives)
+        self.assertIsNone(best.holdout_recall)
+        self.assertIn(best, trials)
+        # Defaults, then each density; length limits are not tried
+        self.assertEqual(3, len(trials))
+        self.assertEqual(Profile(None, []), trials[0].profile)
+        self.assertEqual(
+            [ZBarSymbol.QRCODE, ZBarSymbol.CODE128], trials[1].profile.symbols
+        )
+        for trial in trials:
+            self.assertNotIn(
+                ZBarConfig.CFG_MIN_LEN, [c[1] for c in trial.profile.config]
+            )
+
+        # The profile can be passed to decode
+        for image, expected in self.samples:
+            self.assertEqual(
+                sorted(expected),
+                sorted(d.data for d in decode(image, **best.profile._asdict()))
+            )
+
+    def test_length_margin(self):
+        "Length limits are tried, widened by the margin"
+        trials = []
+        autotune(
+            self.samples, densities=(1, 2), repeat=1, trials=trials,
+            length_margin=2
+        )
+        # Defaults, then each density with and without length limits
+        self.assertEqual(5, len(trials))
+        self.assertIn(
+            (ZBarSymbol.CODE128, ZBarConfig.CFG_MIN_LEN, 10),
+            trials[2].profile.config
+        )
+        self.assertIn(
+            (ZBarSymbol.CODE128, ZBarConfig.CFG_MAX_LEN, 17),
+            trials[2].profile.config
+        )
+
+    def test_holdout(self):
+        "Recall of the chosen configuration is reported on held-out images"
+        code128, qrcode, _ = self.samples
+        best = autotune([qrcode], densities=(1,), repeat=1, holdout=[code128])
+        self.assertEqual(1.0, best.recall)
+        # A profile for QR codes only does not find the held-out Code 128
+        self.assertEqual(
+            0.0 if best.profile.symbols else 1.0, best.holdout_recall
+        )
+
+    def test_unreachable_recall(self):
+        self.assertRaisesRegex(
+            ValueError, 'No configuration reached a recall of 1.5', autotune,
+            self.samples, target_recall=1.5, densities=(1,), repeat=1
+        )
+
+    def test_dump_load(self):
+        profile = Profile(
+            [ZBarSymbol.CODE128],
+            [
+                (ZBarSymbol.NONE, ZBarConfig.CFG_X_DENSITY, 2),
+                (ZBarSymbol.CODE128, ZBarConfig.CFG_MIN_LEN, 13),
+            ]
+        )
+        f = StringIO()
+        dump_profile(profile, f)
+        self.assertEqual(
+            {
+                'symbols': ['CODE128'],
+                'config': [
+                    ['NONE', 'CFG_X_DENSITY', 2],
+                    ['CODE128', 'CFG_MIN_LEN', 13]
+                ],
+            },
+            json.loads(f.getvalue())
+        )
+        f.seek(0)
+        loaded = load_profile(f)
+        self.assertEqual(profile, loaded)
+        self.assertEqual(
+            [b'Rana temporaria'],
+            [d.data for d in decode(self.samples[0][0], **loaded._asdict())]
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,228 @@
+import multiprocessing
+import time
+import unittest
+
+from pathlib import Path
+
+try:
+    from unittest.mock import patch
+except ImportError:
+    # Python 2
+    from mock import patch
+
+from PIL import Image
+
+from pyzbar import pyzbar
+from pyzbar.batch import (
+    BatchStats, decode_many, iter_decode, _dispatch, _ProcessPool
+)
+from pyzbar.pyzbar_error import PyZbarError
+
+
+TESTDATA = Path(__file__).parent
+
+# The width of an image that the patched scanner takes a long time to decode
+SLOW_WIDTH = 7
+
+
+def slow_scan(scanner, image, buffer_pool=None, **kwargs):
+    if isinstance(image, tuple) and SLOW_WIDTH == image[1]:
+        time.sleep(10)
+    return pyzbar._scan_image(scanner, image, buffer_pool, **kwargs)
+
+
+class TestDecodeMany(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # Images are loaded here because PIL's lazy loading of a single
+        # instance is not thread safe.
+        cls.code128, cls.qrcode, cls.empty = (
+            Image.open(str(TESTDATA.joinpath(fname))).convert('L')
+            for fname in ('code128.png', 'qrcode.png', 'empty.png')
+        )
+        cls.slow = (b'\xff' * SLOW_WIDTH * 3, SLOW_WIDTH, 3)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.code128 = cls.qrcode = cls.empty = cls.slow = None
+
+    def _check(self, res, stats):
+        self.assertEqual(list(range(6)), [r.index for r in res])
+        self.assertEqual(
+            [
+                [b'Foramenifera', b'Rana temporaria'], [b'Thalassiodracon'], [],
+            ] * 2,
+            [sorted(d.data for d in r.results) for r in res]
+        )
+        self.assertEqual(6, stats.images)
+        self.assertEqual(4, stats.decoded)
+        self.assertEqual(6, stats.symbols)
+        self.assertEqual(0, stats.errors)
+        self.assertEqual(0, stats.timeouts)
+
+    def test_threads(self):
+        stats = BatchStats()
+        res = decode_many(
+            [self.code128, self.qrcode, self.empty] * 2, workers=2,
+            stats=stats
+        )
+        self._check(res, stats)
+
+    def test_processes(self):
+        stats = BatchStats()
+        res = decode_many(
+            [self.code128, self.qrcode, self.empty] * 2, workers=2,
+            processes=True, stats=stats
+        )
+        self._check(res, stats)
+
+    def test_error(self):
+        "An image that cannot be decoded does not stop the batch"
+        res = decode_many([(b'\0' * 10, 3, 3), self.qrcode], workers=1)
+        self.assertIsInstance(res[0].error, PyZbarError)
+        self.assertEqual([], res[0].results)
+        self.assertEqual(
+            [b'Thalassiodracon'], [d.data for d in res[1].results]
+        )
+
+    def test_symbols(self):
+        res = decode_many(
+            [self.code128, self.qrcode], symbols=[pyzbar.ZBarSymbol.QRCODE],
+            workers=1
+        )
+        self.assertEqual(
+            [[], [b'Thalassiodracon']],
+            [[d.data for d in r.results] for r in res]
+        )
+
+    @patch('pyzbar.batch._scan_image', side_effect=slow_scan)
+    def test_thread_timeout(self, _scan):
+        "A slow image is reported as timed out and the worker replaced"
+        stats = BatchStats()
+        start = time.time()
+        res = decode_many(
+            [self.slow, self.qrcode, self.qrcode], workers=1, timeout=0.5,
+            stats=stats
+        )
+        self.assertLess(time.time() - start, 5)
+        self.assertTrue(res[0].timed_out)
+        self.assertEqual([], res[0].results)
+        self.assertFalse(res[1].timed_out)
+        self.assertEqual(
+            [b'Thalassiodracon'], [d.data for d in res[2].results]
+        )
+        self.assertEqual(1, stats.timeouts)
+        self.assertEqual(1, stats.recycled)
+
+    @unittest.skipIf(
+        'fork' != multiprocessing.get_start_method(),
+        'Patched scanner is inherited only by forked worker processes'
+    )
+    @patch('pyzbar.batch._scan_image', side_effect=slow_scan)
+    def test_process_timeout(self, _scan):
+        "A slow image is reported as timed out and the process replaced"
+        stats = BatchStats()
+        start = time.time()
+        res = decode_many(
+            [self.slow, self.qrcode, self.qrcode], workers=1, timeout=0.5,
+            processes=True, stats=stats
+        )
+        self.assertLess(time.time() - start, 5)
+        self.assertEqual([True, False, False], [r.timed_out for r in res])
+        self.assertEqual(
+            [b'Thalassiodracon'], [d.data for d in res[1].results]
+        )
+        self.assertEqual(1, stats.timeouts)
+        self.assertEqual(1, stats.recycled)
+
+
+class TestIterDecode(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.qrcode = Image.open(str(TESTDATA.joinpath('qrcode.png'))).convert(
+            'L'
+        )
+        cls.slow = (b'\xff' * SLOW_WIDTH * 3, SLOW_WIDTH, 3)
+
+        # assertRaisesRegexp was a deprecated alias removed in Python 3.11
+        if not hasattr(cls, 'assertRaisesRegex'):
+            cls.assertRaisesRegex = cls.assertRaisesRegexp
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.qrcode = cls.slow = None
+
+    def test_bounded(self):
+        "Images are pulled lazily and no more than max_in_flight are held"
+        pulled = []
+
+        def images():
+            for index in range(20):
+                pulled.append(index)
+                yield self.qrcode
+
+        yielded = 0
+        indices = []
+        for result in iter_decode(images(), workers=4, max_in_flight=2):
+            self.assertLessEqual(len(pulled) - yielded, 2)
+            self.assertEqual(
+                [b'Thalassiodracon'], [d.data for d in result.results]
+            )
+            indices.append(result.index)
+            yielded += 1
+        self.assertEqual(list(range(20)), sorted(indices))
+
+    @patch('pyzbar.batch._scan_image', side_effect=slow_scan)
+    def test_unordered(self, _scan):
+        "Results are yielded as soon as each image is decoded"
+        res = list(iter_decode(
+            [self.slow, self.qrcode, self.qrcode], workers=2, timeout=0.5
+        ))
+        self.assertEqual([1, 2, 0], [r.index for r in res])
+        self.assertTrue(res[2].timed_out)
+
+    @unittest.skipIf(
+        'fork' != multiprocessing.get_start_method(),
+        'Patched scanner is inherited only by forked worker processes'
+    )
+    @patch('pyzbar.batch._scan_image', side_effect=slow_scan)
+    def test_close_terminates_busy_processes(self, _scan):
+        "Stopping early does not wait for images still being decoded"
+        start = time.time()
+        results = iter_decode(
+            [self.slow, self.qrcode], workers=2, processes=True
+        )
+        self.assertEqual(1, next(results).index)
+        results.close()
+        self.assertLess(time.time() - start, 5)
+
+    def test_idle_process_died(self):
+        "A worker process that dies while idle is replaced"
+        pool = _ProcessPool(None, 2)
+        try:
+            dead = pool.workers[0]
+            dead.process.terminate()
+            dead.process.join()
+            stats = BatchStats()
+            res = list(_dispatch(enumerate([self.qrcode] * 4), pool, 5, stats))
+        finally:
+            pool.close()
+
+        self.assertEqual([0, 1, 2, 3], sorted(r.index for r in res))
+        self.assertEqual([None] * 4, [r.error for r in res])
+        self.assertEqual(
+            [[b'Thalassiodracon']] * 4,
+            [[d.data for d in r.results] for r in res]
+        )
+        self.assertEqual(1, stats.recycled)
+        self.assertNotIn(dead, pool.workers)
+
+    def test_invalid_max_in_flight(self):
+        self.assertRaisesRegex(
+            ValueError, 'max_in_flight must be at least 1', list,
+            iter_decode([self.qrcode], max_in_flight=0)
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import gc
+import unittest
+
+import numpy as np
+
+from pyzbar.buffers import BufferPool, PoolStats
+
+
+class TestBufferPool(unittest.TestCase):
+    def test_acquire(self):
+        pool = BufferPool()
+        buffer = pool.acquire((3, 4))
+        self.assertEqual((3, 4), buffer.shape)
+        self.assertEqual(np.uint8, buffer.dtype)
+        self.assertTrue(buffer.flags['C_CONTIGUOUS'])
+        self.assertEqual(PoolStats(0, 1, 0, 0, 0), pool.stats())
+
+    def test_reuse(self):
+        pool = BufferPool()
+        buffer = pool.acquire((3, 4))
+        pool.release(buffer)
+        self.assertIs(buffer, pool.acquire([3, 4]))
+        self.assertIsNot(buffer, pool.acquire((4, 3)))
+        self.assertEqual(PoolStats(1, 2, 1, 0, 0), pool.stats())
+
+    def test_bounded(self):
+        pool = BufferPool(max_buffers=1)
+        first, second = pool.acquire((2, 2)), pool.acquire((2, 2))
+        pool.release(first)
+        pool.release(second)
+        self.assertEqual(PoolStats(0, 2, 1, 1, 1), pool.stats())
+
+    def test_release_foreign(self):
+        "Buffers not handed out by the pool are ignored"
+        pool = BufferPool()
+        buffer = pool.acquire((2, 2))
+        pool.release(np.zeros((2, 2), dtype='uint8'))
+        pool.release(b'bytes')
+        pool.release(buffer)
+        pool.release(buffer)
+        self.assertEqual(PoolStats(0, 1, 1, 0, 1), pool.stats())
+
+    def test_dropped_unreleased(self):
+        "Buffers that are garbage collected without release are forgotten"
+        pool = BufferPool()
+        pool.acquire((2, 2))
+        gc.collect()
+        self.assertEqual(0, len(pool._outstanding))
+        pool.release(np.zeros((2, 2), dtype='uint8'))
+        self.assertEqual(PoolStats(0, 1, 0, 0, 0), pool.stats())
+
+    def test_clear(self):
+        pool = BufferPool()
+        pool.release(pool.acquire((2, 2)))
+        pool.clear()
+        self.assertEqual(0, pool.stats().pooled)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,164 @@
+import unittest
+
+from pathlib import Path
+
+import numpy as np
+
+from PIL import Image, ImageOps
+
+from pyzbar.cascade import Cascade, Strategy, decode_cascade
+from pyzbar.preprocess import invert
+
+
+TESTDATA = Path(__file__).parent
+
+
+class TestCascade(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.code128, cls.qrcode, cls.empty = (
+            Image.open(str(TESTDATA.joinpath(fname))).convert('L')
+            for fname in ('code128.png', 'qrcode.png', 'empty.png')
+        )
+
+        # assertRaisesRegexp was a deprecated alias removed in Python 3.11
+        if not hasattr(cls, 'assertRaisesRegex'):
+            cls.assertRaisesRegex = cls.assertRaisesRegexp
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.code128 = cls.qrcode = cls.empty = None
+
+    def test_original(self):
+        "The first strategy succeeds"
+        res = decode_cascade(self.qrcode)
+        self.assertEqual('original', res.strategy)
+        self.assertEqual(1, res.attempts)
+        self.assertFalse(res.timed_out)
+        self.assertEqual([b'Thalassiodracon'], [r.data for r in res.results])
+
+    def test_inverted(self):
+        "Light barcode on a dark background is found by inverting"
+        res = decode_cascade(ImageOps.invert(self.qrcode))
+        self.assertEqual('invert', res.strategy)
+        self.assertEqual([b'Thalassiodracon'], [r.data for r in res.results])
+
+    def test_rotation_mapped_to_original(self):
+        "Locations found in a rotated image are in original coordinates"
+        expected = decode_cascade(self.qrcode).results[0].rect
+        for degrees in (90, 180, 270):
+            res = decode_cascade(
+                self.qrcode, strategies=[Strategy('rotate', None, degrees)]
+            )
+            self.assertEqual('rotate', res.strategy)
+            for actual, value in zip(res.results[0].rect, expected):
+                self.assertAlmostEqual(value, actual, delta=2)
+
+    def test_nothing_found(self):
+        cascade = Cascade()
+        res = cascade.decode(self.empty)
+        self.assertIsNone(res.strategy)
+        self.assertEqual([], res.results)
+        self.assertEqual(len(cascade.strategies), res.attempts)
+        self.assertFalse(res.timed_out)
+
+    def test_success_condition(self):
+        "Largest result is reported when success condition is not met"
+        res = decode_cascade(
+            self.code128, strategies=[Strategy('original'), Strategy('invert', invert)],
+            success=lambda results: 3 <= len(results)
+        )
+        self.assertIsNone(res.strategy)
+        self.assertEqual(2, res.attempts)
+        self.assertEqual(
+            [b'Foramenifera', b'Rana temporaria'],
+            sorted(r.data for r in res.results)
+        )
+
+    def test_timeout(self):
+        "Only the first strategy is tried when the budget is exhausted"
+        res = decode_cascade(self.empty, timeout=0)
+        self.assertEqual(1, res.attempts)
+        self.assertTrue(res.timed_out)
+
+    def test_reorder(self):
+        cascade = Cascade()
+        cascade.decode(ImageOps.invert(self.qrcode))
+        cascade.decode(ImageOps.invert(self.qrcode))
+        cascade.decode(self.qrcode)
+        self.assertEqual(2, cascade.hits['invert'])
+        self.assertEqual(1, cascade.hits['original'])
+        self.assertEqual(3, cascade.attempts['original'])
+        cascade.reorder()
+        self.assertEqual(
+            ['invert', 'original'],
+            [s.name for s in cascade.strategies[:2]]
+        )
+
+    def test_no_strategies(self):
+        self.assertRaises(ValueError, Cascade, strategies=[])
+
+    def test_transforms_share_bytes(self):
+        "The image is converted to bytes once, for all transforms"
+        seen = []
+
+        def record(pixels, width, height):
+            seen.append(pixels)
+            return pixels, width, height
+
+        strategies = [Strategy('a', record), Strategy('b', record)]
+        Cascade(strategies, success=lambda results: False).decode(
+            np.asarray(self.qrcode)
+        )
+        self.assertEqual(2, len(seen))
+        self.assertIsInstance(seen[0], bytes)
+        self.assertIs(seen[0], seen[1])
+
+    def test_skipped(self):
+        "Strategies after a success are counted as skipped"
+        cascade = Cascade()
+        res = cascade.decode(self.qrcode)
+        self.assertEqual(1, res.attempts)
+        self.assertEqual(4, res.skipped)
+        res = cascade.decode(self.empty)
+        self.assertEqual(0, res.skipped)
+        self.assertEqual(4, cascade.skipped)
+
+    def test_expected(self):
+        "Distinct barcodes are accumulated until the expected number is found"
+        width, height = self.code128.size
+        image = Image.new('L', (width + 220, height), 255)
+        image.paste(self.code128, (0, 0))
+        image.paste(ImageOps.invert(self.qrcode), (width + 10, 10))
+        res = decode_cascade(image, expected=3)
+        self.assertEqual('invert', res.strategy)
+        self.assertEqual(4, res.attempts)
+        self.assertEqual(1, res.skipped)
+        self.assertEqual(
+            [b'Foramenifera', b'Rana temporaria', b'Thalassiodracon'],
+            sorted(r.data for r in res.results)
+        )
+
+    def test_expected_not_found(self):
+        "Every distinct barcode is reported if too few are found"
+        res = decode_cascade(self.code128, expected=3)
+        self.assertIsNone(res.strategy)
+        self.assertEqual(5, res.attempts)
+        self.assertEqual(0, res.skipped)
+        self.assertEqual(
+            [b'Foramenifera', b'Rana temporaria'],
+            sorted(r.data for r in res.results)
+        )
+
+    def test_invalid_expected(self):
+        self.assertRaisesRegex(
+            ValueError, 'expected must be at least 1', Cascade, expected=0
+        )
+        self.assertRaisesRegex(
+            ValueError, 'Give either success or expected, not both',
+            Cascade, success=bool, expected=1
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
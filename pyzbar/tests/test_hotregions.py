@@ -0,0 +1,99 @@
+import unittest
+
+from pathlib import Path
+
+import numpy as np
+
+from PIL import Image
+
+from pyzbar.hotregions import HotRegionDecoder
+from pyzbar.pyzbar import decode
+
+
+TESTDATA = Path(__file__).parent
+
+
+class TestHotRegionDecoder(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.qrcode = np.asarray(
+            Image.open(str(TESTDATA.joinpath('qrcode.png'))).convert('L')
+        )
+
+        # assertRaisesRegexp was a deprecated alias removed in Python 3.11
+        if not hasattr(cls, 'assertRaisesRegex'):
+            cls.assertRaisesRegex = cls.assertRaisesRegexp
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.qrcode = None
+
+    def _sheet(self, left, top):
+        "A blank sheet with the qrcode at (left, top)"
+        sheet = np.full((1200, 900), 255, dtype='uint8')
+        height, width = self.qrcode.shape
+        sheet[top:top + height, left:left + width] = self.qrcode
+        return sheet
+
+    def test_prior(self):
+        "Barcodes near the same place are found by scanning just that region"
+        sheets = [
+            self._sheet(600 + offset, 50 + offset)
+            for offset in (0, 10, -10, 20, 5)
+        ]
+        with HotRegionDecoder() as decoder:
+            res = list(decoder.decode_iter(sheets))
+        self.assertEqual([decode(s) for s in sheets], res)
+        self.assertEqual(1, len(decoder.regions))
+        self.assertEqual(5, decoder.regions[0].hits)
+
+        stats = decoder.stats
+        self.assertEqual(5, stats.images)
+        self.assertEqual(1, stats.full_scans)
+        self.assertEqual(4, stats.prior_hits)
+        self.assertEqual(0.8, stats.hit_rate)
+        self.assertLess(stats.scanned_fraction, 0.4)
+
+    def test_prior_fails(self):
+        "The whole image is scanned when the regions yield nothing"
+        with HotRegionDecoder() as decoder:
+            decoder.decode(self._sheet(600, 50))
+            moved = self._sheet(50, 900)
+            self.assertEqual(decode(moved), decoder.decode(moved))
+            self.assertEqual(2, decoder.stats.full_scans)
+            self.assertEqual(0, decoder.stats.prior_hits)
+            self.assertEqual(2, len(decoder.regions))
+
+            decoder.reset()
+            self.assertEqual([], decoder.regions)
+
+    def test_min_results(self):
+        with HotRegionDecoder(min_results=2) as decoder:
+            for _ in range(3):
+                decoder.decode(self._sheet(600, 50))
+            self.assertEqual(3, decoder.stats.full_scans)
+
+    def test_expected(self):
+        "Regions are not scanned once the expected barcodes are found"
+        sheets = [self._sheet(600, 50), self._sheet(50, 900)]
+        with HotRegionDecoder(expected=1) as decoder:
+            list(decoder.decode_iter(sheets))
+            self.assertEqual(2, len(decoder.regions))
+            self.assertEqual(decode(sheets[0]), decoder.decode(sheets[0]))
+        stats = decoder.stats
+        self.assertEqual(2, stats.full_scans)
+        self.assertEqual(1, stats.prior_hits)
+        # The second sheet scanned one region and the third one of two
+        self.assertEqual(2, stats.region_scans)
+        self.assertEqual(1, stats.regions_skipped)
+        self.assertIn('regions_skipped=1', repr(stats))
+
+    def test_invalid_expected(self):
+        self.assertRaisesRegex(
+            ValueError, 'expected must be at least 1', HotRegionDecoder,
+            expected=0
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
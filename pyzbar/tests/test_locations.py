@@ -1,6 +1,18 @@
+import random
 import unittest
 
-from pyzbar.locations import bounding_box, convex_hull, Rect
+try:
+    from unittest.mock import patch
+except ImportError:
+    # Python 2
+    from mock import patch
+
+import numpy as np
+
+from pyzbar import locations
+from pyzbar.locations import (
+    bounding_box, bounding_boxes, convex_hull, convex_hulls, flatten, Rect
+)
 
 
 class TestLocations(unittest.TestCase):
@@ -46,5 +58,93 @@ class TestLocations(unittest.TestCase):
         self.assertEqual(expected, res)
 
 
+class TestBatchLocations(unittest.TestCase):
+    SETS = [
+        [(37, 551), (37, 625), (361, 626), (361, 550)],
+        [(3, 3)] * 4,
+        [(i, 2 * i) for i in range(10)],
+        [(1, 1), (2, 2), (3, 3), (1, 3)],
+        [(0, 0), (0, 1), (1, 1), (1, 0)] * 10,
+    ]
+
+    @classmethod
+    def setUpClass(cls):
+        # assertRaisesRegexp was a deprecated alias removed in Python 3.11
+        if not hasattr(cls, 'assertRaisesRegex'):
+            cls.assertRaisesRegex = cls.assertRaisesRegexp
+
+    def _random_sets(self):
+        rng = random.Random(2)
+        sets = list(self.SETS)
+        for _ in range(200):
+            size = rng.choice([2, 10, 5000, 100000])
+            sets.append([
+                (rng.randint(-size, size), rng.randint(-size, size))
+                for _ in range(rng.randint(1, 40))
+            ])
+        return sets
+
+    def test_flatten(self):
+        xs, ys, offsets = flatten([[(1, 2), (3, 4)], [(5, 6)]])
+        self.assertEqual([1, 3, 5], xs.tolist())
+        self.assertEqual([2, 4, 6], ys.tolist())
+        self.assertEqual([0, 2, 3], offsets.tolist())
+
+    def test_bounding_boxes(self):
+        "Bounding boxes are those of each set"
+        sets = self._random_sets()
+        self.assertEqual(
+            [list(bounding_box(points)) for points in sets],
+            bounding_boxes(*flatten(sets)).tolist()
+        )
+
+    def test_convex_hulls(self):
+        "Hulls are identical to those of each set"
+        sets = self._random_sets()
+        xs, ys, offsets = convex_hulls(*flatten(sets))
+        xs, ys, offsets = xs.tolist(), ys.tolist(), offsets.tolist()
+        self.assertEqual(
+            [convex_hull(points) for points in sets],
+            [
+                list(zip(xs[start:end], ys[start:end]))
+                for start, end in zip(offsets[:-1], offsets[1:])
+            ]
+        )
+
+    def test_no_loop_over_sets(self):
+        "Hulls are not computed one set at a time"
+        with patch.object(locations, 'convex_hull') as convex_hull:
+            convex_hulls(*flatten(self._random_sets()))
+        convex_hull.assert_not_called()
+
+    def test_interior_discarded(self):
+        "Points inside the extremes of a set are discarded"
+        points = [(x, y) for x in range(10) for y in range(10)]
+        xs, ys, offsets = flatten([points, [(0, 0)]])
+        xs, ys, sets = locations._discard_interior(
+            xs.astype('int64'), ys.astype('int64'),
+            np.repeat([0, 1], np.diff(offsets)), 2
+        )
+        # Only the points on the edges of the square remain
+        self.assertEqual([36, 1], np.bincount(sets).tolist())
+
+    def test_no_sets(self):
+        xs, ys, offsets = flatten([])
+        self.assertEqual((0, 4), bounding_boxes(xs, ys, offsets).shape)
+        xs, ys, offsets = convex_hulls(xs, ys, offsets)
+        self.assertEqual(
+            ([], [], [0]), (xs.tolist(), ys.tolist(), offsets.tolist())
+        )
+
+    def test_empty_set(self):
+        "Every set must contain a point"
+        args = flatten([[(1, 1)], []])
+        for function in (bounding_boxes, convex_hulls):
+            self.assertRaisesRegex(
+                ValueError, 'Every set of coordinates must contain a point',
+                function, *args
+            )
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,119 @@
+import shutil
+import tempfile
+import unittest
+
+from pathlib import Path
+
+try:
+    from unittest.mock import patch
+except ImportError:
+    # Python 2
+    from mock import patch
+
+from PIL import Image
+
+from pyzbar.pages import iter_decode_pages
+from pyzbar.pyzbar import ZBarSymbol
+
+
+TESTDATA = Path(__file__).parent
+
+
+class TestIterDecodePages(unittest.TestCase):
+    EXPECTED = [
+        (0, [b'Foramenifera', b'Rana temporaria']),
+        (1, [b'Thalassiodracon']),
+        (2, []),
+    ]
+
+    @classmethod
+    def setUpClass(cls):
+        cls.paths = [
+            TESTDATA.joinpath(fname)
+            for fname in ('code128.png', 'qrcode.png', 'empty.png')
+        ]
+        cls.tempdir = Path(tempfile.mkdtemp())
+        cls.tiff = cls.tempdir.joinpath('pages.tif')
+        pages = [Image.open(str(path)).convert('L') for path in cls.paths]
+        pages[0].save(str(cls.tiff), save_all=True, append_images=pages[1:])
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(str(cls.tempdir))
+
+    def _data(self, res):
+        return [
+            (index, sorted(d.data for d in results)) for index, results in res
+        ]
+
+    def test_multipage_tiff(self):
+        "Read each page of a multi-page TIFF"
+        self.assertEqual(
+            self.EXPECTED, self._data(iter_decode_pages(self.tiff))
+        )
+
+    def test_multipage_tiff_str(self):
+        self.assertEqual(
+            self.EXPECTED, self._data(iter_decode_pages(str(self.tiff)))
+        )
+
+    def test_paths(self):
+        "Read a sequence of files"
+        self.assertEqual(
+            self.EXPECTED, self._data(iter_decode_pages(self.paths))
+        )
+
+    def test_images(self):
+        "Read a sequence of images"
+        images = (Image.open(str(path)) for path in self.paths)
+        self.assertEqual(self.EXPECTED, self._data(iter_decode_pages(images)))
+
+    def test_read_ahead(self):
+        res = iter_decode_pages(self.paths + [self.tiff], read_ahead=2)
+        self.assertEqual(
+            self.EXPECTED + [(i + 3, d) for i, d in self.EXPECTED],
+            self._data(res)
+        )
+
+    def test_read_ahead_early_exit(self):
+        "Background loading stops when the generator is closed"
+        res = iter_decode_pages(self.paths * 10, read_ahead=1)
+        self.assertEqual(0, next(res)[0])
+        res.close()
+
+    def test_read_ahead_closes_source(self):
+        "The pages being read are closed when the generator is closed"
+        closed = []
+
+        def load():
+            try:
+                while True:
+                    yield (b'\xff' * 4, 2, 2)
+            finally:
+                closed.append(True)
+
+        pages = load()
+        with patch('pyzbar.pages._load', return_value=pages):
+            res = iter_decode_pages(self.tiff, read_ahead=1)
+            self.assertEqual(0, next(res)[0])
+            res.close()
+        self.assertEqual([True], closed)
+
+    def test_read_ahead_error(self):
+        "Errors raised while loading are raised by the generator"
+        res = iter_decode_pages(
+            [self.paths[1], self.tempdir.joinpath('missing.png')],
+            read_ahead=1
+        )
+        self.assertEqual(0, next(res)[0])
+        self.assertRaises(IOError, next, res)
+
+    def test_symbols(self):
+        res = iter_decode_pages(self.tiff, symbols=[ZBarSymbol.QRCODE])
+        self.assertEqual(
+            [(0, []), (1, [b'Thalassiodracon']), (2, [])], self._data(res)
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
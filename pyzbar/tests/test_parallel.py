@@ -0,0 +1,112 @@
+import unittest
+
+from pathlib import Path
+from threading import current_thread
+
+try:
+    from unittest.mock import patch
+except ImportError:
+    # Python 2
+    from mock import patch
+
+import numpy as np
+
+from PIL import Image
+
+from pyzbar import pyzbar
+from pyzbar.parallel import decode_parallel, _split
+from pyzbar.pyzbar import ZBarSymbol, decode
+from pyzbar.pyzbar_error import PyZbarError
+from pyzbar.scanners import ScannerPool
+
+
+TESTDATA = Path(__file__).parent
+
+
+class TestDecodeParallel(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        code128, qrcode = (
+            np.asarray(Image.open(str(TESTDATA.joinpath(fname))).convert('L'))
+            for fname in ('code128.png', 'qrcode.png')
+        )
+        # Both barcodes in one image
+        height = max(code128.shape[0], qrcode.shape[0])
+        cls.image = np.full(
+            (height, code128.shape[1] + qrcode.shape[1]), 255, dtype='uint8'
+        )
+        cls.image[:code128.shape[0], :code128.shape[1]] = code128
+        cls.image[:qrcode.shape[0], code128.shape[1]:] = qrcode
+
+        # assertRaisesRegexp was a deprecated alias removed in Python 3.11
+        if not hasattr(cls, 'assertRaisesRegex'):
+            cls.assertRaisesRegex = cls.assertRaisesRegexp
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.image = None
+
+    def test_decode(self):
+        threads = set()
+
+        def scan(scanner, pixels, width, height):
+            threads.add(current_thread().name)
+            return pyzbar._scan(scanner, pixels, width, height)
+
+        with patch('pyzbar.parallel._scan', side_effect=scan):
+            res = decode_parallel(self.image)
+        self.assertEqual(
+            sorted(decode(self.image)), sorted(res)
+        )
+        self.assertEqual(
+            [b'Foramenifera', b'Rana temporaria', b'Thalassiodracon'],
+            sorted(d.data for d in res)
+        )
+        self.assertEqual(2, len(threads))
+
+    def test_symbols(self):
+        with ScannerPool() as pool:
+            res = decode_parallel(
+                self.image, symbols=[ZBarSymbol.QRCODE], scanner_pool=pool
+            )
+            self.assertEqual([b'Thalassiodracon'], [d.data for d in res])
+            self.assertEqual(1, pool.created)
+
+    def test_split(self):
+        self.assertEqual(
+            [[ZBarSymbol.CODE128], [ZBarSymbol.QRCODE]],
+            _split([ZBarSymbol.QRCODE, ZBarSymbol.CODE128], [
+                [ZBarSymbol.CODE128], [ZBarSymbol.QRCODE]
+            ])
+        )
+        # Symbols not in any group are decoded together
+        self.assertEqual(
+            [[ZBarSymbol.QRCODE], [ZBarSymbol.EAN13, ZBarSymbol.CODE128]],
+            _split(
+                [ZBarSymbol.EAN13, ZBarSymbol.QRCODE, ZBarSymbol.CODE128],
+                [[ZBarSymbol.QRCODE]]
+            )
+        )
+
+    def test_duplicates(self):
+        "A symbol type in more than one group is reported once"
+        res = decode_parallel(
+            self.image, groups=[[ZBarSymbol.QRCODE], [ZBarSymbol.QRCODE]],
+            symbols=[ZBarSymbol.QRCODE]
+        )
+        self.assertEqual([b'Thalassiodracon'], [d.data for d in res])
+
+    def test_error(self):
+        self.assertRaisesRegex(
+            PyZbarError, 'Unsupported bits-per-pixel', decode_parallel,
+            (b'\0' * 18, 3, 3)
+        )
+        with patch(
+                'pyzbar.parallel._scan', side_effect=PyZbarError('Failed')):
+            self.assertRaisesRegex(
+                PyZbarError, 'Failed', decode_parallel, self.image
+            )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+import time
+import unittest
+
+from pathlib import Path
+
+try:
+    from unittest.mock import patch
+except ImportError:
+    # Python 2
+    from mock import patch
+
+from PIL import Image
+
+from pyzbar import prefetch
+from pyzbar.prefetch import PrefetchStats, iter_decode_prefetched, load_grey
+from pyzbar.pyzbar import decode
+
+
+TESTDATA = Path(__file__).parent
+
+FIXTURES = [
+    str(TESTDATA.joinpath(fname))
+    for fname in ('code128.png', 'empty.png', 'qrcode.png')
+]
+
+
+class TestPrefetch(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # assertRaisesRegexp was a deprecated alias removed in Python 3.11
+        if not hasattr(cls, 'assertRaisesRegex'):
+            cls.assertRaisesRegex = cls.assertRaisesRegexp
+
+    def test_results(self):
+        "Each source is loaded and decoded"
+        sources = FIXTURES * 4
+        stats = PrefetchStats()
+        results = sorted(
+            iter_decode_prefetched(
+                iter(sources), loaders=3, decoders=2, queue_depth=2,
+                stats=stats
+            ),
+            key=lambda r: r.index
+        )
+
+        self.assertEqual(list(range(len(sources))), [r.index for r in results])
+        self.assertEqual(
+            [decode(Image.open(path)) for path in sources],
+            [r.results for r in results]
+        )
+        self.assertEqual(12, stats.images)
+        self.assertEqual(0, stats.errors)
+        self.assertEqual((3, 2), (stats.loaders, stats.decoders))
+        self.assertLess(0, stats.decode_busy)
+        self.assertLess(0, stats.load_busy)
+
+    def test_images(self):
+        "Images that are already loaded are converted to greyscale"
+        image = Image.open(FIXTURES[2])
+        self.assertEqual(load_grey(image), load_grey(FIXTURES[2]))
+        result, = list(iter_decode_prefetched([image], decoders=1))
+        self.assertEqual(b'Thalassiodracon', result.results[0].data)
+
+    def test_load_error(self):
+        "Sources that cannot be loaded are reported"
+        results = sorted(
+            iter_decode_prefetched(
+                [FIXTURES[0], str(TESTDATA.joinpath('missing.png'))],
+                decoders=1
+            ),
+            key=lambda r: r.index
+        )
+        self.assertIsNone(results[0].error)
+        self.assertEqual([], results[1].results)
+        self.assertIsInstance(results[1].error, IOError)
+
+    def test_slow_loading(self):
+        "Slow loaders are reported as the bottleneck"
+        def slow_load(source):
+            time.sleep(0.02)
+            return load_grey(source)
+
+        stats = PrefetchStats()
+        list(
+            iter_decode_prefetched(
+                FIXTURES * 4, loaders=1, decoders=2, load=slow_load,
+                stats=stats
+            )
+        )
+        self.assertEqual('load', stats.bottleneck)
+        self.assertLess(0.5, stats.load_utilisation)
+
+    def test_slow_decoding(self):
+        "Slow decoders are reported as the bottleneck"
+        scan = prefetch._scan
+
+        def slow_scan(*args, **kwargs):
+            time.sleep(0.02)
+            return scan(*args, **kwargs)
+
+        stats = PrefetchStats()
+        with patch.object(prefetch, '_scan', side_effect=slow_scan):
+            list(
+                iter_decode_prefetched(
+                    FIXTURES * 4, loaders=2, decoders=1, queue_depth=1,
+                    stats=stats
+                )
+            )
+        self.assertEqual('decode', stats.bottleneck)
+        self.assertLess(0.5, stats.decode_utilisation)
+
+    def test_close_early(self):
+        "Threads stop when the generator is closed"
+        results = iter_decode_prefetched(
+            FIXTURES * 100, loaders=2, decoders=2, queue_depth=2
+        )
+        next(results)
+        results.close()
+
+    def test_source_error(self):
+        "Errors raised by the sources are raised"
+        def sources():
+            yield FIXTURES[0]
+            raise ValueError('Broken manifest')
+
+        self.assertRaisesRegex(
+            ValueError, 'Broken manifest', list,
+            iter_decode_prefetched(sources(), decoders=1)
+        )
+
+    def test_invalid(self):
+        "Stages need at least one thread and the queue at least one slot"
+        self.assertRaisesRegex(
+            ValueError, 'loaders and queue_depth must be at least 1', list,
+            iter_decode_prefetched(FIXTURES, loaders=0)
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import unittest
+
+from pathlib import Path
+
+try:
+    from unittest.mock import patch
+except ImportError:
+    # Python 2
+    from mock import patch
+
+import numpy as np
+
+from PIL import Image
+
+from pyzbar.prefilter import (
+    Prefilter, _numpy_statistics, _python_statistics, image_statistics
+)
+from pyzbar.pyzbar import decode
+
+
+TESTDATA = Path(__file__).parent
+
+
+class TestPrefilter(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.fixtures = dict(
+            (
+                fname,
+                np.asarray(
+                    Image.open(str(TESTDATA.joinpath(fname))).convert('L')
+                )
+            )
+            for fname in (
+                'code128.png', 'code128_null_character.png', 'qrcode.png',
+                'qrcode_rotated.png', 'empty.png'
+            )
+        )
+
+        rng = np.random.RandomState(0)
+        # A blank scanned page with sensor noise
+        cls.noisy_page = np.clip(
+            rng.normal(235, 2, (3508, 2480)), 0, 255
+        ).astype('uint8')
+        # An over-exposed frame
+        cls.overexposed = rng.randint(250, 256, (720, 1280)).astype('uint8')
+        # A small barcode on a large page
+        cls.small_barcode = np.full((3508, 2480), 255, dtype='uint8')
+        qrcode = cls.fixtures['qrcode.png']
+        cls.small_barcode[1000:1200, 1500:1700] = qrcode
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.fixtures = cls.noisy_page = cls.overexposed = None
+        cls.small_barcode = None
+
+    def _rejects(self, prefilter, image):
+        height, width = image.shape
+        return prefilter.rejects(image, width, height)
+
+    def test_fixtures(self):
+        "Thresholds reject only the fixture without a barcode"
+        prefilter = Prefilter()
+        self.assertEqual(
+            {
+                'code128.png': False, 'code128_null_character.png': False,
+                'qrcode.png': False, 'qrcode_rotated.png': False,
+                'empty.png': True,
+            },
+            dict(
+                (fname, self._rejects(prefilter, image))
+                for fname, image in self.fixtures.items()
+            )
+        )
+        self.assertEqual(5, prefilter.stats.checked)
+        self.assertEqual(1, prefilter.stats.skipped)
+        self.assertEqual(0.2, prefilter.stats.skip_rate)
+
+    def test_blank_pages(self):
+        prefilter = Prefilter()
+        self.assertTrue(self._rejects(prefilter, self.noisy_page))
+        self.assertTrue(self._rejects(prefilter, self.overexposed))
+        self.assertFalse(self._rejects(prefilter, self.small_barcode))
+
+    def test_decode(self):
+        prefilter = Prefilter()
+        with patch('pyzbar.pyzbar._scan', autospec=True) as _scan:
+            self.assertEqual(
+                [], decode(self.fixtures['empty.png'], prefilter=prefilter)
+            )
+            _scan.assert_not_called()
+        self.assertEqual(
+            [b'Thalassiodracon'],
+            [
+                d.data for d in
+                decode(self.small_barcode, prefilter=prefilter)
+            ]
+        )
+        self.assertEqual(1, prefilter.stats.skipped)
+
+    def test_python_statistics(self):
+        "The statistics without numpy are the same"
+        for image in list(self.fixtures.values()) + [self.small_barcode]:
+            height, width = image.shape
+            expected = _numpy_statistics(image, width, height, 256, 32)
+            actual = _python_statistics(image.tobytes(), width, height, 256, 32)
+            self.assertEqual(expected._replace(std=0), actual._replace(std=0))
+            self.assertAlmostEqual(expected.std, actual.std)
+
+    def test_empty_image(self):
+        self.assertEqual((0.0, 0, 0, 0), image_statistics(b'', 0, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
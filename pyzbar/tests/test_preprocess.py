@@ -0,0 +1,132 @@
+import unittest
+
+from pyzbar.locations import Point, Rect
+from pyzbar.pyzbar import Decoded
+from pyzbar.preprocess import (
+    _is_duplicate, _translate_decoded, _unrotate_decoded, binarize, crop,
+    invert, rotate, stretch_contrast
+)
+
+
+class TestPreprocess(unittest.TestCase):
+    # 3 x 2 image
+    PIXELS = bytes(bytearray([0, 1, 2, 3, 4, 5]))
+
+    def test_invert(self):
+        self.assertEqual(
+            (bytes(bytearray([255, 254, 253])), 3, 1),
+            invert(bytes(bytearray([0, 1, 2])), 3, 1)
+        )
+
+    def test_invert_list(self):
+        "Pixels that are not bytes are accepted"
+        self.assertEqual(
+            (bytes(bytearray([255, 0])), 2, 1), invert([0, 255], 2, 1)
+        )
+
+    def test_stretch_contrast(self):
+        self.assertEqual(
+            (bytes(bytearray([0, 128, 255])), 3, 1),
+            stretch_contrast(bytes(bytearray([10, 20, 30])), 3, 1)
+        )
+
+    def test_stretch_contrast_uniform(self):
+        pixels = bytes(bytearray([7, 7, 7]))
+        self.assertEqual((pixels, 3, 1), stretch_contrast(pixels, 3, 1))
+
+    def test_binarize(self):
+        pixels = bytes(bytearray([10, 20, 200, 210]))
+        self.assertEqual(
+            (bytes(bytearray([0, 0, 255, 255])), 4, 1),
+            binarize(pixels, 4, 1)
+        )
+        self.assertEqual(
+            (bytes(bytearray([0, 255, 255, 255])), 4, 1),
+            binarize(pixels, 4, 1, threshold=15)
+        )
+
+    def test_rotate(self):
+        self.assertEqual(
+            (bytes(bytearray([3, 0, 4, 1, 5, 2])), 2, 3),
+            rotate(self.PIXELS, 3, 2, 90)
+        )
+        self.assertEqual(
+            (bytes(bytearray([5, 4, 3, 2, 1, 0])), 3, 2),
+            rotate(self.PIXELS, 3, 2, 180)
+        )
+        self.assertEqual(
+            (bytes(bytearray([2, 5, 1, 4, 0, 3])), 2, 3),
+            rotate(self.PIXELS, 3, 2, 270)
+        )
+        self.assertEqual((self.PIXELS, 3, 2), rotate(self.PIXELS, 3, 2, 360))
+
+    def test_rotate_unsupported(self):
+        self.assertRaises(ValueError, rotate, self.PIXELS, 3, 2, 45)
+
+    def test_crop(self):
+        self.assertEqual(
+            (bytes(bytearray([4, 5])), 2, 1),
+            crop(self.PIXELS, 3, 2, Rect(1, 1, 2, 1))
+        )
+
+    def test_crop_clipped(self):
+        "Regions are clipped to the image"
+        self.assertEqual(
+            (bytes(bytearray([1, 2, 4, 5])), 2, 2),
+            crop(self.PIXELS, 3, 2, Rect(1, -5, 10, 10))
+        )
+        self.assertEqual(
+            (b'', 0, 0), crop(self.PIXELS, 3, 2, Rect(3, 0, 1, 1))
+        )
+
+    def test_translate_decoded(self):
+        decoded = Decoded(
+            data=b'', type='CODE128', rect=Rect(1, 2, 3, 4),
+            polygon=[Point(1, 2), Point(4, 6)], quality=1, orientation=None,
+        )
+        res = _translate_decoded(decoded, 10, 20)
+        self.assertEqual(Rect(11, 22, 3, 4), res.rect)
+        self.assertEqual([(11, 22), (14, 26)], res.polygon)
+
+    def test_is_duplicate(self):
+        decoded = Decoded(
+            data=b'a', type='CODE128', rect=Rect(0, 0, 10, 10),
+            polygon=[], quality=1, orientation=None,
+        )
+        self.assertTrue(
+            _is_duplicate(decoded, decoded._replace(rect=Rect(2, 3, 10, 9)))
+        )
+        self.assertFalse(
+            _is_duplicate(decoded, decoded._replace(rect=Rect(20, 0, 10, 10)))
+        )
+        self.assertFalse(_is_duplicate(decoded, decoded._replace(data=b'b')))
+
+    def test_unrotate_decoded(self):
+        "Locations found in a rotated image are mapped to the original"
+        # A 10 x 4 image containing a symbol at left=1, top=0, width=2,
+        # height=1. Rotated clockwise by 90 degrees, the image is 4 x 10 and
+        # the symbol is at left=2, top=1, width=1, height=2.
+        decoded = Decoded(
+            data=b'', type='CODE128',
+            rect=Rect(2, 1, 1, 2),
+            polygon=[Point(2, 1), Point(2, 3), Point(3, 3), Point(3, 1)],
+            quality=1, orientation='UP',
+        )
+        res = _unrotate_decoded(decoded, 10, 4, 90)
+        self.assertEqual(Rect(1, 0, 2, 1), res.rect)
+        self.assertEqual(
+            [(1, 0), (1, 1), (3, 1), (3, 0)], res.polygon
+        )
+        self.assertEqual('LEFT', res.orientation)
+
+    def test_unrotate_decoded_unknown_orientation(self):
+        decoded = Decoded(
+            data=b'', type='CODE128', rect=Rect(0, 0, 1, 1),
+            polygon=[Point(0, 0), Point(1, 1)], quality=1, orientation=None,
+        )
+        self.assertIsNone(_unrotate_decoded(decoded, 2, 2, 180).orientation)
+        self.assertIs(decoded, _unrotate_decoded(decoded, 2, 2, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
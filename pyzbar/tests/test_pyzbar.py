@@ -24,10 +24,15 @@ except ImportError:
     imageio = None
 
 from pyzbar import wrapper
+from pyzbar.buffers import BufferPool
+from pyzbar.locations import convex_hulls
 from pyzbar.pyzbar import (
-    decode, Decoded, Rect, ZBarSymbol, EXTERNAL_DEPENDENCIES, ORIENTATION_AVAILABLE
+    decode, Decoded, Rect, SymbolSet, ZBarSymbol, EXTERNAL_DEPENDENCIES,
+    ORIENTATION_AVAILABLE, RETAIN_AVAILABLE, _image_scanner, _scan_image
 )
+from pyzbar.scanners import ScannerPool
 from pyzbar.pyzbar_error import PyZbarError
+from pyzbar.wrapper import ZBarConfig
 
 
 TESTDATA = Path(__file__).parent
@@ -139,6 +144,14 @@ class TestDecode(unittest.TestCase):
         res = decode(self.qrcode, symbols=[ZBarSymbol.QRCODE])
         self.assertEqual(self.EXPECTED_QRCODE, res)
 
+    def test_config(self):
+        "Settings are applied after symbols"
+        res = decode(
+            self.code128, symbols=[ZBarSymbol.CODE128],
+            config=[(ZBarSymbol.CODE128, ZBarConfig.CFG_MIN_LEN, 13)]
+        )
+        self.assertEqual([b'Rana temporaria'], [d.data for d in res])
+
     def test_symbols_not_present(self):
         "Read only code128 in `qrcode.png`"
         res = decode(self.qrcode, symbols=[ZBarSymbol.CODE128])
@@ -166,6 +179,227 @@ class TestDecode(unittest.TestCase):
         res = decode(np.asarray(self.code128))
         self.assertEqual(self.EXPECTED_CODE128, res)
 
+    def test_decode_numpy_no_copy(self):
+        "Read eight bits-per-pixel numpy.ndarray without copying its data"
+        image = np.asarray(self.code128.convert('L'))
+        with patch('numpy.copyto', autospec=True) as copyto:
+            res = decode(image)
+        self.assertEqual(self.EXPECTED_CODE128, res)
+        copyto.assert_not_called()
+
+    def test_decode_numpy_float(self):
+        "Read numpy.ndarray that is not eight bits-per-pixel"
+        res = decode(np.asarray(self.code128.convert('L')).astype('float64'))
+        self.assertEqual(self.EXPECTED_CODE128, res)
+
+    def test_decode_numpy_buffer_pool(self):
+        "Convert numpy.ndarray into a recycled buffer"
+        pool = BufferPool()
+        image = np.asarray(self.code128)
+        for _ in range(3):
+            self.assertEqual(
+                self.EXPECTED_CODE128, decode(image, buffer_pool=pool)
+            )
+        stats = pool.stats()
+        self.assertEqual(2, stats.hits)
+        self.assertEqual(1, stats.misses)
+        self.assertEqual(1, stats.pooled)
+
+    def test_decode_numpy_buffer_pool_error(self):
+        "A recycled buffer is returned if the conversion fails"
+        pool = BufferPool()
+        image = np.asarray(self.code128).astype('float64')
+        with patch('numpy.copyto', side_effect=ValueError('copy failed')):
+            self.assertRaisesRegex(
+                ValueError, 'copy failed', decode, image, buffer_pool=pool
+            )
+        self.assertEqual(1, pool.stats().returned)
+
+    def test_decode_planar_frame(self):
+        "Read the luma plane of 4:2:0 frames without copying"
+        luma = np.asarray(self.code128.convert('L'))
+        height, width = luma.shape
+        chroma = np.full((height // 2, width), 128, dtype='uint8')
+        frame = np.vstack([luma, chroma])
+        with patch('numpy.copyto', autospec=True) as copyto:
+            for format in ('NV12', 'I420', 'Y800'):
+                self.assertEqual(
+                    self.EXPECTED_CODE128, decode(frame, format=format)
+                )
+        copyto.assert_not_called()
+        self.assertEqual(
+            self.EXPECTED_CODE128,
+            decode((frame.tobytes(), width, height), format='NV21')
+        )
+
+    def test_decode_packed_frame(self):
+        "Read 4:2:2 frames converted by zbar"
+        luma = np.asarray(self.code128.convert('L'))
+        height, width = luma.shape
+        chroma = np.full(luma.shape, 128, dtype='uint8')
+        yuyv = np.dstack([luma, chroma])
+        self.assertEqual(self.EXPECTED_CODE128, decode(yuyv, format='YUYV'))
+        uyvy = np.dstack([chroma, luma]).reshape(height, 2 * width)
+        self.assertEqual(
+            self.EXPECTED_CODE128,
+            decode((uyvy.tobytes(), width, height), format='UYVY')
+        )
+
+    def test_unsupported_format(self):
+        self.assertRaisesRegex(
+            PyZbarError, r'Unsupported format \[RGB3\]', decode,
+            (b'\0' * 27, 3, 3), format='RGB3'
+        )
+
+    def test_frame_too_small(self):
+        self.assertRaisesRegex(
+            PyZbarError,
+            (
+                r'Frame data of 9 bytes is too small for a 3 x 3 image in '
+                r'format \[YUYV\], which requires 18 bytes'
+            ),
+            decode, (b'\0' * 9, 3, 3), format='YUYV'
+        )
+        self.assertRaisesRegex(
+            PyZbarError, 'Frames must be C-contiguous arrays of uint8',
+            decode, np.zeros((6, 4), dtype='float32'), format='NV12'
+        )
+
+    def test_partial_frame(self):
+        "Arrays must have the shape of a whole frame"
+        luma = np.asarray(self.code128.convert('L'))[:100]
+        odd_width = np.ascontiguousarray(luma[:, :-1])
+        for format, image in (
+                ('NV12', luma), ('I420', luma[:, :, np.newaxis]),
+                ('Y800', luma[:, :, np.newaxis]), ('YUYV', odd_width),
+                ('UYVY', np.dstack([luma] * 3))):
+            self.assertRaisesRegex(
+                PyZbarError,
+                r'Array of shape \({0}.*\) is not a whole frame in format '
+                r'\[{1}\]'.format(image.shape[0], format),
+                decode, image, format=format
+            )
+
+    @patch('pyzbar.pyzbar.zbar_image_convert', autospec=True)
+    def test_zbar_image_convert_fail(self, zbar_image_convert):
+        zbar_image_convert.return_value = None
+        self.assertRaisesRegex(
+            PyZbarError, 'Could not convert image', decode,
+            (b'\0' * 18, 3, 3), format='YUYV'
+        )
+
+    @patch('pyzbar.pyzbar._VECTORIZE_MIN_SYMBOLS', 1)
+    def test_vectorized(self):
+        "Geometry computed for all symbols at once is the same"
+        cases = (
+            (self.code128, self.EXPECTED_CODE128),
+            (self.qrcode_rotated, self.EXPECTED_QRCODE_ROTATED),
+            (self.empty, []),
+        )
+        with patch(
+                'pyzbar.pyzbar.convex_hulls', wraps=convex_hulls
+        ) as vectorized:
+            with _image_scanner() as scanner:
+                for image, expected in cases:
+                    self.assertEqual(
+                        expected, _scan_image(scanner, image, vectorized=True)
+                    )
+        # No symbols were found in the empty image
+        self.assertEqual(2, vectorized.call_count)
+
+    def test_vectorized_few_locations(self):
+        "Geometry of symbols with few locations is computed per symbol"
+        with patch('pyzbar.pyzbar.convex_hulls') as convex_hulls:
+            with _image_scanner() as scanner:
+                res = _scan_image(scanner, self.code128, vectorized=True)
+        self.assertEqual(self.EXPECTED_CODE128, res)
+        convex_hulls.assert_not_called()
+
+    def test_vectorized_without_numpy(self):
+        "Geometry is computed per symbol if numpy is not installed"
+        with patch.dict('sys.modules', {'numpy': None}):
+            with patch('pyzbar.pyzbar.convex_hulls') as convex_hulls:
+                with _image_scanner() as scanner:
+                    res = _scan_image(scanner, self.code128, vectorized=True)
+        self.assertEqual(self.EXPECTED_CODE128, res)
+        convex_hulls.assert_not_called()
+
+    @unittest.skipUnless(RETAIN_AVAILABLE, 'retain requires Python 3')
+    def test_retain(self):
+        "Retained data are views of zbar's memory, not copies"
+        with patch('pyzbar.pyzbar.string_at') as string_at:
+            res = decode(self.code128, retain=True)
+        string_at.assert_not_called()
+        self.assertIsInstance(res, SymbolSet)
+        self.assertEqual(self.EXPECTED_CODE128, list(res))
+        self.assertIsInstance(res[0].data, memoryview)
+        self.assertTrue(res[0].data.readonly)
+        self.assertEqual(b'Foram', res[0].data[:5].tobytes())
+        self.assertEqual(self.EXPECTED_CODE128, res.copy())
+        res.release()
+
+    @unittest.skipUnless(RETAIN_AVAILABLE, 'retain requires Python 3')
+    def test_retain_reused_scanner(self):
+        "Retained data survive further scans by the same scanner"
+        with ScannerPool() as pool:
+            retained = [
+                pool.decode(image, retain=True)
+                for image in (self.code128, self.qrcode, self.code128)
+            ]
+        expected = [
+            self.EXPECTED_CODE128, self.EXPECTED_QRCODE, self.EXPECTED_CODE128
+        ]
+        self.assertEqual(expected, [list(res) for res in retained])
+        for res in retained:
+            res.release()
+
+    @unittest.skipUnless(RETAIN_AVAILABLE, 'retain requires Python 3')
+    def test_retain_release(self):
+        "Data cannot be used once released"
+        with decode(self.code128_null_character, retain=True) as res:
+            data = res[0].data
+            self.assertEqual(b'Hello\0Goodbye', bytes(data))
+            copied = res.copy()
+        self.assertTrue(res.released)
+        self.assertEqual('SymbolSet(released)', repr(res))
+        self.assertRaises(ValueError, bytes, data)
+        self.assertRaisesRegex(
+            PyZbarError, 'Symbol set has been released', list, res
+        )
+        self.assertEqual(self.EXPECTED_CODE128_NULL_CHARACTER, copied)
+        # Releasing again has no effect
+        res.release()
+
+    @unittest.skipUnless(RETAIN_AVAILABLE, 'retain requires Python 3')
+    def test_retain_exported(self):
+        "Symbols are not freed while their data are exported"
+        res = decode(self.code128, retain=True)
+        array = np.frombuffer(res[0].data, dtype='uint8')
+        with patch(
+                'pyzbar.pyzbar.zbar_symbol_set_ref',
+                wraps=wrapper.zbar_symbol_set_ref) as ref:
+            res.release()
+            ref.assert_not_called()
+            self.assertEqual(b'Foramenifera', array.tobytes())
+            del array
+            self.assertEqual(1, ref.call_count)
+            self.assertEqual(-1, ref.call_args[0][1])
+
+    @patch('pyzbar.pyzbar.RETAIN_AVAILABLE', False)
+    def test_retain_unavailable(self):
+        "retain is refused where views cannot be released"
+        self.assertRaisesRegex(
+            PyZbarError, r'retain=True requires Python 3', decode,
+            self.code128, retain=True
+        )
+
+    @unittest.skipUnless(RETAIN_AVAILABLE, 'retain requires Python 3')
+    def test_retain_empty(self):
+        "An empty symbol set is returned for an image without barcodes"
+        with decode(self.empty, retain=True) as res:
+            self.assertEqual(0, len(res))
+            self.assertEqual('SymbolSet([])', repr(res))
+
     @unittest.skipIf(imageio is None, 'imageio not installed')
     def test_decode_imageio(self):
         "Read image using imageio"
@@ -0,0 +1,118 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from pathlib import Path
+
+try:
+    from unittest.mock import patch
+except ImportError:
+    # Python 2
+    from mock import patch
+
+from PIL import Image
+
+from pyzbar.pyzbar import ZBarSymbol, _pixel_data
+from pyzbar.recorder import SlowImageRecorder, load_case, main, replay
+from pyzbar.wrapper import ZBarConfig
+
+
+TESTDATA = Path(__file__).parent
+
+
+class TestSlowImageRecorder(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.code128 = Image.open(str(TESTDATA.joinpath('code128.png')))
+        cls.qrcode = Image.open(str(TESTDATA.joinpath('qrcode.png')))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.code128 = cls.qrcode = None
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_fast_images(self):
+        "Images faster than the threshold are not recorded"
+        recorder = SlowImageRecorder(self.directory, threshold=60)
+        results = recorder.decode(self.qrcode)
+        self.assertEqual(b'Thalassiodracon', results[0].data)
+        self.assertEqual([], os.listdir(self.directory))
+        self.assertEqual(1, recorder.stats.checked)
+        self.assertEqual(0, recorder.stats.recorded)
+
+    def test_record(self):
+        "Slow images are recorded with their settings, timings and results"
+        recorder = SlowImageRecorder(self.directory, threshold=0)
+        config = [(ZBarSymbol.NONE, ZBarConfig.CFG_X_DENSITY, 2)]
+        recorder.decode(
+            self.code128, symbols=[ZBarSymbol.CODE128], config=config
+        )
+
+        name, = [
+            f[:-len('.json')] for f in os.listdir(self.directory)
+            if f.endswith('.json')
+        ]
+        case = load_case(self.directory, name)
+        pixels, width, height = _pixel_data(self.code128)
+        self.assertEqual((pixels, width, height), case[1:4])
+        self.assertEqual([ZBarSymbol.CODE128], case.profile.symbols)
+        self.assertEqual(config, case.profile.config)
+        self.assertEqual(
+            set(['convert', 'configure', 'scan', 'total']), set(case.timings)
+        )
+        self.assertEqual(2, len(case.results))
+        self.assertEqual(1, recorder.stats.recorded)
+        self.assertLess(0, recorder.stats.bytes)
+
+    def test_budget(self):
+        "The oldest cases are deleted to stay within the budget"
+        recorder = SlowImageRecorder(self.directory, threshold=0)
+        recorder.decode(self.qrcode)
+        size = recorder.stats.bytes
+
+        recorder = SlowImageRecorder(
+            self.directory, threshold=0, max_bytes=int(size * 2.5)
+        )
+        self.assertEqual(size, recorder.stats.bytes)
+        first = sorted(os.listdir(self.directory))
+        for _ in range(3):
+            recorder.decode(self.qrcode)
+
+        self.assertEqual(2, recorder.stats.evicted)
+        self.assertLessEqual(recorder.stats.bytes, size * 2.5)
+        remaining = sorted(os.listdir(self.directory))
+        self.assertEqual(4, len(remaining))
+        self.assertFalse(set(first).intersection(remaining))
+
+    def test_replay(self):
+        "Recorded cases are decoded again"
+        recorder = SlowImageRecorder(self.directory, threshold=0)
+        recorder.decode(self.code128)
+        recorder.decode(self.qrcode, symbols=[ZBarSymbol.QRCODE])
+
+        replayed = list(replay(self.directory, repeat=2))
+        self.assertEqual(2, len(replayed))
+        self.assertEqual(
+            [None, [ZBarSymbol.QRCODE]],
+            [case.profile.symbols for case, _ in replayed]
+        )
+        self.assertEqual([1.0, 1.0], [trial.recall for _, trial in replayed])
+
+    def test_main(self):
+        "The replay command prints a line for each case"
+        SlowImageRecorder(self.directory, threshold=0).decode(self.qrcode)
+        with patch.object(sys, 'stdout') as stdout:
+            main([self.directory, '--repeat', '1'])
+        output = ''.join(c[0][0] for c in stdout.write.call_args_list)
+        self.assertRegex(output, r'200x200 recorded=.* recall=1.000')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,165 @@
+import unittest
+
+from ctypes import addressof
+from pathlib import Path
+from threading import Thread
+
+try:
+    from threading import Barrier
+except ImportError:
+    # Python 2
+    Barrier = None
+
+try:
+    from unittest.mock import patch
+except ImportError:
+    # Python 2
+    from mock import patch
+
+import numpy as np
+
+from PIL import Image
+
+from pyzbar.pyzbar import ZBarSymbol, decode
+from pyzbar.pyzbar_error import PyZbarError
+from pyzbar.scanners import ScannerPool
+
+
+TESTDATA = Path(__file__).parent
+
+# Number of threads used by the stress tests
+THREADS = 32
+
+# Number of images decoded by each thread
+DECODES_PER_THREAD = 20
+
+
+class TestScannerPool(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.code128, cls.qrcode = (
+            np.asarray(Image.open(str(TESTDATA.joinpath(fname))).convert('L'))
+            for fname in ('code128.png', 'qrcode.png')
+        )
+
+        # assertRaisesRegexp was a deprecated alias removed in Python 3.11
+        if not hasattr(cls, 'assertRaisesRegex'):
+            cls.assertRaisesRegex = cls.assertRaisesRegexp
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.code128 = cls.qrcode = None
+
+    def test_reuse(self):
+        "Scanners are reused for the same configuration"
+        with ScannerPool() as pool:
+            with pool.scanner() as first:
+                address = addressof(first.contents)
+            with pool.scanner() as second:
+                self.assertEqual(address, addressof(second.contents))
+                # Checked out at the same time as second
+                with pool.scanner() as third:
+                    self.assertNotEqual(address, addressof(third.contents))
+            with pool.scanner([ZBarSymbol.QRCODE]):
+                pass
+            self.assertEqual(3, pool.created)
+            self.assertEqual(3, pool.idle())
+
+    def test_configuration(self):
+        with ScannerPool() as pool:
+            self.assertEqual(
+                [], pool.decode(self.qrcode, symbols=[ZBarSymbol.CODE128])
+            )
+            self.assertEqual(
+                [b'Thalassiodracon'],
+                [d.data for d in pool.decode(self.qrcode)]
+            )
+            self.assertEqual(
+                [b'Thalassiodracon'],
+                [
+                    d.data for d in pool.decode(
+                        self.qrcode, symbols=[ZBarSymbol.QRCODE]
+                    )
+                ]
+            )
+            self.assertEqual(3, pool.created)
+
+    def test_max_idle(self):
+        with ScannerPool(max_idle=1) as pool:
+            with pool.scanner():
+                with pool.scanner():
+                    pass
+            self.assertEqual(1, pool.idle())
+
+    def test_closed(self):
+        pool = ScannerPool()
+        pool.decode(self.qrcode)
+        pool.close()
+        self.assertEqual(0, pool.idle())
+        self.assertRaisesRegex(
+            PyZbarError, 'Scanner pool is closed', pool.decode, self.qrcode
+        )
+
+    @patch('pyzbar.scanners.zbar_image_scanner_create', autospec=True)
+    def test_create_fail(self, zbar_image_scanner_create):
+        zbar_image_scanner_create.return_value = None
+        with ScannerPool() as pool:
+            self.assertRaisesRegex(
+                PyZbarError, 'Could not create image scanner', pool.decode,
+                self.qrcode
+            )
+
+
+@unittest.skipIf(Barrier is None, 'threading.Barrier requires Python 3')
+class TestConcurrentDecode(unittest.TestCase):
+    """Stress tests that decode from many threads at once. These are run on
+    the free-threaded build of CPython (see tox.ini) to test without the GIL.
+    """
+    @classmethod
+    def setUpClass(cls):
+        cls.images = [
+            np.asarray(Image.open(str(TESTDATA.joinpath(fname))).convert('L'))
+            for fname in ('code128.png', 'qrcode.png', 'empty.png')
+        ]
+        cls.expected = [[d.data for d in decode(i)] for i in cls.images]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.images = cls.expected = None
+
+    def _stress(self, decode_fn):
+        barrier = Barrier(THREADS)
+        failures = []
+
+        def run(offset):
+            barrier.wait()
+            try:
+                for count in range(DECODES_PER_THREAD):
+                    index = (offset + count) % len(self.images)
+                    res = [d.data for d in decode_fn(self.images[index])]
+                    if self.expected[index] != res:
+                        failures.append((index, res))
+            except Exception as e:
+                failures.append(e)
+
+        threads = [Thread(target=run, args=(i,)) for i in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([], failures)
+
+    def test_decode(self):
+        "Concurrent calls to decode"
+        self._stress(decode)
+
+    def test_scanner_pool(self):
+        "Concurrent calls to decode, sharing a pool of scanners"
+        with ScannerPool() as pool:
+            self._stress(pool.decode)
+            self.assertLessEqual(pool.created, THREADS)
+            self.assertEqual(pool.created, pool.idle())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,218 @@
+import json
+import unittest
+
+from io import BytesIO
+from pathlib import Path
+from threading import Thread
+
+try:
+    from http.client import HTTPConnection
+    from urllib.error import HTTPError
+    from urllib.request import Request, urlopen
+
+    from pyzbar.server import DecodeService, make_server
+except ImportError:
+    # Python 2
+    DecodeService = None
+
+from PIL import Image
+
+
+TESTDATA = Path(__file__).parent
+
+
+@unittest.skipIf(DecodeService is None, 'The server requires Python 3')
+class TestServer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.service = DecodeService(workers=2, batch_size=4, batch_wait=0.01)
+        cls.server = make_server(
+            cls.service, quiet=True, max_body_size=1024 * 1024
+        )
+        cls.url = 'http://{0}:{1}'.format(*cls.server.server_address[:2])
+        cls.thread = Thread(target=cls.server.serve_forever)
+        cls.thread.daemon = True
+        cls.thread.start()
+
+        cls.qrcode_png = TESTDATA.joinpath('qrcode.png').read_bytes()
+        cls.code128 = Image.open(str(TESTDATA.joinpath('code128.png')))
+        cls.code128 = cls.code128.convert('L')
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.service.close()
+        cls.code128 = None
+
+    def _request(self, path, body=None, content_type=None):
+        request = Request(self.url + path, data=body)
+        if content_type:
+            request.add_header('Content-Type', content_type)
+        try:
+            response = urlopen(request)
+        except HTTPError as e:
+            response = e
+        with response:
+            body = response.read()
+            if 'application/json' == response.headers['Content-Type']:
+                body = json.loads(body.decode('utf-8'))
+            return response.status, body
+
+    def _post_headers(self, headers, body=b''):
+        "Sends a request with exactly `headers`, which urllib would correct"
+        host, port = self.server.server_address[:2]
+        connection = HTTPConnection(host, port)
+        try:
+            connection.putrequest('POST', '/decode')
+            for name, value in headers:
+                connection.putheader(name, value)
+            connection.endheaders(body)
+            response = connection.getresponse()
+            return response.status, json.loads(response.read().decode('utf-8'))
+        finally:
+            connection.close()
+
+    def _data(self, response):
+        return [r['data'] for r in response['results']]
+
+    def test_encoded_image(self):
+        status, response = self._request('/decode', self.qrcode_png)
+        self.assertEqual(200, status)
+        self.assertEqual(['Thalassiodracon'], self._data(response))
+        result = response['results'][0]
+        self.assertEqual('QRCODE', result['type'])
+        self.assertEqual(
+            {'left': 27, 'top': 27, 'width': 145, 'height': 145},
+            result['rect']
+        )
+
+    def test_pgm(self):
+        width, height = self.code128.size
+        pgm = 'P5\n# comment\n{0} {1}\n255\n'.format(width, height).encode(
+            'ascii'
+        ) + self.code128.tobytes()
+        status, response = self._request('/decode', pgm)
+        self.assertEqual(200, status)
+        self.assertEqual(
+            ['Foramenifera', 'Rana temporaria'], sorted(self._data(response))
+        )
+
+    def test_raw_pixels(self):
+        path = '/decode?width={0}&height={1}&symbols=qrcode'.format(
+            *self.code128.size
+        )
+        status, response = self._request(path, self.code128.tobytes())
+        self.assertEqual((200, []), (status, response['results']))
+
+    def test_multipart(self):
+        boundary = 'pyzbarboundary'
+        body = BytesIO()
+        for name, data in (('a.png', self.qrcode_png), ('b.png', b'junk')):
+            body.write(
+                (
+                    '--{0}\r\nContent-Disposition: form-data; name="file"; '
+                    'filename="{1}"\r\nContent-Type: image/png\r\n\r\n'
+                ).format(boundary, name).encode('ascii')
+            )
+            body.write(data + b'\r\n')
+        body.write('--{0}--\r\n'.format(boundary).encode('ascii'))
+        status, response = self._request(
+            '/decode', body.getvalue(),
+            'multipart/form-data; boundary={0}'.format(boundary)
+        )
+        self.assertEqual(200, status)
+        first, second = response['images']
+        self.assertEqual('a.png', first['name'])
+        self.assertEqual(['Thalassiodracon'], self._data(first))
+        self.assertEqual(
+            {'name': 'b.png', 'error': 'Could not read image'}, second
+        )
+
+    def test_errors(self):
+        self.assertEqual(404, self._request('/nothing', b'')[0])
+        status, response = self._request('/decode?symbols=NOSUCH', b'P5')
+        self.assertEqual(400, status)
+        self.assertIn('Unknown symbol type', response['error'])
+
+    def test_invalid_size(self):
+        "Sizes that do not match the pixels are refused before decoding"
+        for query, body, error in (
+                ('width=0&height=3', b'', 'width and height must be positive'),
+                ('width=3&height=-3', b'\0' * 9,
+                 'width and height must be positive'),
+                ('width=3&height=3', b'\0',
+                 'Expected 9 bytes of pixels for a 3 x 3 image, not 1'),
+                ('width=2&height=2&format=NV12', b'\0' * 4,
+                 'Expected 6 bytes of pixels for a 2 x 2 image, not 4'),
+                ('width=2&height=2&format=RGB3', b'\0' * 12,
+                 'Unsupported format RGB3')):
+            status, response = self._request('/decode?' + query, body)
+            self.assertEqual((400, error), (status, response['error']))
+
+        status, response = self._request('/decode', b'P5 0 0 255\n')
+        self.assertEqual(
+            (400, 'PGM width and height must be positive'),
+            (status, response['error'])
+        )
+
+    def test_content_length(self):
+        "Missing, invalid and overlong lengths are refused before reading"
+        status, response = self._post_headers([])
+        self.assertEqual(411, status)
+        self.assertEqual('Content-Length is required', response['error'])
+        for length in ('abc', '-1', ''):
+            status, response = self._post_headers([('Content-Length', length)])
+            self.assertEqual(400, status)
+            self.assertEqual(
+                'Content-Length must be a non-negative integer',
+                response['error']
+            )
+        status, response = self._post_headers(
+            [('Content-Length', str(2 * 1024 * 1024))], b'P5'
+        )
+        self.assertEqual(413, status)
+        self.assertEqual(
+            'Body of 2097152 bytes is larger than the limit of 1048576',
+            response['error']
+        )
+
+    def test_metrics(self):
+        self._request('/decode', self.qrcode_png)
+        status, body = self._request('/metrics')
+        self.assertEqual(200, status)
+        lines = body.decode('utf-8').splitlines()
+        self.assertIn('# TYPE pyzbar_images_total counter', lines)
+        self.assertIn('pyzbar_queue_depth 0', lines)
+        counts = dict(
+            line.split(' ') for line in lines if not line.startswith('#')
+        )
+        self.assertLessEqual(1, int(counts['pyzbar_images_total']))
+        self.assertEqual(
+            counts['pyzbar_images_total'],
+            counts['pyzbar_image_latency_seconds_count']
+        )
+
+
+@unittest.skipIf(DecodeService is None, 'The server requires Python 3')
+class TestDecodeService(unittest.TestCase):
+    def test_micro_batches(self):
+        "Images queued together are decoded in batches"
+        image = Image.open(str(TESTDATA.joinpath('qrcode.png'))).convert('L')
+        service = DecodeService(workers=1, batch_size=4, batch_wait=0.5)
+        try:
+            jobs = [service.submit(image) for _ in range(8)]
+            for job in jobs:
+                job.done.wait()
+                self.assertEqual(
+                    [b'Thalassiodracon'], [d.data for d in job.results]
+                )
+            self.assertEqual(8, service.metrics.images)
+            self.assertEqual(2, service.metrics.batches)
+            self.assertEqual(1, service.scanner_pool.created)
+        finally:
+            service.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+import json
+import multiprocessing
+import shutil
+import tempfile
+import unittest
+
+from pathlib import Path
+
+from PIL import Image
+
+from pyzbar.batch import decode_many
+from pyzbar.scripts.read_zbar import main as read_zbar
+from pyzbar.sharding import (
+    main, merge, parse_shard, select_shard, shard_of
+)
+from pyzbar.writers import read_rows
+
+
+TESTDATA = Path(__file__).parent
+
+FIXTURES = [
+    str(TESTDATA.joinpath(fname))
+    for fname in (
+        'code128.png', 'code128_null_character.png', 'empty.png',
+        'qrcode.png', 'qrcode_rotated.png'
+    )
+]
+
+
+class TestShards(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # assertRaisesRegexp was a deprecated alias removed in Python 3.11
+        if not hasattr(cls, 'assertRaisesRegex'):
+            cls.assertRaisesRegex = cls.assertRaisesRegexp
+
+    def test_parse_shard(self):
+        "Shards are given as index/count"
+        self.assertEqual((1, 4), parse_shard('1/4'))
+        self.assertEqual((0, 1), parse_shard((0, 1)))
+        self.assertRaisesRegex(
+            ValueError, r'Shard \[1-4\] is not of the form index/count',
+            parse_shard, '1-4'
+        )
+        self.assertRaisesRegex(
+            ValueError, 'Shard index 4 is not between 0 and 3',
+            parse_shard, '4/4'
+        )
+
+    def test_partition(self):
+        "Every key is in exactly one shard and shards are balanced"
+        keys = ['scans/{0:05d}.tif'.format(i) for i in range(4000)]
+        shards = [
+            [key for _, key in select_shard(keys, (index, 4))]
+            for index in range(4)
+        ]
+        self.assertEqual(sorted(keys), sorted(sum(shards, [])))
+        for shard in shards:
+            self.assertTrue(900 < len(shard) < 1100, len(shard))
+
+    def test_stable(self):
+        "Adding inputs does not move existing inputs between shards"
+        keys = ['scans/{0:05d}.tif'.format(i) for i in range(500)]
+        before = set(key for _, key in select_shard(keys, '2/3'))
+        more = ['new/{0}.tif'.format(i) for i in range(100)] + keys
+        after = set(key for _, key in select_shard(more, '2/3'))
+        self.assertEqual(before, after.intersection(keys))
+        self.assertEqual(
+            shard_of('scans/00001.tif', 3),
+            shard_of(Path('scans') / '00001.tif', 3)
+        )
+
+    def test_pil_filenames(self):
+        "Images opened from files are assigned by filename"
+        images = [Image.open(path) for path in FIXTURES]
+        self.assertEqual(
+            [index for index, _ in select_shard(FIXTURES, '1/2')],
+            [index for index, _ in select_shard(images, '1/2')]
+        )
+
+    def test_decode_many(self):
+        "Results of each shard keep their positions in the input"
+        images = [Image.open(path) for path in FIXTURES]
+        full = decode_many(images, workers=2)
+        sharded = sorted(
+            (
+                result
+                for index in range(3)
+                for result in decode_many(
+                    images, workers=2, shard=(index, 3)
+                )
+            ),
+            key=lambda r: r.index
+        )
+        self.assertEqual(
+            [(r.index, r.results) for r in full],
+            [(r.index, r.results) for r in sharded]
+        )
+
+
+class TestMerge(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(str(self.tempdir))
+
+    def test_shards_in_processes(self):
+        "Shards decoded by separate processes merge to the unsharded results"
+        count = 3
+        outputs = [
+            str(self.tempdir.joinpath('shard{0}.jsonl'.format(index)))
+            for index in range(count)
+        ]
+        pool = multiprocessing.Pool(count)
+        try:
+            pool.map(
+                read_zbar,
+                [
+                    FIXTURES + [
+                        '--shard', '{0}/{1}'.format(index, count),
+                        '--output', output
+                    ]
+                    for index, output in enumerate(outputs)
+                ]
+            )
+        finally:
+            pool.close()
+            pool.join()
+
+        unsharded = str(self.tempdir.joinpath('all.jsonl'))
+        read_zbar(FIXTURES + ['--output', unsharded])
+        merged = str(self.tempdir.joinpath('merged.csv'))
+        main(outputs + ['-o', merged])
+
+        def key(row):
+            return row['source'], row['page'], row['data']
+
+        self.assertEqual(
+            sorted(read_rows(unsharded), key=key),
+            sorted(read_rows(merged), key=key)
+        )
+
+    def test_merge_formats(self):
+        "Rows read from CSV are converted to their types"
+        jsonl = self.tempdir.joinpath('a.jsonl')
+        read_zbar(FIXTURES[:1] + ['--output', str(jsonl)])
+        csv = self.tempdir.joinpath('a.csv')
+        self.assertEqual(2, merge([jsonl], csv))
+        with jsonl.open() as f:
+            expected = [json.loads(line) for line in f]
+        self.assertEqual(expected, list(read_rows(csv)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+
+from pathlib import Path
+
+try:
+    from multiprocessing.shared_memory import SharedMemory
+except ImportError:
+    # Python < 3.8
+    SharedMemory = None
+
+try:
+    FileNotFoundError
+except NameError:
+    # Python 2
+    FileNotFoundError = IOError
+
+import numpy as np
+
+from PIL import Image
+
+from pyzbar.pyzbar import ZBarSymbol, decode
+from pyzbar.pyzbar_error import PyZbarError
+from pyzbar.shared import SharedMemoryDecoder
+
+
+TESTDATA = Path(__file__).parent
+
+
+@unittest.skipUnless(SharedMemory, 'Shared memory requires Python 3.8')
+class TestSharedMemoryDecoder(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.code128, cls.qrcode, cls.empty = (
+            Image.open(str(TESTDATA.joinpath(fname))).convert('L')
+            for fname in ('code128.png', 'qrcode.png', 'empty.png')
+        )
+        cls.slot_size = max(
+            i.size[0] * i.size[1] for i in (cls.code128, cls.qrcode, cls.empty)
+        )
+
+        # assertRaisesRegexp was a deprecated alias removed in Python 3.11
+        if not hasattr(cls, 'assertRaisesRegex'):
+            cls.assertRaisesRegex = cls.assertRaisesRegexp
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.code128 = cls.qrcode = cls.empty = None
+
+    def test_decode_iter(self):
+        "More images than slots, in order, of each supported type"
+        images = [
+            self.code128, np.asarray(self.qrcode), self.empty,
+            np.asarray(self.code128).astype('float32'),
+            np.asarray(self.qrcode.convert('RGB')),
+        ] * 3
+        expected = [decode(i) for i in images]
+        with SharedMemoryDecoder(self.slot_size, slots=2, workers=2) as decoder:
+            self.assertEqual(expected, list(decoder.decode_iter(images)))
+
+    def test_symbols(self):
+        with SharedMemoryDecoder(
+                self.slot_size, workers=1,
+                symbols=[ZBarSymbol.CODE128]) as decoder:
+            self.assertEqual([], decoder.decode(self.qrcode))
+            self.assertEqual(
+                [b'Foramenifera', b'Rana temporaria'],
+                [d.data for d in decoder.decode(self.code128)]
+            )
+
+    def test_too_large(self):
+        with SharedMemoryDecoder(10, workers=1) as decoder:
+            for image in (self.code128, np.asarray(self.code128, 'float32')):
+                self.assertRaisesRegex(
+                    PyZbarError, 'does not fit in a slot of 10 bytes',
+                    decoder.decode, image
+                )
+            # The slot is still usable
+            self.assertEqual([], decoder.decode((b'\0' * 9, 3, 3)))
+
+    def test_stopped_early(self):
+        "Images in flight when iteration stops are waited for"
+        decoder = SharedMemoryDecoder(self.slot_size, slots=4, workers=2)
+        with decoder:
+            results = decoder.decode_iter([self.code128] * 4)
+            next(results)
+            results.close()
+            self.assertEqual(4, len(decoder._free))
+            self.assertEqual(
+                [b'Thalassiodracon'],
+                [d.data for d in decoder.decode(self.qrcode)]
+            )
+
+    def test_close(self):
+        decoder = SharedMemoryDecoder(self.slot_size, slots=1, workers=1)
+        name = decoder._blocks[0].name
+        decoder.close()
+        self.assertRaises(FileNotFoundError, SharedMemory, name=name)
+        self.assertRaisesRegex(
+            PyZbarError, 'Decoder is closed', decoder.decode, self.code128
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,491 @@
+"""Long-running checks for leaks of memory.
+
+Each input path and API decodes a stream of synthetic images while the
+resident set size of the process and the memory traced by `tracemalloc` are
+sampled, and the `zbar` images, scanners and references to symbol sets that are
+created and not yet destroyed are counted. A test fails if any `zbar` object
+is leaked in the process, if the resident set size grows by more than a few
+bytes per image once the process has warmed up, or if the traced memory grows
+steadily. Python objects retained by caches show up in the traced memory.
+
+The tests take several minutes and are skipped unless the environment variable
+PYZBAR_SOAK is set. Each test decodes `DEFAULT_ITERATIONS` images, or as many
+as the value of PYZBAR_SOAK if it is a number greater than 1; longer runs
+detect slower leaks::
+
+    PYZBAR_SOAK=1 python -m pytest pyzbar/tests/test_soak.py
+    PYZBAR_SOAK=200000 python -m pytest pyzbar/tests/test_soak.py
+"""
+import gc
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from threading import Lock, Thread
+
+try:
+    from unittest.mock import patch
+except ImportError:
+    # Python 2
+    from mock import patch
+
+try:
+    from urllib.request import urlopen
+except ImportError:
+    # Python 2
+    from urllib2 import urlopen
+
+try:
+    import tracemalloc
+except ImportError:
+    # Python 2
+    tracemalloc = None
+
+import numpy as np
+
+from PIL import Image
+
+from pyzbar import pyzbar, scanners
+from pyzbar.batch import iter_decode
+from pyzbar.buffers import BufferPool
+from pyzbar.cascade import decode_cascade
+from pyzbar.hotregions import HotRegionDecoder
+from pyzbar.pages import iter_decode_pages
+from pyzbar.parallel import decode_parallel
+from pyzbar.prefetch import iter_decode_prefetched
+from pyzbar.pyzbar import RETAIN_AVAILABLE, ZBarSymbol, decode
+from pyzbar.scanners import ScannerPool
+from pyzbar.shared import SharedMemory, SharedMemoryDecoder
+from pyzbar.stack import decode_stack
+from pyzbar.tracking import TrackingDecoder
+from pyzbar.windows import RawImage, decode_windowed
+
+
+TESTDATA = Path(__file__).parent
+
+SOAK = os.environ.get('PYZBAR_SOAK')
+
+# Images decoded by each test unless PYZBAR_SOAK gives a larger number; the
+# tests take about five minutes in all
+DEFAULT_ITERATIONS = 1000
+
+ITERATIONS = (
+    int(SOAK) if SOAK and SOAK.isdigit() and 1 < int(SOAK)
+    else DEFAULT_ITERATIONS
+)
+
+# Number of times memory is measured during each test
+SAMPLES = 20
+
+# The greatest growth of the resident set size allowed over the measured part
+# of a test is RSS_PER_IMAGE bytes for each image decoded, plus RSS_NOISE for
+# the allocator. Each zbar image that is leaked, with its symbol set, costs
+# from about 12 bytes, so runs of 200000 images or more detect the smallest
+# leaks.
+RSS_PER_IMAGE = 4
+RSS_NOISE = 512 * 1024
+TRACED_BUDGET = 512 * 1024
+
+# Functions that create or destroy zbar objects, the modules that call them and
+# the kind of object whose count of live objects they change, by how much
+_ZBAR_FUNCTIONS = (
+    (pyzbar, 'zbar_image_create', 'image', 1),
+    (pyzbar, 'zbar_image_convert', 'image', 1),
+    (pyzbar, 'zbar_image_destroy', 'image', -1),
+    (pyzbar, 'zbar_image_scanner_create', 'scanner', 1),
+    (pyzbar, 'zbar_image_scanner_destroy', 'scanner', -1),
+    (scanners, 'zbar_image_scanner_create', 'scanner', 1),
+    (scanners, 'zbar_image_scanner_destroy', 'scanner', -1),
+)
+
+
+def _rss():
+    """The resident set size of this process in bytes, or `None` if it cannot
+    be measured.
+    """
+    try:
+        import psutil
+    except ImportError:
+        pass
+    else:
+        return psutil.Process().memory_info().rss
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (AttributeError, IOError, OSError, ValueError):
+        return None
+
+
+def _traced():
+    return tracemalloc.get_traced_memory()[0] if tracemalloc else None
+
+
+def _growth(values):
+    """The increase across `values` of the least-squares line through them,
+    which is insensitive to the noise of individual measurements.
+    """
+    n = len(values)
+    mean_x = (n - 1) / 2.0
+    mean_y = float(sum(values)) / n
+    slope = sum(
+        (x - mean_x) * (y - mean_y) for x, y in enumerate(values)
+    ) / sum((x - mean_x) ** 2 for x in range(n))
+    return slope * (n - 1)
+
+
+@contextmanager
+def _count_zbar_objects():
+    """A context manager that counts the `zbar` objects created and not yet
+    destroyed in this process by the functions in `_ZBAR_FUNCTIONS`, and
+    references taken to symbol sets and not yet dropped.
+
+    Yields:
+        Counter: live objects by kind - 'image', 'scanner' and 'symbol_set'
+    """
+    live = Counter()
+    lock = Lock()
+
+    # Objects left by earlier code are not counted when they are destroyed
+    gc.collect()
+
+    def counted(function, kind, change):
+        def call(*args):
+            result = function(*args)
+            with lock:
+                live[kind] += change
+            return result
+        return call
+
+    def symbol_set_ref(symbol_set, refs, function=pyzbar.zbar_symbol_set_ref):
+        function(symbol_set, refs)
+        with lock:
+            live['symbol_set'] += refs
+
+    patches = [
+        patch.object(
+            module, name, counted(getattr(module, name), kind, change)
+        )
+        for module, name, kind, change in _ZBAR_FUNCTIONS
+    ]
+    patches.append(patch.object(pyzbar, 'zbar_symbol_set_ref', symbol_set_ref))
+    for p in patches:
+        p.start()
+    try:
+        yield live
+    finally:
+        for p in reversed(patches):
+            p.stop()
+
+
+def _synthetic_images(count=16):
+    """Greyscale images that contain a QR code at different positions on a
+    noisy background, and blank images.
+    """
+    qrcode = np.asarray(
+        Image.open(str(TESTDATA.joinpath('qrcode.png'))).convert('L')
+    )
+    rng = np.random.RandomState(0)
+    images = []
+    for index in range(count):
+        image = rng.randint(200, 256, (240, 240)).astype('uint8')
+        if index % 4:
+            top, left = (index * 7) % 40, (index * 13) % 40
+            image[top:top + 200, left:left + 200] = qrcode
+        images.append(image)
+    return images
+
+
+@unittest.skipUnless(SOAK, 'Set PYZBAR_SOAK to run soak tests')
+class TestSoak(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.images = _synthetic_images()
+        cls.pil_images = [Image.fromarray(image) for image in cls.images]
+        cls.buffers = [
+            (image.tobytes(), image.shape[1], image.shape[0])
+            for image in cls.images
+        ]
+
+        # The images as files, and tiled into one raw image of 4 x 4 of them
+        cls.tempdir = Path(tempfile.mkdtemp())
+        cls.paths = []
+        for index, image in enumerate(cls.pil_images):
+            path = cls.tempdir.joinpath('{0}.png'.format(index))
+            image.save(str(path))
+            cls.paths.append(path)
+        mosaic = np.vstack([
+            np.hstack(cls.images[row:row + 4]) for row in range(0, 16, 4)
+        ])
+        raw = cls.tempdir.joinpath('mosaic.raw')
+        raw.write_bytes(mosaic.tobytes())
+        cls.raw = RawImage(str(raw), mosaic.shape[1], mosaic.shape[0])
+
+        if tracemalloc:
+            tracemalloc.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        if tracemalloc:
+            tracemalloc.stop()
+        shutil.rmtree(str(cls.tempdir))
+        cls.images = cls.pil_images = cls.buffers = cls.paths = None
+
+    def _soak(self, step, images_per_step=1):
+        """Calls `step(i)` until ITERATIONS images have been decoded and fails
+        if `zbar` objects were leaked or if memory grew after the first of
+        SAMPLES intervals.
+        """
+        steps = max(SAMPLES, ITERATIONS // images_per_step)
+        interval = steps // SAMPLES
+        rss, traced, live = [], [], []
+        snapshot = None
+        with _count_zbar_objects() as counts:
+            for sample in range(SAMPLES):
+                for i in range(sample * interval, (sample + 1) * interval):
+                    step(i)
+                gc.collect()
+                live.append(dict((k, v) for k, v in counts.items() if v))
+                if sample:
+                    rss.append(_rss())
+                    traced.append(_traced())
+                elif tracemalloc:
+                    # The first interval warms up caches and pools
+                    snapshot = tracemalloc.take_snapshot()
+
+        # Pools may keep the scanners created while warming up, but the number
+        # of live objects must not change after that
+        self.assertEqual(
+            [live[0]] * len(live), live,
+            'Live zbar objects after each interval: {0}'.format(live)
+        )
+        if None not in rss:
+            growth = _growth(rss)
+            images = (len(rss) - 1) * interval * images_per_step
+            self.assertLess(
+                growth, RSS_NOISE + RSS_PER_IMAGE * images,
+                'Resident set size grew by {0} bytes over {1} images: '
+                '{2}'.format(int(growth), images, rss)
+            )
+        if tracemalloc:
+            growth = _growth(traced)
+            if growth >= TRACED_BUDGET:
+                top = tracemalloc.take_snapshot().compare_to(
+                    snapshot, 'lineno'
+                )[:10]
+                self.fail(
+                    'Traced memory grew by {0} bytes:\n{1}'.format(
+                        int(growth), '\n'.join(str(stat) for stat in top)
+                    )
+                )
+
+    def _image(self, i):
+        return self.images[i % len(self.images)]
+
+    def test_decode_numpy(self):
+        "numpy arrays"
+        self._soak(lambda i: decode(self._image(i)))
+
+    def test_decode_pil(self):
+        "PIL images"
+        images = self.pil_images
+        self._soak(lambda i: decode(images[i % len(images)]))
+
+    def test_decode_bytes(self):
+        "Tuples of (pixels, width, height)"
+        self._soak(lambda i: decode(self.buffers[i % len(self.buffers)]))
+
+    def test_decode_frame_formats(self):
+        "Planar and packed YUV frames"
+        frames = []
+        for image in self.images[:4]:
+            height, width = image.shape
+            chroma = np.full((height // 2, width), 128, dtype='uint8')
+            planar = np.vstack([image, chroma]).tobytes()
+            frames.append(('NV12', (planar, width, height)))
+            packed = np.full((height, width * 2), 128, dtype='uint8')
+            packed[:, ::2] = image
+            frames.append(('YUYV', (packed.tobytes(), width, height)))
+
+        def step(i):
+            format, frame = frames[i % len(frames)]
+            decode(frame, format=format)
+
+        self._soak(step)
+
+    def test_decode_buffer_pool(self):
+        "Conversion into pooled buffers"
+        pool = BufferPool()
+        colour = [np.dstack([image] * 3) for image in self.images]
+        self._soak(
+            lambda i: decode(colour[i % len(colour)], buffer_pool=pool)
+        )
+
+    def test_decode_symbols(self):
+        "Scanners configured for symbol types"
+        symbols = [ZBarSymbol.QRCODE]
+        self._soak(lambda i: decode(self._image(i), symbols=symbols))
+
+    def test_scanner_pool(self):
+        "Scanners reused from a pool"
+        with ScannerPool() as pool:
+            self._soak(lambda i: pool.decode(self._image(i)))
+
+    def test_pages(self):
+        "Sequences of pages, read ahead"
+        def step(i):
+            for _ in iter_decode_pages(self.images, read_ahead=2):
+                pass
+
+        self._soak(step, images_per_step=len(self.images))
+
+    def test_iter_decode(self):
+        "Batches decoded by threads"
+        def step(i):
+            for _ in iter_decode(self.images, workers=2):
+                pass
+
+        self._soak(step, images_per_step=len(self.images))
+
+    def test_iter_decode_processes(self):
+        "Batches decoded by worker processes"
+        def step(i):
+            for _ in iter_decode(self.images, workers=2, processes=True):
+                pass
+
+        self._soak(step, images_per_step=len(self.images))
+
+    def test_prefetched(self):
+        "Files loaded and decoded by separate pools of threads"
+        def step(i):
+            for _ in iter_decode_prefetched(self.paths, loaders=2, decoders=2):
+                pass
+
+        self._soak(step, images_per_step=len(self.paths))
+
+    @unittest.skipUnless(SharedMemory, 'Shared memory requires Python 3.8')
+    def test_shared_memory(self):
+        "Images passed to worker processes through shared memory"
+        slot_size = max(image.size for image in self.images)
+        with SharedMemoryDecoder(slot_size, workers=2) as decoder:
+            def step(i):
+                for _ in decoder.decode_iter(self.images):
+                    pass
+
+            self._soak(step, images_per_step=len(self.images))
+
+    @unittest.skipUnless(RETAIN_AVAILABLE, 'retain requires Python 3')
+    def test_retain(self):
+        "Retained symbol sets whose payloads are read and released"
+        def step(i):
+            with decode(self._image(i), retain=True) as symbols:
+                [bytes(d.data) for d in symbols]
+
+        self._soak(step)
+
+    def test_stack(self):
+        "Stacks of frames"
+        frames = np.stack(self.images)
+        self._soak(
+            lambda i: decode_stack(frames, workers=2),
+            images_per_step=len(self.images)
+        )
+
+    def test_windowed(self):
+        "Windows read from a memory-mapped raw image"
+        self._soak(
+            lambda i: decode_windowed(self.raw, window=480, overlap=240),
+            images_per_step=len(self.images)
+        )
+
+    @unittest.skipIf(sys.version_info < (3,), 'The server requires Python 3')
+    def test_server(self):
+        "Raw pixels posted to the HTTP service"
+        from pyzbar.server import DecodeService, make_server
+
+        service = DecodeService(workers=2)
+        server = make_server(service, quiet=True)
+        thread = Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        url = 'http://{0}:{1}/decode?width={{0}}&height={{1}}'.format(
+            *server.server_address[:2]
+        )
+        try:
+            def step(i):
+                pixels, width, height = self.buffers[i % len(self.buffers)]
+                urlopen(url.format(width, height), pixels).close()
+
+            self._soak(step)
+        finally:
+            server.shutdown()
+            server.server_close()
+            service.close()
+
+    def test_cascade(self):
+        "Preprocessing strategies"
+        self._soak(lambda i: decode_cascade(self._image(i)))
+
+    def test_parallel(self):
+        "Groups of symbol types decoded concurrently"
+        self._soak(lambda i: decode_parallel(self._image(i)))
+
+    def test_tracking(self):
+        "Frames decoded around tracked barcodes"
+        with TrackingDecoder() as decoder:
+            self._soak(lambda i: decoder.decode(self._image(i)))
+
+    def test_hot_regions(self):
+        "Batches decoded around learned regions"
+        with HotRegionDecoder() as decoder:
+            self._soak(lambda i: decoder.decode(self._image(i)))
+
+
+class TestCountZbarObjects(unittest.TestCase):
+    def test_balanced(self):
+        "Objects created and destroyed by a decode are not live"
+        image = np.asarray(
+            Image.open(str(TESTDATA.joinpath('code128.png'))).convert('L')
+        )
+        packed = np.full(
+            (image.shape[0], image.shape[1] * 2), 128, dtype='uint8'
+        )
+        packed[:, ::2] = image
+        frame = (packed.tobytes(), image.shape[1], image.shape[0])
+        with _count_zbar_objects() as live:
+            decode(image)
+            self.assertEqual(2, len(decode(frame, format='YUYV')))
+        self.assertEqual(Counter(image=0, scanner=0), live)
+
+    @unittest.skipUnless(RETAIN_AVAILABLE, 'retain requires Python 3')
+    def test_live(self):
+        "Objects that have not been destroyed are live"
+        image = Image.open(str(TESTDATA.joinpath('code128.png')))
+        with _count_zbar_objects() as live:
+            with ScannerPool() as pool:
+                symbols = pool.decode(image, retain=True)
+                self.assertEqual(1, live['scanner'])
+                self.assertEqual(1, live['symbol_set'])
+                symbols.release()
+                del symbols
+                gc.collect()
+                self.assertEqual(0, live['symbol_set'])
+            self.assertEqual(0, live['scanner'])
+
+
+class TestGrowth(unittest.TestCase):
+    def test_steady_growth(self):
+        "Steady growth is measured across the samples"
+        self.assertAlmostEqual(900.0, _growth(list(range(0, 1000, 100))))
+
+    def test_noise(self):
+        "Noise without a trend is not growth"
+        self.assertLess(abs(_growth([100, 900, 100, 900, 100, 900])), 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
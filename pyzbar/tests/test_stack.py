@@ -0,0 +1,96 @@
+import unittest
+
+from pathlib import Path
+
+try:
+    from unittest.mock import patch
+except ImportError:
+    # Python 2
+    from mock import patch
+
+import numpy as np
+
+from PIL import Image
+
+from pyzbar import stack
+from pyzbar.buffers import BufferPool
+from pyzbar.pyzbar import decode
+from pyzbar.pyzbar_error import PyZbarError
+from pyzbar.stack import decode_stack
+
+
+TESTDATA = Path(__file__).parent
+
+
+class TestDecodeStack(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        qrcode = Image.open(str(TESTDATA.joinpath('qrcode.png')))
+        empty = Image.open(str(TESTDATA.joinpath('empty.png'))).resize(
+            qrcode.size
+        )
+        frames = [np.asarray(i.convert('RGB')) for i in (qrcode, empty)]
+        cls.rgb = np.stack(frames * 3)
+        cls.grey = np.ascontiguousarray(cls.rgb[..., 0])
+        cls.expected = [decode(frame) for frame in cls.grey]
+
+        # assertRaisesRegexp was a deprecated alias removed in Python 3.11
+        if not hasattr(cls, 'assertRaisesRegex'):
+            cls.assertRaisesRegex = cls.assertRaisesRegexp
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.rgb = cls.grey = cls.expected = None
+
+    def test_grey(self):
+        "Each frame of a greyscale stack is decoded in place"
+        self.assertEqual(b'Thalassiodracon', self.expected[0][0].data)
+        self.assertEqual([], self.expected[1])
+        with patch.object(stack, '_scan', wraps=stack._scan) as scan:
+            self.assertEqual(self.expected, decode_stack(self.grey))
+        addresses = [c[0][1].ctypes.data for c in scan.call_args_list]
+        frame_size = self.grey[0].nbytes
+        self.assertEqual(
+            [self.grey.ctypes.data + i * frame_size for i in range(6)],
+            addresses
+        )
+
+    def test_channels(self):
+        "The first channel of frames with channels is decoded"
+        self.assertEqual(self.expected, decode_stack(self.rgb))
+
+    def test_conversion(self):
+        "Frames that are not uint8 are converted into a pooled buffer"
+        pool = BufferPool()
+        frames = self.grey.astype('float32')
+        self.assertEqual(
+            self.expected, decode_stack(frames, buffer_pool=pool)
+        )
+        self.assertEqual(1, pool.stats().returned)
+
+    def test_workers(self):
+        "Frames are divided between workers"
+        for workers in (2, 4, 10):
+            self.assertEqual(
+                self.expected, decode_stack(self.grey, workers=workers)
+            )
+
+    def test_error(self):
+        "Errors raised by workers are raised"
+        with patch.object(stack, '_scan', side_effect=PyZbarError('Failed')):
+            self.assertRaisesRegex(
+                PyZbarError, 'Failed', decode_stack, self.grey, workers=2
+            )
+
+    def test_shape(self):
+        "Stacks must have three or four dimensions"
+        self.assertRaisesRegex(
+            ValueError,
+            r'frames must have shape \(N, H, W\) or \(N, H, W, C\), not '
+            r'\(200, 200\)',
+            decode_stack, self.grey[0]
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
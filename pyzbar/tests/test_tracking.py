@@ -0,0 +1,124 @@
+import unittest
+
+from pathlib import Path
+
+import numpy as np
+
+from PIL import Image
+
+from pyzbar.pyzbar import decode
+from pyzbar.tracking import TrackingDecoder
+
+
+TESTDATA = Path(__file__).parent
+
+
+class TestTrackingDecoder(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.qrcode, cls.qrcode_rotated = (
+            np.asarray(Image.open(str(TESTDATA.joinpath(fname))).convert('L'))
+            for fname in ('qrcode.png', 'qrcode_rotated.png')
+        )
+
+        # assertRaisesRegexp was a deprecated alias removed in Python 3.11
+        if not hasattr(cls, 'assertRaisesRegex'):
+            cls.assertRaisesRegex = cls.assertRaisesRegexp
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.qrcode = cls.qrcode_rotated = None
+
+    def frame(self, left, top):
+        "A 800 x 600 frame with qrcode.png pasted at (left, top)"
+        frame = np.full((600, 800), 255, dtype='uint8')
+        frame[top:top + 200, left:left + 200] = self.qrcode
+        return frame
+
+    def test_moving(self):
+        "Results of region scans are in the coordinates of the full frame"
+        with TrackingDecoder(full_scan_interval=5) as tracker:
+            for index in range(12):
+                frame = self.frame(100 + 15 * index, 50 + 10 * index)
+                self.assertEqual(decode(frame), tracker.decode(frame))
+        self.assertEqual(12, tracker.stats.frames)
+        # Frames 0, 6: nothing tracked / periodic full scan after five
+        # region-scanned frames
+        self.assertEqual(2, tracker.stats.full_scans)
+        self.assertEqual(10, tracker.stats.region_scans)
+        self.assertEqual(10, tracker.stats.region_hits)
+        self.assertEqual(0, tracker.stats.lost)
+
+    def test_lost(self):
+        "The whole frame is scanned when a tracked barcode is lost"
+        with TrackingDecoder() as tracker:
+            tracker.decode(self.frame(0, 0))
+            frame = self.frame(600, 400)
+            self.assertEqual(decode(frame), tracker.decode(frame))
+        self.assertEqual(1, tracker.stats.lost)
+        self.assertEqual(2, tracker.stats.full_scans)
+
+    def test_nothing_tracked(self):
+        with TrackingDecoder() as tracker:
+            blank = np.full((600, 800), 255, dtype='uint8')
+            self.assertEqual([], tracker.decode(blank))
+            self.assertEqual([], tracker.decode(blank))
+        self.assertEqual(2, tracker.stats.full_scans)
+        self.assertEqual(0, tracker.stats.region_scans)
+
+    def test_same_data(self):
+        "Two barcodes with the same data are tracked separately"
+        expected = decode(self.qrcode_rotated)
+        with TrackingDecoder() as tracker:
+            for _ in range(3):
+                self.assertEqual(
+                    sorted(expected), sorted(tracker.decode(self.qrcode_rotated))
+                )
+        self.assertEqual(1, tracker.stats.full_scans)
+        self.assertEqual(4, tracker.stats.region_hits)
+
+    def test_expected_regions(self):
+        "Tracked regions are not scanned once the expected barcodes are found"
+        with TrackingDecoder(expected=1) as tracker:
+            self.assertEqual(2, len(tracker.decode(self.qrcode_rotated)))
+            for _ in range(2):
+                self.assertEqual(1, len(tracker.decode(self.qrcode_rotated)))
+        self.assertEqual(1, tracker.stats.full_scans)
+        self.assertEqual(2, tracker.stats.region_scans)
+        self.assertEqual(2, tracker.stats.regions_skipped)
+
+    def test_expected_full_scans(self):
+        "Periodic full scans are skipped while the expected barcodes are found"
+        with TrackingDecoder(full_scan_interval=2, expected=1) as tracker:
+            for index in range(6):
+                frame = self.frame(100 + 15 * index, 50 + 10 * index)
+                self.assertEqual(decode(frame), tracker.decode(frame))
+        self.assertEqual(1, tracker.stats.full_scans)
+        self.assertEqual(5, tracker.stats.region_scans)
+        self.assertEqual(3, tracker.stats.full_scans_skipped)
+
+    def test_expected_full_scan_when_lost(self):
+        "A due full scan is made if the expected barcodes are not found"
+        with TrackingDecoder(full_scan_interval=1, expected=1) as tracker:
+            tracker.decode(self.frame(0, 0))
+            frame = self.frame(600, 400)
+            self.assertEqual(decode(frame), tracker.decode(frame))
+        self.assertEqual(2, tracker.stats.full_scans)
+        self.assertEqual(0, tracker.stats.full_scans_skipped)
+
+    def test_invalid_expected(self):
+        self.assertRaisesRegex(
+            ValueError, 'expected must be at least 1', TrackingDecoder,
+            expected=0
+        )
+
+    def test_reset(self):
+        with TrackingDecoder() as tracker:
+            tracker.decode(self.frame(0, 0))
+            tracker.reset()
+            tracker.decode(self.frame(0, 0))
+        self.assertEqual(2, tracker.stats.full_scans)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,159 @@
+import sys
+import time
+import unittest
+
+from pathlib import Path
+
+try:
+    from unittest.mock import patch
+except ImportError:
+    # Python 2
+    from mock import patch
+
+import numpy as np
+
+from PIL import Image
+
+from pyzbar import pyzbar
+from pyzbar.buffers import BufferPool
+from pyzbar.video import VideoPipeline, _grey
+
+
+TESTDATA = Path(__file__).parent
+
+
+class FakeCapture(object):
+    "Stands in for cv2.VideoCapture"
+    def __init__(self, frames, interval=0):
+        self.frames = list(frames)
+        self.interval = interval
+
+    def read(self):
+        time.sleep(self.interval)
+        if self.frames:
+            frame = self.frames.pop(0)
+            if isinstance(frame, Exception):
+                raise frame
+            return True, frame
+        else:
+            return False, None
+
+
+class FakeCv2(object):
+    "Stands in for OpenCV, allocating a new array rather than using dst"
+    COLOR_BGR2GRAY = 6
+
+    @staticmethod
+    def cvtColor(frame, code, dst=None):
+        return np.ascontiguousarray(frame[:, :, 0])
+
+
+def slow_scan(scanner, pixels, width, height):
+    time.sleep(0.02)
+    return pyzbar._scan(scanner, pixels, width, height)
+
+
+class TestVideoPipeline(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        grey = np.asarray(
+            Image.open(str(TESTDATA.joinpath('qrcode.png'))).convert('L')
+        )
+        # A three-channel frame, as returned by OpenCV
+        cls.frame = np.dstack([grey] * 3)
+
+        # assertRaisesRegexp was a deprecated alias removed in Python 3.11
+        if not hasattr(cls, 'assertRaisesRegex'):
+            cls.assertRaisesRegex = cls.assertRaisesRegexp
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.frame = None
+
+    def test_decode(self):
+        "Every frame is decoded when decoding keeps up"
+        pool = BufferPool()
+        source = FakeCapture([self.frame] * 5, interval=0.01)
+        with VideoPipeline(source, workers=2, buffer_pool=pool) as pipeline:
+            res = list(pipeline)
+        self.assertEqual(list(range(5)), sorted(r.index for r in res))
+        for r in res:
+            self.assertEqual([b'Thalassiodracon'], [d.data for d in r.results])
+            self.assertIsNone(r.error)
+            self.assertLess(0, r.latency)
+
+        stats = pipeline.stats
+        self.assertEqual(5, stats.captured)
+        self.assertEqual(5, stats.decoded)
+        self.assertEqual(0, stats.dropped)
+        self.assertLess(0, stats.fps)
+        self.assertLess(0, stats.mean_latency)
+        self.assertLessEqual(stats.mean_latency, stats.latency_max)
+
+    @patch('pyzbar.video._scan', side_effect=slow_scan)
+    def test_latest_frame_wins(self, _scan):
+        "Older frames are dropped when decoding falls behind"
+        source = FakeCapture([self.frame] * 30)
+        with VideoPipeline(source, workers=1) as pipeline:
+            res = list(pipeline)
+        stats = pipeline.stats
+        self.assertEqual(30, stats.captured)
+        self.assertLess(0, stats.dropped)
+        self.assertEqual(30, stats.decoded + stats.dropped)
+        self.assertEqual(stats.dropped / 30.0, stats.drop_rate)
+        # The last frame is always decoded
+        self.assertEqual(29, res[-1].index)
+
+    @patch('pyzbar.video._scan', side_effect=slow_scan)
+    def test_drop_newest(self, _scan):
+        source = FakeCapture([self.frame] * 30)
+        with VideoPipeline(
+                source, workers=1, max_pending=4, drop='newest') as pipeline:
+            res = list(pipeline)
+        self.assertLess(0, pipeline.stats.dropped)
+        # The first frames are decoded
+        self.assertEqual([0, 1, 2, 3], [r.index for r in res[:4]])
+
+    def test_stop(self):
+        "Stopping discards waiting frames and ends the results"
+        source = FakeCapture([self.frame] * 1000, interval=0.001)
+        pipeline = VideoPipeline(source, workers=1).start()
+        time.sleep(0.05)
+        pipeline.stop()
+        res = list(pipeline)
+        stats = pipeline.stats
+        self.assertEqual(len(res), stats.decoded)
+        self.assertEqual(stats.captured, stats.decoded + stats.dropped)
+
+    def test_read_error(self):
+        "An error reading the source ends the results and is raised"
+        error = IOError('Camera disconnected')
+        source = FakeCapture([self.frame] * 3)
+        source.frames.append(error)
+        pipeline = VideoPipeline(source, workers=2).start()
+        res = []
+        with self.assertRaises(IOError) as cm:
+            for r in pipeline:
+                res.append(r)
+        pipeline.stop()
+        self.assertIs(error, cm.exception)
+        self.assertEqual(3, len(res) + pipeline.stats.dropped)
+        self.assertEqual(3, pipeline.stats.captured)
+
+    def test_grey_new_array(self):
+        "A buffer that OpenCV did not write into is returned to the pool"
+        pool = BufferPool()
+        with patch.dict(sys.modules, {'cv2': FakeCv2}):
+            pixels, width, height = _grey(self.frame, pool)
+        self.assertEqual(self.frame.shape[:2], (height, width))
+        self.assertEqual(1, pool.stats().returned)
+
+    def test_invalid_drop(self):
+        self.assertRaisesRegex(
+            ValueError, "drop must be either 'oldest' or 'newest'",
+            VideoPipeline, FakeCapture([]), drop='middle'
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,196 @@
+import shutil
+import tempfile
+import unittest
+
+from pathlib import Path
+
+import numpy as np
+
+from PIL import Image
+
+try:
+    import tifffile
+except ImportError:
+    tifffile = None
+
+from pyzbar.pyzbar import decode
+from pyzbar.windows import (
+    RawImage, WindowStats, _MappedTiles, _positions, _TiffSegments,
+    decode_windowed, open_windowed
+)
+
+
+TESTDATA = Path(__file__).parent
+
+
+class TestWindows(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        qrcode = np.asarray(
+            Image.open(str(TESTDATA.joinpath('qrcode.png'))).convert('L')
+        )
+        # QR codes at the corners and straddling the boundaries of windows
+        cls.image = np.full((1100, 1300), 255, dtype='uint8')
+        for top, left in ((0, 0), (200, 250), (880, 1090), (450, 700)):
+            cls.image[top:top + 200, left:left + 200] = qrcode
+        cls.expected = sorted(decode(cls.image), key=lambda d: d.rect)
+        cls.tempdir = Path(tempfile.mkdtemp())
+
+        # assertRaisesRegexp was a deprecated alias removed in Python 3.11
+        if not hasattr(cls, 'assertRaisesRegex'):
+            cls.assertRaisesRegex = cls.assertRaisesRegexp
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(str(cls.tempdir))
+        cls.image = cls.expected = None
+
+    def _decode(self, source):
+        return sorted(
+            decode_windowed(source, window=320, overlap=210),
+            key=lambda d: d.rect
+        )
+
+    def _check_decode(self, source):
+        """Windows find the same barcodes, at the same locations to within a
+        few pixels, as the full image.
+        """
+        decoded = self._decode(source)
+        self.assertEqual(
+            [(d.type, d.data) for d in self.expected],
+            [(d.type, d.data) for d in decoded]
+        )
+        for expected, actual in zip(self.expected, decoded):
+            for a, b in zip(expected.rect, actual.rect):
+                self.assertLessEqual(abs(a - b), 3)
+
+    def _check_reader(self, source, reader_type):
+        reader = open_windowed(source)
+        try:
+            self.assertIsInstance(reader, reader_type)
+            window = reader.read(1000, 700, 300, 400)
+            self.assertEqual(
+                self.image[700:1100, 1000:1300].tobytes(), bytes(window)
+            )
+        finally:
+            reader.close()
+
+    def test_positions(self):
+        "Windows cover the length and overlap"
+        self.assertEqual([0], _positions(100, 320, 210))
+        self.assertEqual([0, 110, 220, 330, 380], _positions(700, 320, 210))
+        self.assertEqual([0, 100], _positions(200, 100, 0))
+
+    def test_in_memory(self):
+        "Results are in the coordinates of the full image"
+        self.assertEqual(4, len(self.expected))
+        self._check_decode(self.image)
+
+    def test_pgm(self):
+        "PGMs are memory-mapped"
+        path = self.tempdir.joinpath('image.pgm')
+        Image.fromarray(self.image).save(str(path))
+        self._check_reader(path, _MappedTiles)
+        self._check_decode(path)
+
+    def test_raw(self):
+        "Raw files are memory-mapped"
+        path = self.tempdir.joinpath('image.raw')
+        with path.open('wb') as f:
+            f.write(b'header')
+            f.write(self.image.tobytes())
+        raw = RawImage(str(path), 1300, 1100, offset=6)
+        self._check_reader(raw, _MappedTiles)
+        self._check_decode(raw)
+
+    def test_uncompressed_tiff(self):
+        "Uncompressed TIFFs are memory-mapped"
+        path = self.tempdir.joinpath('image.tif')
+        Image.fromarray(self.image).save(str(path))
+        self._check_reader(path, _MappedTiles)
+        self._check_decode(path)
+
+    def test_bottom_up(self):
+        "Tiles stored from the bottom are read the right way up"
+        path = self.tempdir.joinpath('image.raw')
+        with path.open('wb') as f:
+            f.write(self.image[::-1].tobytes())
+        reader = _MappedTiles(
+            str(path), 1300, 1100, [(0, 0, 1300, 1100, 0, 1300, -1)]
+        )
+        try:
+            self.assertEqual(
+                self.image[100:150, 200:260].tobytes(),
+                reader.read(200, 100, 60, 50)
+            )
+        finally:
+            reader.close()
+
+    @unittest.skipIf(tifffile is None, 'tifffile not installed')
+    def test_tiled_tiff(self):
+        "Uncompressed tiled TIFFs are memory-mapped"
+        path = self.tempdir.joinpath('tiled.tif')
+        tifffile.imwrite(str(path), self.image, tile=(256, 256))
+        self._check_reader(path, _MappedTiles)
+        self._check_decode(path)
+
+    @unittest.skipIf(tifffile is None, 'tifffile not installed')
+    def test_compressed_tiff(self):
+        "Compressed TIFFs are read by tile or strip"
+        for name, layout in (
+                ('tiled.tif', {'tile': (256, 256)}),
+                ('striped.tif', {'rowsperstrip': 100})):
+            path = self.tempdir.joinpath(name)
+            tifffile.imwrite(
+                str(path), self.image, compression='zlib', **layout
+            )
+            self._check_reader(path, _TiffSegments)
+            self._check_decode(path)
+
+    def test_other_formats(self):
+        "Other images are loaded in full"
+        path = self.tempdir.joinpath('image.png')
+        Image.fromarray(self.image).save(str(path))
+        self._check_decode(path)
+
+    def test_expected(self):
+        "Windows are not read once the expected barcodes are found"
+        stats = WindowStats()
+        decoded = decode_windowed(
+            self.image, window=320, overlap=210, expected=1, stats=stats
+        )
+        self.assertEqual(1, len(decoded))
+        self.assertEqual(self.expected[0].data, decoded[0].data)
+        # The barcode at the top left is in the first window
+        self.assertEqual(1, stats.windows)
+        windows = (
+            len(_positions(1100, 320, 210)) * len(_positions(1300, 320, 210))
+        )
+        self.assertEqual(windows - 1, stats.skipped)
+
+        stats = WindowStats()
+        decode_windowed(
+            self.image, window=320, overlap=210, expected=5, stats=stats
+        )
+        self.assertEqual(0, stats.skipped)
+        self.assertEqual(
+            'WindowStats(images=1, windows={0}, skipped=0)'.format(
+                stats.windows
+            ),
+            repr(stats)
+        )
+
+    def test_invalid_overlap(self):
+        "The overlap must be less than the window"
+        self.assertRaisesRegex(
+            ValueError, 'overlap must be at least 0 and less than window',
+            decode_windowed, self.image, window=100, overlap=100
+        )
+        self.assertRaisesRegex(
+            ValueError, 'expected must be at least 1',
+            decode_windowed, self.image, expected=0
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,248 @@
+import csv
+import io
+import json
+import shutil
+import tempfile
+import unittest
+
+from pathlib import Path
+
+from PIL import Image
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+from pyzbar.batch import iter_decode
+from pyzbar.pyzbar import RETAIN_AVAILABLE, decode
+from pyzbar.scripts.read_zbar import main
+from pyzbar.writers import (
+    COLUMNS, CsvWriter, JsonLinesWriter, open_writer, read_rows
+)
+
+
+TESTDATA = Path(__file__).parent
+
+
+class TestWriters(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.code128 = Image.open(str(TESTDATA.joinpath('code128.png')))
+        cls.results = decode(cls.code128)
+
+        # assertRaisesRegexp was a deprecated alias removed in Python 3.11
+        if not hasattr(cls, 'assertRaisesRegex'):
+            cls.assertRaisesRegex = cls.assertRaisesRegexp
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.code128 = cls.results = None
+
+    def setUp(self):
+        self.tempdir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(str(self.tempdir))
+
+    def test_jsonl(self):
+        "Each barcode is written as a flattened JSON object"
+        out = io.StringIO()
+        with JsonLinesWriter(out) as writer:
+            writer.write('code128.png', self.results, page=2)
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+
+        self.assertEqual(2, len(rows))
+        self.assertEqual(
+            ['Foramenifera', 'Rana temporaria'], [r['data'] for r in rows]
+        )
+        first, decoded = rows[0], self.results[0]
+        self.assertEqual(list(COLUMNS), list(first))
+        self.assertEqual('code128.png', first['source'])
+        self.assertEqual(2, first['page'])
+        self.assertEqual('CODE128', first['type'])
+        self.assertEqual(
+            list(decoded.rect),
+            [
+                first['rect_left'], first['rect_top'], first['rect_width'],
+                first['rect_height']
+            ]
+        )
+        self.assertEqual(
+            [tuple(p) for p in decoded.polygon],
+            list(zip(first['polygon_x'], first['polygon_y']))
+        )
+
+    def test_csv(self):
+        "CSV has a header and space-separated polygon coordinates"
+        out = io.StringIO()
+        with CsvWriter(out, include_empty=True) as writer:
+            writer.write('code128.png', self.results)
+            writer.write('empty.png', [])
+        rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+
+        self.assertEqual(3, len(rows))
+        self.assertEqual('Rana temporaria', rows[1]['data'])
+        self.assertEqual(
+            ' '.join(str(p.x) for p in self.results[1].polygon),
+            rows[1]['polygon_x']
+        )
+        self.assertEqual('empty.png', rows[2]['source'])
+        self.assertEqual('', rows[2]['data'])
+
+    def test_text_round_trip(self):
+        "Text that is not ASCII is read back from JSON Lines and CSV files"
+        row = dict.fromkeys(COLUMNS)
+        row.update(
+            source=u'\u00e9t\u00e9.png', page=0, type='QRCODE',
+            data=u'\u03a9 \u00e9', data_base64='zqkgw6k=', polygon_x=[1, 2],
+            polygon_y=[3, 4]
+        )
+        for name in ('results.jsonl', 'results.csv'):
+            path = self.tempdir.joinpath(name)
+            with open_writer(path) as writer:
+                writer.write_rows([row])
+            self.assertEqual([row], list(read_rows(path)))
+
+    @unittest.skipUnless(RETAIN_AVAILABLE, 'retain requires Python 3')
+    def test_retained(self):
+        "Retained results are written as copied ones are"
+        expected, out = io.StringIO(), io.StringIO()
+        with JsonLinesWriter(expected) as writer:
+            writer.write('code128.png', self.results)
+        with decode(self.code128, retain=True) as retained:
+            with JsonLinesWriter(out) as writer:
+                writer.write('code128.png', retained)
+        self.assertEqual(expected.getvalue(), out.getvalue())
+
+    def test_chunks(self):
+        "Rows are written as each chunk is filled"
+        out = io.StringIO()
+        writer = JsonLinesWriter(out, chunk_size=3)
+        writer.write(0, self.results)
+        self.assertEqual('', out.getvalue())
+        writer.write(1, self.results)
+        self.assertEqual(3, len(out.getvalue().splitlines()))
+        self.assertEqual(3, writer.rows_written)
+        writer.close()
+        self.assertEqual(4, writer.rows_written)
+
+    def test_write_batch(self):
+        "Results from a batch are written as they are produced"
+        out = io.StringIO()
+        with JsonLinesWriter(out) as writer:
+            count = writer.write_batch(
+                iter_decode([self.code128] * 3, workers=2),
+                sources=['a.png', 'b.png', 'c.png']
+            )
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+
+        self.assertEqual(3, count)
+        self.assertEqual(
+            ['a.png', 'a.png', 'b.png', 'b.png', 'c.png', 'c.png'],
+            sorted(r['source'] for r in rows)
+        )
+
+    def test_open_writer(self):
+        "The format is chosen from the extension"
+        path = self.tempdir.joinpath('results.csv')
+        with open_writer(path) as writer:
+            self.assertIsInstance(writer, CsvWriter)
+        with open_writer(path, 'jsonl') as writer:
+            self.assertIsInstance(writer, JsonLinesWriter)
+        self.assertRaisesRegex(
+            ValueError, r'Could not choose a format for the extension \[.txt\]',
+            open_writer, self.tempdir.joinpath('results.txt')
+        )
+        self.assertRaisesRegex(
+            ValueError, r'Unknown format \[xml\]', open_writer, path, 'xml'
+        )
+
+    @unittest.skipIf(pyarrow is None, 'pyarrow not installed')
+    def test_parquet(self):
+        "Each chunk is a row group of the Parquet file"
+        import pyarrow.parquet as pq
+
+        path = self.tempdir.joinpath('results.parquet')
+        with open_writer(path, chunk_size=2) as writer:
+            for index in range(3):
+                writer.write(index, self.results)
+
+        parquet = pq.ParquetFile(str(path))
+        self.assertEqual(3, parquet.num_row_groups)
+        table = parquet.read()
+        self.assertEqual(list(COLUMNS), table.column_names)
+        self.assertEqual(
+            ['0', '0', '1', '1', '2', '2'], table.column('source').to_pylist()
+        )
+        self.assertEqual(
+            [p.x for p in self.results[0].polygon],
+            table.column('polygon_x')[0].as_py()
+        )
+
+    @unittest.skipIf(pyarrow is None, 'pyarrow not installed')
+    def test_arrow(self):
+        "Each chunk is a record batch of the Arrow file"
+        path = self.tempdir.joinpath('results.arrow')
+        with open_writer(path, chunk_size=2) as writer:
+            for index in range(2):
+                writer.write(index, self.results)
+
+        with pyarrow.OSFile(str(path)) as f:
+            reader = pyarrow.ipc.open_file(f)
+            self.assertEqual(2, reader.num_record_batches)
+            table = reader.read_all()
+        self.assertEqual(
+            ['Foramenifera', 'Rana temporaria'] * 2,
+            table.column('data').to_pylist()
+        )
+
+    @unittest.skipIf(pyarrow is None, 'pyarrow not installed')
+    def test_arrow_empty_rows(self):
+        "Rows without a barcode have null polygons in Arrow and Parquet"
+        for name in ('results.arrow', 'results.parquet'):
+            path = self.tempdir.joinpath(name)
+            with open_writer(path, include_empty=True) as writer:
+                writer.write('a.png', self.results)
+                writer.write('b.png', [])
+                writer.write('c.png', self.results[:1])
+            rows = list(read_rows(path))
+
+            self.assertEqual(
+                ['a.png', 'a.png', 'b.png', 'c.png'],
+                [r['source'] for r in rows]
+            )
+            expected = [
+                [p.x for p in decoded.polygon] for decoded in self.results
+            ]
+            self.assertEqual(
+                [expected[0], expected[1], None, expected[0]],
+                [r['polygon_x'] for r in rows]
+            )
+            self.assertEqual(
+                [p.y for p in self.results[0].polygon], rows[3]['polygon_y']
+            )
+            self.assertIsNone(rows[2]['polygon_y'])
+
+    def test_read_zbar_output(self):
+        "read_zbar writes results to a file"
+        path = self.tempdir.joinpath('results.jsonl')
+        images = [
+            str(TESTDATA.joinpath(fname))
+            for fname in ('code128.png', 'qrcode.png')
+        ]
+        main(images + ['--output', str(path)])
+
+        with path.open() as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual(
+            [
+                (images[0], 'Foramenifera'), (images[0], 'Rana temporaria'),
+                (images[1], 'Thalassiodracon'),
+            ],
+            [(r['source'], r['data']) for r in rows]
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,219 @@
+"""Decodes frames from a camera stream, tracking barcodes between frames.
+
+A barcode found in one frame is usually close to the same place in the next.
+`TrackingDecoder` first scans a region around the predicted location of each
+barcode that it is tracking and scans the whole frame only periodically, when
+a tracked barcode is lost or when nothing is being tracked. If the number of
+barcodes in view is known, regions are scanned only until that many are
+found, and periodic scans of the whole frame are skipped while they are.
+"""
+from .locations import Rect
+from .preprocess import _center, _is_duplicate, _translate_decoded, crop
+from .pyzbar import _pixel_data, _scan
+from .scanners import ScannerPool
+
+__all__ = ['TrackingDecoder', 'TrackingStats']
+
+
+class TrackingStats(object):
+    """Counts accumulated by a `TrackingDecoder`.
+
+    Attributes:
+        frames (int): number of frames decoded.
+        full_scans (int): number of frames that were scanned in full.
+        region_scans (int): number of regions scanned.
+        region_hits (int): number of regions in which the tracked barcode was
+            found.
+        lost (int): number of tracks that were lost.
+        regions_skipped (int): number of tracked regions that were not
+            scanned because the expected number of barcodes had been found.
+        full_scans_skipped (int): number of periodic scans of the whole frame
+            that were skipped because the expected number of barcodes had
+            been found in tracked regions.
+    """
+    def __init__(self):
+        self.frames = self.full_scans = 0
+        self.region_scans = self.region_hits = self.lost = 0
+        self.regions_skipped = self.full_scans_skipped = 0
+
+    def __repr__(self):
+        return (
+            'TrackingStats(frames={0}, full_scans={1}, region_scans={2}, '
+            'region_hits={3}, lost={4}, regions_skipped={5}, '
+            'full_scans_skipped={6})'
+        ).format(
+            self.frames, self.full_scans, self.region_scans, self.region_hits,
+            self.lost, self.regions_skipped, self.full_scans_skipped
+        )
+
+
+class _Track(object):
+    """A barcode seen in recent frames.
+    """
+    def __init__(self, decoded):
+        self.key = (decoded.type, decoded.data)
+        self.rect = decoded.rect
+        self.velocity = (0, 0)
+
+    def update(self, decoded):
+        rect = decoded.rect
+        self.velocity = (rect.left - self.rect.left, rect.top - self.rect.top)
+        self.rect = rect
+
+    def distance(self, decoded):
+        """Squared distance of `decoded` from the predicted location.
+        """
+        (x, y), (px, py) = _center(decoded.rect), _center(self.rect)
+        dx, dy = self.velocity
+        return (x - px - dx) ** 2 + (y - py - dy) ** 2
+
+    def region(self, margin):
+        """The rect in which the barcode is expected in the next frame.
+        """
+        rect = self.rect
+        dx, dy = self.velocity
+        pad_x = int(margin * max(rect.width, rect.height)) + abs(dx)
+        pad_y = int(margin * max(rect.width, rect.height)) + abs(dy)
+        return Rect(
+            rect.left + dx - pad_x, rect.top + dy - pad_y,
+            rect.width + 2 * pad_x, rect.height + 2 * pad_y
+        )
+
+
+class TrackingDecoder(object):
+    """Decodes a stream of frames, scanning regions around barcodes found in
+    earlier frames before falling back to scanning the whole frame.
+
+    Results are in the coordinates of the full frame.
+
+    Args:
+        symbols: iter(ZBarSymbol) the symbol types to decode; if `None`,
+            decodes all symbol types.
+        margin (float): each tracked region is expanded on every side by this
+            fraction of the larger dimension of the barcode, plus the distance
+            that it moved between the last two frames.
+        full_scan_interval (int): the whole frame is scanned at least once in
+            this many frames, so that new barcodes are found.
+        scanner_pool (ScannerPool): source of scanners; if `None`, the decoder
+            creates its own.
+        expected (int): if given, the number of barcodes in view; tracked
+            regions are scanned only until this many distinct barcodes are
+            found, and a periodic scan of the whole frame is skipped if they
+            are.
+
+    Raises:
+        ValueError: If `expected` is less than 1.
+    """
+    def __init__(self, symbols=None, margin=0.5, full_scan_interval=10,
+                 scanner_pool=None, expected=None):
+        if expected is not None and expected < 1:
+            raise ValueError('expected must be at least 1')
+        self.symbols = symbols
+        self.expected = expected
+        self.margin = margin
+        self.full_scan_interval = full_scan_interval
+        self._own_pool = scanner_pool is None
+        self.scanner_pool = ScannerPool() if self._own_pool else scanner_pool
+        self.stats = TrackingStats()
+        self._tracks = []
+        self._since_full_scan = 0
+
+    def reset(self):
+        """Forgets all tracked barcodes; the next frame is scanned in full.
+        """
+        self._tracks = []
+
+    def close(self):
+        """Releases scanners created by this decoder.
+        """
+        if self._own_pool:
+            self.scanner_pool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def decode(self, frame, buffer_pool=None):
+        """Decodes `frame`.
+
+        Args:
+            frame: `numpy.ndarray`, `PIL.Image` or tuple (pixels, width,
+                height)
+            buffer_pool (BufferPool): as for `pyzbar.pyzbar.decode`.
+
+        Returns:
+            :obj:`list` of :obj:`Decoded`: The values decoded from barcodes.
+        """
+        self.stats.frames += 1
+        pixels, width, height = _pixel_data(frame, buffer_pool)
+        try:
+            with self.scanner_pool.scanner(self.symbols) as scanner:
+                results = None
+                due = self.full_scan_interval <= self._since_full_scan
+                if self._tracks and (not due or self._enough(self._tracks)):
+                    results = self._scan_regions(scanner, pixels, width, height)
+                    if due:
+                        if results is not None and self._enough(results):
+                            self.stats.full_scans_skipped += 1
+                        else:
+                            results = None
+
+                if results is None:
+                    results = _scan(scanner, pixels, width, height)
+                    self.stats.full_scans += 1
+                    self._since_full_scan = 0
+                    self._tracks = [_Track(decoded) for decoded in results]
+                else:
+                    self._since_full_scan += 1
+                return results
+        finally:
+            if buffer_pool is not None:
+                buffer_pool.release(pixels)
+
+    def _enough(self, found):
+        """`True` if `expected` is given and `found` has at least that many
+        items.
+        """
+        return self.expected is not None and self.expected <= len(found)
+
+    def _scan_regions(self, scanner, pixels, width, height):
+        """Scans the predicted region of each track, until the expected number
+        of barcodes has been found.
+
+        Returns:
+            :obj:`list` of :obj:`Decoded`, or `None` if a track was lost.
+        """
+        results = []
+        for index, track in enumerate(self._tracks):
+            if self._enough(results):
+                self.stats.regions_skipped += len(self._tracks) - index
+                break
+            region = track.region(self.margin)
+            region_pixels, region_width, region_height = crop(
+                pixels, width, height, region
+            )
+            self.stats.region_scans += 1
+            decoded = []
+            if region_width and region_height:
+                left, top = max(0, region.left), max(0, region.top)
+                decoded = [
+                    _translate_decoded(d, left, top)
+                    for d in _scan(
+                        scanner, region_pixels, region_width, region_height
+                    )
+                ]
+
+            for d in decoded:
+                if not any(_is_duplicate(d, r) for r in results):
+                    results.append(d)
+
+            matches = [d for d in decoded if track.key == (d.type, d.data)]
+            if matches:
+                self.stats.region_hits += 1
+                track.update(min(matches, key=track.distance))
+            else:
+                self.stats.lost += 1
+                return None
+        return results
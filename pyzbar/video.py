@@ -0,0 +1,324 @@
+"""Decodes frames from a live video source without falling behind.
+
+`VideoPipeline` reads frames on one thread and decodes them on a pool of
+worker threads. Frames wait in a small buffer; when decoding falls behind the
+buffer overflows and frames are dropped - by default the oldest, so that the
+most recent frame is always decoded next - rather than queueing without limit.
+"""
+import time
+
+from collections import deque, namedtuple
+from threading import Condition, Lock, Thread
+
+try:
+    import queue
+except ImportError:
+    # Python 2
+    import Queue as queue
+
+from .pyzbar import _pixel_data, _scan
+from .scanners import ScannerPool
+
+__all__ = ['FrameResult', 'PipelineStats', 'VideoPipeline']
+
+
+_CLOCK = getattr(time, 'perf_counter', time.time)
+
+# Ends the stream of results
+_END = object()
+
+
+class FrameResult(namedtuple('FrameResult', 'index results error latency')):
+    """The outcome of decoding one frame.
+
+    Attributes:
+        index (int): position of the frame in the stream, counting dropped
+            frames.
+        results: :obj:`list` of :obj:`Decoded`.
+        error (Exception): the error raised while decoding the frame, or
+            `None`.
+        latency (float): seconds from capture of the frame until it was
+            decoded.
+    """
+    __slots__ = ()
+
+
+class PipelineStats(object):
+    """Counts accumulated by a `VideoPipeline`.
+
+    Attributes:
+        captured (int): number of frames read from the source.
+        decoded (int): number of frames decoded.
+        dropped (int): number of frames dropped because decoding fell behind.
+        errors (int): number of frames that raised an error.
+        latency_sum (float): total seconds from capture to decoding.
+        latency_max (float): longest time from capture to decoding.
+        elapsed (float): seconds for which the pipeline has been running.
+    """
+    def __init__(self):
+        self.captured = self.decoded = self.dropped = self.errors = 0
+        self.latency_sum = self.latency_max = 0.0
+        self.elapsed = 0.0
+
+    @property
+    def fps(self):
+        """Frames decoded per second.
+        """
+        return self.decoded / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def drop_rate(self):
+        """Fraction of captured frames that were dropped.
+        """
+        return float(self.dropped) / self.captured if self.captured else 0.0
+
+    @property
+    def mean_latency(self):
+        """Mean seconds from capture to decoding.
+        """
+        return self.latency_sum / self.decoded if self.decoded else 0.0
+
+    def __repr__(self):
+        return (
+            'PipelineStats(captured={0}, decoded={1}, dropped={2}, '
+            'errors={3}, fps={4:.1f}, drop_rate={5:.3f}, '
+            'mean_latency={6:.4f}, latency_max={7:.4f})'
+        ).format(
+            self.captured, self.decoded, self.dropped, self.errors, self.fps,
+            self.drop_rate, self.mean_latency, self.latency_max
+        )
+
+
+class _FrameBuffer(object):
+    """A bounded buffer of frames that drops frames when it is full.
+    """
+    def __init__(self, size, drop):
+        self.size = size
+        self.drop = drop
+        self.frames = deque()
+        self.closed = False
+        self.condition = Condition()
+
+    def put(self, frame):
+        """Adds `frame`.
+
+        Returns:
+            int: the number of frames dropped - 0 or 1.
+        """
+        with self.condition:
+            dropped = 0
+            if self.closed:
+                return 1
+            elif len(self.frames) >= self.size:
+                if 'newest' == self.drop:
+                    return 1
+                self.frames.popleft()
+                dropped = 1
+            self.frames.append(frame)
+            self.condition.notify()
+            return dropped
+
+    def get(self):
+        """Returns the next frame, waiting if there is none, or `None` once
+        the buffer has been closed and emptied.
+        """
+        with self.condition:
+            while not self.frames and not self.closed:
+                self.condition.wait()
+            return self.frames.popleft() if self.frames else None
+
+    def close(self, discard=False):
+        """Wakes waiting threads; frames are discarded if `discard`.
+
+        Returns:
+            int: the number of frames discarded.
+        """
+        with self.condition:
+            discarded = len(self.frames) if discard else 0
+            if discard:
+                self.frames.clear()
+            self.closed = True
+            self.condition.notify_all()
+            return discarded
+
+
+def _grey(frame, buffer_pool):
+    """Returns (pixels, width, height) of `frame`.
+
+    Three-channel BGR frames are converted to greyscale with OpenCV, if it is
+    installed, writing directly into a buffer from `buffer_pool`. Single
+    channel frames are used without copying.
+    """
+    if 3 == len(getattr(frame, 'shape', ())):
+        try:
+            import cv2
+        except ImportError:
+            pass
+        else:
+            height, width = frame.shape[:2]
+            dst = buffer_pool.acquire((height, width)) if buffer_pool else None
+            try:
+                pixels = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=dst)
+            except Exception:
+                if dst is not None:
+                    buffer_pool.release(dst)
+                raise
+            if dst is not None and pixels is not dst:
+                # OpenCV allocated a new array rather than writing into dst
+                buffer_pool.release(dst)
+            return pixels, width, height
+    return _pixel_data(frame, buffer_pool)
+
+
+class VideoPipeline(object):
+    """Reads frames from `source` on a capture thread and decodes them on
+    `workers` threads, dropping frames when decoding falls behind.
+
+    Results are obtained by iterating over the pipeline, which yields a
+    `FrameResult` for each decoded frame, in the order in which decoding
+    finished, until the source is exhausted or `stop` is called. If reading
+    from the source raises an exception, the frames already captured are
+    decoded and the exception is then raised by the iteration.
+
+    Args:
+        source: an object with a `read` method that returns a tuple
+            (success, frame), such as `cv2.VideoCapture`, or a device index or
+            path that is opened with `cv2.VideoCapture`.
+        symbols: iter(ZBarSymbol) the symbol types to decode; if `None`,
+            decodes all symbol types.
+        workers (int): number of decoding threads.
+        max_pending (int): the greatest number of frames that wait to be
+            decoded; 1 means that only the latest frame waits.
+        drop (str): which frame is dropped when `max_pending` frames are
+            waiting: 'oldest' drops the oldest waiting frame, so the latest
+            frame wins; 'newest' drops the frame just captured.
+        buffer_pool (BufferPool): source of greyscale buffers for converted
+            frames.
+        scanner_pool (ScannerPool): source of scanners; if `None`, the
+            pipeline creates its own.
+    """
+    def __init__(self, source, symbols=None, workers=2, max_pending=1,
+                 drop='oldest', buffer_pool=None, scanner_pool=None):
+        if drop not in ('oldest', 'newest'):
+            raise ValueError("drop must be either 'oldest' or 'newest'")
+        self.symbols = symbols
+        self.workers = workers
+        self.buffer_pool = buffer_pool
+        self._own_pool = scanner_pool is None
+        self.scanner_pool = ScannerPool() if self._own_pool else scanner_pool
+        self.stats = PipelineStats()
+
+        self._own_source = not hasattr(source, 'read')
+        if self._own_source:
+            import cv2
+            source = cv2.VideoCapture(source)
+        self.source = source
+
+        self._pending = _FrameBuffer(max_pending, drop)
+        self._results = queue.Queue()
+        self._lock = Lock()
+        self._threads = []
+        self._running_workers = 0
+        self._started = None
+        self._stopping = False
+        self._error = None
+
+    def start(self):
+        """Starts the capture and decoding threads.
+        """
+        self._started = _CLOCK()
+        self._running_workers = self.workers
+        self._threads = [Thread(target=self._capture)] + [
+            Thread(target=self._work) for _ in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.daemon = True
+            thread.start()
+        return self
+
+    def stop(self):
+        """Stops capturing, discards frames that are waiting and waits for
+        frames that are being decoded.
+        """
+        self._stopping = True
+        discarded = self._pending.close(discard=True)
+        with self._lock:
+            self.stats.dropped += discarded
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        if self._own_source:
+            self.source.release()
+        if self._own_pool:
+            self.scanner_pool.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def __iter__(self):
+        while True:
+            result = self._results.get()
+            if result is _END:
+                # Leave the end marker for other consumers
+                self._results.put(_END)
+                if self._error is not None:
+                    raise self._error
+                return
+            yield result
+
+    def _capture(self):
+        index = 0
+        try:
+            while not self._stopping:
+                ok, frame = self.source.read()
+                if not ok:
+                    break
+                captured = _CLOCK()
+                dropped = self._pending.put((index, frame, captured))
+                with self._lock:
+                    self.stats.captured += 1
+                    self.stats.dropped += dropped
+                index += 1
+        except Exception as e:
+            # Raised by __iter__ once the captured frames have been decoded
+            self._error = e
+        finally:
+            self._pending.close()
+
+    def _work(self):
+        try:
+            with self.scanner_pool.scanner(self.symbols) as scanner:
+                item = self._pending.get()
+                while item is not None:
+                    self._results.put(self._decode(scanner, *item))
+                    item = self._pending.get()
+        finally:
+            with self._lock:
+                self._running_workers -= 1
+                last = 0 == self._running_workers
+            if last:
+                self._results.put(_END)
+
+    def _decode(self, scanner, index, frame, captured):
+        pixels = None
+        try:
+            pixels, width, height = _grey(frame, self.buffer_pool)
+            results, error = _scan(scanner, pixels, width, height), None
+        except Exception as e:
+            results, error = [], e
+        finally:
+            if self.buffer_pool is not None and pixels is not None:
+                self.buffer_pool.release(pixels)
+
+        latency = _CLOCK() - captured
+        with self._lock:
+            stats = self.stats
+            stats.decoded += 1
+            stats.errors += error is not None
+            stats.latency_sum += latency
+            stats.latency_max = max(stats.latency_max, latency)
+            stats.elapsed = _CLOCK() - self._started
+        return FrameResult(index, results, error, latency)
@@ -0,0 +1,320 @@
+"""Decodes images that are too large to hold in memory, one window at a time.
+
+`decode_windowed` reads a window of the image from disk, scans it and
+discards it before reading the next, so memory use depends on the size of the
+windows rather than the size of the image. Windows overlap so that every
+barcode that is smaller than the overlap lies wholly within at least one
+window. Results are in the coordinates of the full image. If the number of
+barcodes in the image is known, windows are read only until that many are
+found.
+
+Windows are read without loading the rest of the image from:
+
+* raw eight bits-per-pixel files, described by `RawImage`, and binary PGMs,
+  which are memory-mapped;
+* uncompressed eight bits-per-pixel TIFFs, striped or tiled, which are
+  memory-mapped;
+* compressed TIFFs, if `tifffile` is installed, of which only the strips or
+  tiles that intersect each window are decompressed.
+
+Other images are loaded in full with `PIL`.
+"""
+import mmap
+
+from collections import namedtuple
+
+from .locations import Rect
+from .preprocess import _is_duplicate, _translate_decoded, crop
+from .pyzbar import _configure_scanner, _image_scanner, _pixel_data, _scan
+
+__all__ = ['RawImage', 'WindowStats', 'decode_windowed', 'open_windowed']
+
+
+class RawImage(namedtuple('RawImage', 'path width height offset')):
+    """A file of eight bits-per-pixel greyscale pixels, row by row from the
+    top.
+
+    Attributes:
+        path (str): path of the file.
+        width (int): width of the image.
+        height (int): height of the image.
+        offset (int): position of the first pixel in the file.
+    """
+    __slots__ = ()
+
+    def __new__(cls, path, width, height, offset=0):
+        return super(RawImage, cls).__new__(cls, path, width, height, offset)
+
+
+class WindowStats(object):
+    """Counts accumulated by `decode_windowed`.
+
+    Attributes:
+        images (int): number of images decoded.
+        windows (int): number of windows read and scanned.
+        skipped (int): number of windows that were not read because the
+            expected number of barcodes had been found.
+    """
+    def __init__(self):
+        self.images = self.windows = self.skipped = 0
+
+    def __repr__(self):
+        return 'WindowStats(images={0}, windows={1}, skipped={2})'.format(
+            self.images, self.windows, self.skipped
+        )
+
+
+def _positions(length, window, overlap):
+    """Starting positions of windows of `window` pixels, overlapping by
+    `overlap`, that cover `length` pixels.
+    """
+    if length <= window:
+        return [0]
+    positions = list(range(0, length - window + 1, window - overlap))
+    if positions[-1] + window < length:
+        positions.append(length - window)
+    return positions
+
+
+class _MappedTiles(object):
+    """Reads windows of an image that is stored uncompressed, in one or more
+    rectangular tiles, in a memory-mapped file.
+
+    Args:
+        path (str): path of the file.
+        width (int): width of the image.
+        height (int): height of the image.
+        tiles: iterable of tuples (left, top, right, bottom, offset, stride,
+            orientation) - stride is the number of bytes between rows of the
+            tile; orientation is 1 if its rows are stored from the top and -1
+            if from the bottom.
+    """
+    def __init__(self, path, width, height, tiles):
+        self.width, self.height = width, height
+        self.tiles = list(tiles)
+        self._file = open(str(path), 'rb')
+        try:
+            self._map = mmap.mmap(
+                self._file.fileno(), 0, access=mmap.ACCESS_READ
+            )
+        except Exception:
+            self._file.close()
+            raise
+
+    def read(self, left, top, width, height):
+        window = bytearray(width * height)
+        right, bottom = left + width, top + height
+        for t_left, t_top, t_right, t_bottom, offset, stride, orientation in (
+                self.tiles):
+            x0, x1 = max(left, t_left), min(right, t_right, self.width)
+            y0, y1 = max(top, t_top), min(bottom, t_bottom, self.height)
+            if x0 < x1 and y0 < y1:
+                for y in range(y0, y1):
+                    row = y - t_top if 0 < orientation else t_bottom - 1 - y
+                    start = offset + row * stride + x0 - t_left
+                    pos = (y - top) * width + x0 - left
+                    count = x1 - x0
+                    window[pos:pos + count] = self._map[start:start + count]
+        return bytes(window)
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+def _pil_tiles(image):
+    """Tiles of `image`, opened by `PIL` but not loaded, as for `_MappedTiles`,
+    or `None` if its pixels are not stored as uncompressed eight
+    bits-per-pixel greyscale.
+    """
+    tiles = []
+    for codec, extents, offset, args in (tuple(t)[:4] for t in image.tile):
+        args = args if isinstance(args, tuple) else (args,)
+        mode, stride, orientation = (args + (0, 1))[:3]
+        if 'raw' != codec or 'L' != mode or orientation not in (1, -1):
+            return None
+        left, top, right, bottom = extents
+        tiles.append(
+            (left, top, right, bottom, offset, stride or right - left,
+             orientation)
+        )
+    return tiles or None
+
+
+class _TiffSegments(object):
+    """Reads windows of a TIFF with `tifffile`, decompressing only the strips
+    or tiles that intersect each window.
+    """
+    def __init__(self, tiff):
+        self.tiff = tiff
+        self.page = page = tiff.pages[0]
+        self.height, self.width = page.imagelength, page.imagewidth
+        if page.is_tiled:
+            self.segment_width, self.segment_height = (
+                page.tilewidth, page.tilelength
+            )
+        else:
+            self.segment_width = self.width
+            self.segment_height = min(page.rowsperstrip, self.height)
+
+    def read(self, left, top, width, height):
+        import numpy as np
+
+        page, handle = self.page, self.tiff.filehandle
+        window = np.empty((height, width), dtype='uint8')
+        across = -(-self.width // self.segment_width)
+        for row in range(top // self.segment_height,
+                         (top + height - 1) // self.segment_height + 1):
+            for column in range(left // self.segment_width,
+                                (left + width - 1) // self.segment_width + 1):
+                index = row * across + column
+                handle.seek(page.dataoffsets[index])
+                segment = page.decode(
+                    handle.read(page.databytecounts[index]), index
+                )[0]
+                # (depth, length, width, samples) - take the first sample
+                segment = segment[0, :, :, 0]
+                s_left = column * self.segment_width
+                s_top = row * self.segment_height
+                x0, y0 = max(left, s_left), max(top, s_top)
+                x1 = min(left + width, s_left + segment.shape[1])
+                y1 = min(top + height, s_top + segment.shape[0])
+                window[y0 - top:y1 - top, x0 - left:x1 - left] = segment[
+                    y0 - s_top:y1 - s_top, x0 - s_left:x1 - s_left
+                ]
+        return window
+
+    def close(self):
+        self.tiff.close()
+
+
+class _Loaded(object):
+    """Reads windows of an image that is loaded in full.
+    """
+    def __init__(self, image):
+        self.pixels, self.width, self.height = _pixel_data(image)
+
+    def read(self, left, top, width, height):
+        return crop(
+            self.pixels, self.width, self.height,
+            Rect(left, top, width, height)
+        )[0]
+
+    def close(self):
+        self.pixels = None
+
+
+def _tifffile_reader(path):
+    """A `_TiffSegments` for the TIFF at `path`, or `None` if `tifffile` is
+    not installed or cannot read it by segments.
+    """
+    try:
+        import tifffile
+    except ImportError:
+        return None
+    try:
+        tiff = tifffile.TiffFile(str(path))
+    except Exception:
+        return None
+    page = tiff.pages[0]
+    if ('uint8' != str(page.dtype) or 1 != page.imagedepth or
+            1 != page.planarconfig and 1 < page.samplesperpixel):
+        tiff.close()
+        return None
+    return _TiffSegments(tiff)
+
+
+def open_windowed(source):
+    """Returns a reader of windows of `source`, with attributes `width` and
+    `height` and methods `read(left, top, width, height)`, which returns the
+    pixels of a window, and `close()`.
+
+    Args:
+        source: a `RawImage`, the path of an image file, or an image accepted
+            by `decode`.
+    """
+    if isinstance(source, RawImage):
+        return _MappedTiles(
+            source.path, source.width, source.height,
+            [(0, 0, source.width, source.height, source.offset, source.width,
+              1)]
+        )
+    elif isinstance(source, str) or hasattr(source, '__fspath__'):
+        from PIL import Image
+
+        # Opening an image reads only its header
+        with Image.open(str(source)) as image:
+            width, height = image.size
+            tiles = _pil_tiles(image)
+            is_tiff = 'TIFF' == image.format
+        if tiles:
+            return _MappedTiles(source, width, height, tiles)
+        reader = _tifffile_reader(source) if is_tiff else None
+        if reader:
+            return reader
+        with Image.open(str(source)) as image:
+            return _Loaded(image)
+    else:
+        return _Loaded(source)
+
+
+def decode_windowed(source, symbols=None, window=2048, overlap=256,
+                    expected=None, stats=None):
+    """Decodes `source` one window at a time.
+
+    Args:
+        source: a `RawImage`, the path of an image file, or an image accepted
+            by `decode`; see the module's documentation for which are read
+            window by window.
+        symbols: iter(ZBarSymbol) the symbol types to decode; if `None`,
+            decodes all symbol types.
+        window (int): width and height of each window in pixels.
+        overlap (int): number of pixels by which adjacent windows overlap,
+            which should be at least the size of the largest barcode.
+        expected (int): if given, no more windows are read once this many
+            distinct barcodes have been found.
+        stats (WindowStats): if given, counts are added to it.
+
+    Returns:
+        :obj:`list` of :obj:`Decoded`: The values decoded from barcodes, in
+        the coordinates of the full image and without duplicates.
+
+    Raises:
+        ValueError: If `overlap` is not less than `window` or `expected` is
+            less than 1.
+        PyZbarError: If a window could not be scanned.
+    """
+    if not 0 <= overlap < window:
+        raise ValueError('overlap must be at least 0 and less than window')
+    elif expected is not None and expected < 1:
+        raise ValueError('expected must be at least 1')
+
+    stats = WindowStats() if stats is None else stats
+    stats.images += 1
+    reader = open_windowed(source)
+    try:
+        merged = []
+        positions = [
+            (left, top)
+            for top in _positions(reader.height, window, overlap)
+            for left in _positions(reader.width, window, overlap)
+        ]
+        with _image_scanner() as scanner:
+            _configure_scanner(scanner, symbols)
+            for index, (left, top) in enumerate(positions):
+                if expected is not None and expected <= len(merged):
+                    stats.skipped += len(positions) - index
+                    break
+                stats.windows += 1
+                width = min(window, reader.width - left)
+                height = min(window, reader.height - top)
+                pixels = reader.read(left, top, width, height)
+                results = _scan(scanner, pixels, width, height)
+                del pixels
+                for decoded in results:
+                    decoded = _translate_decoded(decoded, left, top)
+                    if not any(_is_duplicate(decoded, m) for m in merged):
+                        merged.append(decoded)
+        return merged
+    finally:
+        reader.close()
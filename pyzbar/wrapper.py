@@ -1,17 +1,26 @@
 """Low-level wrapper around zbar's interface
+
+Thread safety: the shared library is loaded and the foreign functions below
+are created once, when this module is first imported; after that the
+module-level state is read-only. `ctypes` releases the GIL for the duration of
+each call into `zbar`. A `zbar_image_scanner` or `zbar_image` must be used by
+only one thread at a time; distinct objects may be used concurrently from any
+number of threads, on both the standard and free-threaded builds of CPython.
 """
 from ctypes import (
     c_ubyte, c_char_p, c_int, c_uint, c_ulong, c_void_p, Structure,
     CFUNCTYPE, POINTER
 )
 from enum import IntEnum, unique
+from threading import Lock
 
 from . import zbar_library
 
 
 __all__ = [
     'EXTERNAL_DEPENDENCIES', 'LIBZBAR', 'ZBarConfig', 'ZBarSymbol', 'ZBarOrientation',
-    'zbar_image_create', 'zbar_image_destroy', 'zbar_image_first_symbol',
+    'zbar_image_create', 'zbar_image_destroy', 'zbar_image_convert',
+    'zbar_image_first_symbol',
     'zbar_image_scanner_create', 'zbar_image_scanner_destroy',
     'zbar_image_scanner_set_config', 'zbar_image_set_data',
     'zbar_image_set_format', 'zbar_image_set_size', 'zbar_scan_image',
@@ -19,6 +28,8 @@ __all__ = [
     'zbar_symbol_get_loc_size', 'zbar_symbol_get_loc_x',
     'zbar_symbol_get_loc_y', 'zbar_symbol_next',
     'zbar_symbol_get_orientation', 'zbar_symbol_get_quality',
+    'zbar_image_get_symbols', 'zbar_symbol_set_ref',
+    'zbar_symbol_set_first_symbol',
 ]
 
 # Globals populated in load_libzbar
@@ -30,6 +41,8 @@ EXTERNAL_DEPENDENCIES = []
 """List of instances of ctypes.CDLL. Helpful when freezing.
 """
 
+_LOAD_LOCK = Lock()
+
 # Types
 c_ubyte_p = POINTER(c_ubyte)
 c_uint_p = POINTER(c_uint)
@@ -116,6 +129,15 @@ class zbar_symbol(Structure):
     ]
 
 
+class zbar_symbol_set(Structure):
+    """Opaque C++ class with private implementation
+
+    A reference-counted set of the symbols decoded from an image, which
+    outlives the image while a reference is held.
+    """
+    pass
+
+
 def load_libzbar():
     """Loads the zbar shared library and its dependencies.
 
@@ -123,10 +145,11 @@ def load_libzbar():
     """
     global LIBZBAR
     global EXTERNAL_DEPENDENCIES
-    if not LIBZBAR:
-        libzbar, dependencies = zbar_library.load()
-        LIBZBAR = libzbar
-        EXTERNAL_DEPENDENCIES = [LIBZBAR] + dependencies
+    with _LOAD_LOCK:
+        if not LIBZBAR:
+            libzbar, dependencies = zbar_library.load()
+            EXTERNAL_DEPENDENCIES = [libzbar] + dependencies
+            LIBZBAR = libzbar
 
     return LIBZBAR
 
@@ -225,6 +248,13 @@ zbar_image_set_data = zbar_function(
     c_void_p    # A function pointer(!)
 )
 
+zbar_image_convert = zbar_function(
+    'zbar_image_convert',
+    POINTER(zbar_image),
+    POINTER(zbar_image),
+    c_ulong     # format - a fourcc
+)
+
 zbar_scan_image = zbar_function(
     'zbar_scan_image',
     c_int,
@@ -238,6 +268,25 @@ zbar_image_first_symbol = zbar_function(
     POINTER(zbar_image)
 )
 
+zbar_image_get_symbols = zbar_function(
+    'zbar_image_get_symbols',
+    POINTER(zbar_symbol_set),
+    POINTER(zbar_image)
+)
+
+zbar_symbol_set_ref = zbar_function(
+    'zbar_symbol_set_ref',
+    None,
+    POINTER(zbar_symbol_set),
+    c_int
+)
+
+zbar_symbol_set_first_symbol = zbar_function(
+    'zbar_symbol_set_first_symbol',
+    POINTER(zbar_symbol),
+    POINTER(zbar_symbol_set)
+)
+
 zbar_symbol_get_data_length = zbar_function(
     'zbar_symbol_get_data_length',
     c_uint,
@@ -0,0 +1,459 @@
+"""Writers that stream decoded results to JSON Lines, CSV, Arrow and Parquet
+files.
+
+Each decoded barcode becomes one row, identified by the source that it came
+from - a path or an index - and the page of the source. Locations are
+flattened into columns. Rows are buffered and written in chunks of
+`chunk_size`, which are the row groups of Parquet files, so that memory use
+does not grow with the number of images.
+
+Columns:
+    source (str): path or other identifier of the image.
+    page (int): index of the page or frame within the source.
+    type (str): symbol type.
+    data (str): the decoded data as UTF-8, with invalid bytes replaced.
+    data_base64 (str): the decoded data, base64-encoded.
+    rect_left, rect_top, rect_width, rect_height (int): bounding box.
+    polygon_x, polygon_y: coordinates of the vertices of the polygon - lists
+        in JSON Lines, Arrow and Parquet; space-separated in CSV.
+    quality (int): quality reported by `zbar`.
+    orientation (str): orientation reported by `zbar`, if available.
+
+Arrow and Parquet require `pyarrow` and `numpy`.
+"""
+import base64
+import csv
+import io
+import json
+import os
+
+from .locations import flatten
+
+__all__ = [
+    'ArrowWriter', 'CsvWriter', 'JsonLinesWriter', 'ParquetWriter',
+    'open_writer', 'read_rows'
+]
+
+
+COLUMNS = (
+    'source', 'page', 'type', 'data', 'data_base64', 'rect_left', 'rect_top',
+    'rect_width', 'rect_height', 'polygon_x', 'polygon_y', 'quality',
+    'orientation',
+)
+
+
+def _rows(source, page, results, include_empty):
+    """Generator of a dict for each of `results`.
+    """
+    source = str(source)
+    if not results and include_empty:
+        row = dict.fromkeys(COLUMNS)
+        row.update(source=source, page=page)
+        yield row
+    for decoded in results:
+        rect = decoded.rect
+        # Retained data are memoryviews
+        data = bytes(decoded.data)
+        yield {
+            'source': source,
+            'page': page,
+            'type': decoded.type,
+            'data': data.decode('utf-8', 'replace'),
+            'data_base64': base64.b64encode(data).decode('ascii'),
+            'rect_left': rect.left,
+            'rect_top': rect.top,
+            'rect_width': rect.width,
+            'rect_height': rect.height,
+            'polygon_x': [point[0] for point in decoded.polygon],
+            'polygon_y': [point[1] for point in decoded.polygon],
+            'quality': decoded.quality,
+            'orientation': decoded.orientation,
+        }
+
+
+class _Writer(object):
+    """Buffers rows and writes them in chunks.
+
+    Args:
+        chunk_size (int): number of rows written at a time.
+        include_empty (bool): if `True`, a row with only `source` and `page`
+            is written for images in which nothing was decoded.
+    """
+    def __init__(self, chunk_size=65536, include_empty=False):
+        self.chunk_size = chunk_size
+        self.include_empty = include_empty
+        self.rows_written = 0
+        self._rows = []
+
+    def write(self, source, results, page=0):
+        """Adds a row for each of `results`.
+
+        Args:
+            source: path or other identifier of the image, e.g.
+                `BatchResult.index`.
+            results: :obj:`list` of :obj:`Decoded`
+            page (int): index of the page or frame within the source.
+        """
+        self.write_rows(_rows(source, page, results, self.include_empty))
+
+    def write_rows(self, rows):
+        """Adds `rows` - dicts of `COLUMNS`, such as those read by
+        `read_rows`.
+        """
+        for row in rows:
+            self._rows.append(row)
+            if len(self._rows) >= self.chunk_size:
+                self.flush()
+
+    def write_batch(self, results, sources=None):
+        """Writes each of `results` as it is produced.
+
+        Args:
+            results: iterable of :obj:`BatchResult`, such as the generator
+                returned by `iter_decode`.
+            sources: if given, a sequence of the identifiers of the images,
+                indexed by `BatchResult.index`; otherwise the index is the
+                source.
+
+        Returns:
+            int: the number of results written.
+        """
+        count = 0
+        for result in results:
+            source = result.index if sources is None else sources[result.index]
+            self.write(source, result.results)
+            count += 1
+        return count
+
+    def flush(self):
+        """Writes buffered rows.
+        """
+        if self._rows:
+            rows, self._rows = self._rows, []
+            self._write_rows(rows)
+            self.rows_written += len(rows)
+
+    def close(self):
+        """Writes buffered rows and closes the file.
+        """
+        self.flush()
+        self._close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+# The type of text: `unicode` on Python 2
+_TEXT = type(u'')
+
+
+def _utf8(value):
+    """`value` encoded as UTF-8 if it is text, for the csv module of Python 2.
+    """
+    return value.encode('utf-8') if isinstance(value, _TEXT) else value
+
+
+class _EncodedFile(object):
+    """Decodes the UTF-8 bytes written by the csv module of Python 2 and
+    writes them to the text file `f`.
+    """
+    def __init__(self, f):
+        self._file = f
+
+    def write(self, data):
+        self._file.write(data.decode('utf-8'))
+
+
+def _open_text(path_or_file):
+    """Returns (file, owned) - owned is `True` if the file was opened here.
+    """
+    if hasattr(path_or_file, 'write'):
+        return path_or_file, False
+    else:
+        f = io.open(str(path_or_file), 'w', encoding='utf-8', newline='')
+        return f, True
+
+
+class JsonLinesWriter(_Writer):
+    """Writes one JSON object per line.
+
+    Args:
+        path_or_file: path, or text file-like object, to write to.
+        Other arguments are as for `CsvWriter`.
+    """
+    def __init__(self, path_or_file, chunk_size=65536, include_empty=False):
+        super(JsonLinesWriter, self).__init__(chunk_size, include_empty)
+        self._file, self._owned = _open_text(path_or_file)
+
+    def _write_rows(self, rows):
+        # json.dumps returns ASCII `str`, which is not text on Python 2
+        self._file.write(_TEXT(
+            ''.join(json.dumps(row, sort_keys=False) + '\n' for row in rows)
+        ))
+
+    def _close(self):
+        if self._owned:
+            self._file.close()
+        else:
+            self._file.flush()
+
+
+class CsvWriter(_Writer):
+    """Writes CSV with a header row.
+
+    Args:
+        path_or_file: path, or text file-like object, to write to.
+        chunk_size (int): number of rows written at a time.
+        include_empty (bool): if `True`, a row with only `source` and `page`
+            is written for images in which nothing was decoded.
+    """
+    def __init__(self, path_or_file, chunk_size=65536, include_empty=False):
+        super(CsvWriter, self).__init__(chunk_size, include_empty)
+        self._file, self._owned = _open_text(path_or_file)
+        if str is bytes:
+            # Python 2 - the csv module writes bytes
+            self._writer = csv.writer(_EncodedFile(self._file))
+        else:
+            self._writer = csv.writer(self._file)
+        self._writer.writerow(COLUMNS)
+
+    def _write_rows(self, rows):
+        rows = (
+            [
+                ' '.join(str(v) for v in row[column])
+                if isinstance(row[column], list) else row[column]
+                for column in COLUMNS
+            ]
+            for row in rows
+        )
+        if str is bytes:
+            # Python 2
+            rows = ([_utf8(value) for value in row] for row in rows)
+        self._writer.writerows(rows)
+
+    def _close(self):
+        if self._owned:
+            self._file.close()
+        else:
+            self._file.flush()
+
+
+def _arrow_schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ('source', pa.string()),
+        ('page', pa.int64()),
+        ('type', pa.string()),
+        ('data', pa.string()),
+        ('data_base64', pa.string()),
+        ('rect_left', pa.int32()),
+        ('rect_top', pa.int32()),
+        ('rect_width', pa.int32()),
+        ('rect_height', pa.int32()),
+        ('polygon_x', pa.list_(pa.int32())),
+        ('polygon_y', pa.list_(pa.int32())),
+        ('quality', pa.int32()),
+        ('orientation', pa.string()),
+    ])
+
+
+_POLYGON_COLUMNS = ('polygon_x', 'polygon_y')
+
+
+def _arrow_table(rows, schema):
+    import numpy as np
+    import pyarrow as pa
+
+    columns = dict(
+        (column, [row[column] for row in rows])
+        for column in COLUMNS if column not in _POLYGON_COLUMNS
+    )
+    # Polygons are packed into flat buffers of coordinates and offsets, which
+    # is the layout of Arrow's list columns; rows without a barcode have null
+    # polygons. List i is null if offsets[i] is null, so the final offset,
+    # which only ends the last list, is never null.
+    xs, ys, offsets = flatten(
+        zip(row['polygon_x'] or (), row['polygon_y'] or ()) for row in rows
+    )
+    null = np.array([row['polygon_x'] is None for row in rows] + [False])
+    offsets = pa.array(offsets, type=pa.int32(), mask=null)
+    columns['polygon_x'] = pa.ListArray.from_arrays(offsets, pa.array(xs))
+    columns['polygon_y'] = pa.ListArray.from_arrays(offsets, pa.array(ys))
+    return pa.Table.from_pydict(columns, schema=schema)
+
+
+class ParquetWriter(_Writer):
+    """Writes a Parquet file, one row group per chunk. Requires `pyarrow`.
+
+    Args:
+        path: path to write to.
+        chunk_size (int): number of rows in each row group.
+        include_empty (bool): as for `CsvWriter`.
+        compression (str): as for `pyarrow.parquet.ParquetWriter`.
+    """
+    def __init__(self, path, chunk_size=65536, include_empty=False,
+                 compression='snappy'):
+        import pyarrow.parquet as pq
+
+        super(ParquetWriter, self).__init__(chunk_size, include_empty)
+        self._schema = _arrow_schema()
+        self._writer = pq.ParquetWriter(
+            str(path), self._schema, compression=compression
+        )
+
+    def _write_rows(self, rows):
+        self._writer.write_table(_arrow_table(rows, self._schema))
+
+    def _close(self):
+        self._writer.close()
+
+
+class ArrowWriter(_Writer):
+    """Writes an Arrow IPC (Feather version 2) file, one record batch per
+    chunk. Requires `pyarrow`.
+
+    Args:
+        path: path to write to.
+        chunk_size (int): number of rows in each record batch.
+        include_empty (bool): as for `CsvWriter`.
+    """
+    def __init__(self, path, chunk_size=65536, include_empty=False):
+        import pyarrow as pa
+
+        super(ArrowWriter, self).__init__(chunk_size, include_empty)
+        self._schema = _arrow_schema()
+        self._sink = pa.OSFile(str(path), 'wb')
+        self._writer = pa.ipc.new_file(self._sink, self._schema)
+
+    def _write_rows(self, rows):
+        self._writer.write_table(_arrow_table(rows, self._schema))
+
+    def _close(self):
+        self._writer.close()
+        self._sink.close()
+
+
+_WRITERS = {
+    'jsonl': JsonLinesWriter,
+    'csv': CsvWriter,
+    'parquet': ParquetWriter,
+    'arrow': ArrowWriter,
+}
+
+_EXTENSIONS = {
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+    '.csv': 'csv',
+    '.parquet': 'parquet',
+    '.arrow': 'arrow',
+    '.feather': 'arrow',
+}
+
+
+def _format(path, format):
+    """Returns `format`, or the format chosen from the extension of `path`.
+    """
+    if format is None:
+        extension = os.path.splitext(str(path))[1].lower()
+        try:
+            format = _EXTENSIONS[extension]
+        except KeyError:
+            raise ValueError(
+                'Could not choose a format for the extension [{0}]'.format(
+                    extension
+                )
+            )
+    if format not in _WRITERS:
+        raise ValueError(
+            'Unknown format [{0}]. Formats are {1}.'.format(
+                format, sorted(_WRITERS)
+            )
+        )
+    return format
+
+
+def open_writer(path, format=None, **kwargs):
+    """Returns a writer for `path`.
+
+    Args:
+        path: path to write to.
+        format (str): one of 'jsonl', 'csv', 'parquet' or 'arrow'; if `None`,
+            chosen from the extension of `path`.
+        **kwargs: passed to the writer.
+
+    Raises:
+        ValueError: If the format is not known.
+    """
+    return _WRITERS[_format(path, format)](path, **kwargs)
+
+
+# Columns of CSV files that are not strings
+_CSV_INTEGERS = (
+    'page', 'rect_left', 'rect_top', 'rect_width', 'rect_height', 'quality'
+)
+_CSV_LISTS = ('polygon_x', 'polygon_y')
+_CSV_OPTIONAL = ('type', 'orientation')
+
+
+def _csv_row(row):
+    """Converts the values of a row read from a CSV file to their types.
+    Empty values are `None`.
+    """
+    for column in _CSV_INTEGERS:
+        row[column] = int(row[column]) if row[column] else None
+    for column in _CSV_LISTS:
+        row[column] = (
+            [int(v) for v in row[column].split()] if row[column] else None
+        )
+    for column in _CSV_OPTIONAL:
+        row[column] = row[column] or None
+    return row
+
+
+def read_rows(path, format=None):
+    """Generator of the rows of a file written by one of the writers, as
+    dicts of `COLUMNS`. Files are read a chunk at a time.
+
+    Args:
+        path: path to read.
+        format (str): as for `open_writer`.
+
+    Raises:
+        ValueError: If the format is not known.
+    """
+    format = _format(path, format)
+    if 'jsonl' == format:
+        with io.open(str(path), encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    elif 'csv' == format and str is bytes:
+        # Python 2 - the csv module reads bytes
+        with open(str(path), 'rb') as f:
+            for row in csv.DictReader(f):
+                yield _csv_row(
+                    dict((k, v.decode('utf-8')) for k, v in row.items())
+                )
+    elif 'csv' == format:
+        with io.open(str(path), encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                yield _csv_row(row)
+    elif 'parquet' == format:
+        import pyarrow.parquet as pq
+
+        parquet = pq.ParquetFile(str(path))
+        for group in range(parquet.num_row_groups):
+            for row in parquet.read_row_group(group).to_pylist():
+                yield row
+    else:
+        import pyarrow as pa
+
+        with pa.OSFile(str(path), 'rb') as f:
+            reader = pa.ipc.open_file(f)
+            for batch in range(reader.num_record_batches):
+                for row in reader.get_batch(batch).to_pylist():
+                    yield row